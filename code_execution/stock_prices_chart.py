@@ -1,19 +1,21 @@
 # filename: stock_prices_chart.py
-import pandas as pd
-import yfinance as yf
+import os
+import sys
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.market_data import get_market_data_store
 
 # Define the ticker symbols for META and Apple
 meta_symbol = 'META'
 apple_symbol = 'AAPL'
 
-# Download historical stock price data from 2022 to 2024 for META and Apple
-meta_data = yf.download(meta_symbol, start='2022-01-01', end='2024-01-01')
-apple_data = yf.download(apple_symbol, start='2022-01-01', end='2024-01-01')
-
-# Drop any rows with missing or NaN values
-meta_data.dropna(inplace=True)
-apple_data.dropna(inplace=True)
+# Load daily prices from 2022 to 2024 for META and Apple from the local market-data store,
+# which only downloads the date ranges it has not stored yet (rows with missing values are dropped)
+store = get_market_data_store()
+meta_data = store.get(meta_symbol, '2022-01-01', '2024-01-01')
+apple_data = store.get(apple_symbol, '2022-01-01', '2024-01-01')
 
 # Plot the Close prices for META and Apple
 plt.figure(figsize=(14, 7))
@@ -24,4 +26,6 @@ plt.xlabel('Date')
 plt.ylabel('Price')
 plt.legend()
 plt.grid()
-plt.show()
\ No newline at end of file
+# Save instead of plt.show(), which blocks headless runs
+plt.savefig('stock_prices_chart.png')
+print('Chart saved to stock_prices_chart.png')
@@ -0,0 +1,5 @@
+import sys
+
+from common.launcher import main
+
+sys.exit(main())
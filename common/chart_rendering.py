@@ -0,0 +1,250 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Annotated as A
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+"""
+Headless, batched chart rendering.
+
+Generated plotting code ends with `plt.show()`, which blocks (or fails) without a display, and
+every chart pays for a fresh interpreter and matplotlib setup. `ChartRenderer` takes chart specs
+instead of code:
+
+- line, bar and multi-series charts (several series on one axes; grouped bars for bar charts),
+- rendered with the Agg backend through matplotlib's object API (no pyplot global state),
+- in a process pool whose workers import matplotlib once and reuse one Figure, cleared
+  between charts,
+- written as PNG or SVG, chosen by the file extension.
+
+    renderer = get_chart_renderer()
+    renderer.render_many([
+        {"kind": "bar", "title": "Papers per application", "x": ["Imaging", "EHR"], "series": {"Papers": [12, 7]},
+         "filename": "applications.png"},
+    ])
+
+`chart_tool(output_dir)` exposes the renderer to agents as the `render_charts` tool. File names
+come from the model, so they must stay inside the output directory; anything resolving outside
+it (absolute paths, `..`) is rejected.
+
+Workers are forked: with the spawn or forkserver start methods each worker would re-run the
+calling script, and these scripts run their chats at module level. All workers are forked when
+the renderer is created, which must happen before the process starts other threads (HTTP pools,
+event loops, kernel clients), since a forked child inherits locks those threads may hold.
+`chart_tool()` therefore creates the renderer right away: build it before the agents and code
+executors. Where fork is unavailable (Windows), or other threads are already running, charts are
+rendered in the calling process instead.
+"""
+
+SUPPORTED_FORMATS = ("png", "svg")
+
+# Per-worker figure, reused from one chart to the next
+_figure = None
+
+
+class ChartSpec(BaseModel):
+    kind: Literal["line", "bar", "multi"] = Field(description="line, bar, or multi (several line series)")
+    title: str = ""
+    x: list[str] = Field(description="X values: category names for bar charts, labels or YYYY-MM-DD dates for line charts")
+    series: dict[str, list[float]] = Field(description="Series name -> values, one value per x")
+    filename: str = Field(description="Output file name ending in .png or .svg")
+    xlabel: str = ""
+    ylabel: str = ""
+    horizontal: bool = Field(default=False, description="Horizontal bars (bar charts with long category names)")
+
+
+def _get_figure():
+    global _figure
+    if _figure is None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        _figure = Figure()
+        FigureCanvasAgg(_figure)
+    return _figure
+
+
+def _x_values(x):
+    """Dates when every x value parses as one, the labels themselves otherwise."""
+    import numpy as np
+
+    try:
+        return np.array(x, dtype="datetime64[D]"), True
+    except (ValueError, TypeError):
+        return list(x), False
+
+
+def _output_path(output_dir, filename):
+    """Path of `filename` inside `output_dir`; names resolving outside of it are rejected."""
+    root = os.path.realpath(output_dir)
+    path = os.path.realpath(os.path.join(root, filename))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"file name {filename!r} is outside the output directory")
+    return path
+
+
+def _render(spec, output_dir):
+    """Render one chart spec to a file (runs in a pool worker)."""
+    import numpy as np
+
+    start = time.perf_counter()
+    path = _output_path(output_dir, spec["filename"])
+    fmt = os.path.splitext(path)[1].lstrip(".").lower() or "png"
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"unsupported format {fmt!r}, expected one of {SUPPORTED_FORMATS}")
+    series = spec.get("series") or {}
+    if spec.get("y") is not None:
+        series = {spec.get("ylabel") or "value": spec["y"]}
+
+    figure = _get_figure()
+    figure.clear()
+    figure.set_size_inches(*spec.get("size", (10, 6)))
+    figure.set_dpi(spec.get("dpi", 100))
+    axes = figure.add_subplot()
+
+    x = spec.get("x") or list(range(len(next(iter(series.values()), []))))
+    if spec["kind"] == "bar":
+        positions = np.arange(len(x))
+        width = 0.8 / max(1, len(series))
+        for i, (name, values) in enumerate(series.items()):
+            offsets = positions + (i - (len(series) - 1) / 2) * width
+            if spec.get("horizontal"):
+                axes.barh(offsets, values, height=width, label=name)
+            else:
+                axes.bar(offsets, values, width=width, label=name)
+        if spec.get("horizontal"):
+            axes.set_yticks(positions, [str(v) for v in x])
+            axes.invert_yaxis()
+        else:
+            axes.set_xticks(positions, [str(v) for v in x], rotation=30 if len(x) > 6 else 0, ha="right" if len(x) > 6 else "center")
+    else:
+        values_x, dates = _x_values(x)
+        for name, values in series.items():
+            axes.plot(values_x, values, label=name)
+        if dates:
+            figure.autofmt_xdate()
+        axes.grid(True, alpha=0.3)
+
+    axes.set_title(spec.get("title", ""))
+    axes.set_xlabel(spec.get("xlabel", ""))
+    axes.set_ylabel(spec.get("ylabel", ""))
+    if len(series) > 1:
+        axes.legend()
+    figure.tight_layout()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    figure.savefig(path, format=fmt)
+    return {"path": os.path.abspath(path), "duration_s": round(time.perf_counter() - start, 4)}
+
+
+def _warm_up():
+    _get_figure()
+
+
+def _spec_dict(spec):
+    return spec.model_dump() if isinstance(spec, BaseModel) else dict(spec)
+
+
+class ChartRenderer:
+    """
+    Renders batches of chart specs in a pool of matplotlib worker processes.
+
+    Args:
+        output_dir: Directory relative file names are written to.
+        max_workers: Pool size, 0 to render in the calling process.
+    """
+
+    def __init__(self, output_dir="code_execution", max_workers=2):
+        self.output_dir = output_dir
+        self.rendered = []
+        self._pool = None
+        # Fork only while this is the only thread (see the module docstring)
+        if max_workers and "fork" in multiprocessing.get_all_start_methods() and threading.active_count() == 1:
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("fork"), initializer=_warm_up
+            )
+            # The first task forks every worker, before the pool starts its own manager thread
+            self._pool.submit(_warm_up).result()
+
+    def render_many(self, specs, output_dir=None) -> list[dict]:
+        """Render all specs into `output_dir` (default: the renderer's), concurrently; one result per spec, in order."""
+        specs = [_spec_dict(spec) for spec in specs]
+        output_dir = output_dir or self.output_dir
+        start = time.perf_counter()
+        if self._pool is not None:
+            futures = [self._pool.submit(_render, spec, output_dir) for spec in specs]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    outcomes.append(e)
+        else:
+            outcomes = []
+            for spec in specs:
+                try:
+                    outcomes.append(_render(spec, output_dir))
+                except Exception as e:
+                    outcomes.append(e)
+
+        results = []
+        for spec, outcome in zip(specs, outcomes):
+            if isinstance(outcome, Exception):
+                results.append({"filename": spec.get("filename"), "ok": False, "error": f"{type(outcome).__name__}: {outcome}"})
+            else:
+                results.append({"filename": spec.get("filename"), "ok": True, **outcome})
+        self.rendered.append({"charts": len(specs), "wall_s": round(time.perf_counter() - start, 4)})
+        return results
+
+    def render(self, spec, output_dir=None) -> dict:
+        return self.render_many([spec], output_dir)[0]
+
+    def stats(self) -> dict:
+        return {
+            "batches": len(self.rendered),
+            "charts": sum(b["charts"] for b in self.rendered),
+            "wall_s": round(sum(b["wall_s"] for b in self.rendered), 3),
+            "workers": self._pool._max_workers if self._pool is not None else 0,
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_chart_renderer(output_dir="code_execution") -> ChartRenderer:
+    """Process-wide renderer (pool size from AG2_CHART_WORKERS, default 2)."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ChartRenderer(output_dir, max_workers=int(os.getenv("AG2_CHART_WORKERS", "2")))
+        return _renderer
+
+
+def chart_tool(output_dir="code_execution", renderer: Optional[ChartRenderer] = None):
+    """Build the `render_charts` tool, which renders a batch of chart specs into `output_dir`."""
+    # Created now rather than on the first call, so the workers are forked before the chats start threads
+    renderer = renderer or get_chart_renderer(output_dir)
+
+    def render_charts(charts: A[list[ChartSpec], "Charts to render"]) -> str:
+        specs = [_spec_dict(chart) for chart in charts]
+        lines = []
+        # A shared renderer may have another output directory
+        results = renderer.render_many(specs, output_dir=output_dir)
+        for spec, result in zip(specs, results):
+            name = spec["filename"]
+            if result["ok"]:
+                lines.append(f"Saved chart {name} to {result['path']}")
+            else:
+                lines.append(f"Failed to render {name}: {result['error']}")
+        return "\n".join(lines)
+
+    return render_charts
@@ -0,0 +1,385 @@
+import json
+import os
+import threading
+import time
+
+from peewee import (
+    AutoField,
+    CharField,
+    FloatField,
+    ForeignKeyField,
+    IntegerField,
+    JOIN,
+    Model,
+    SqliteDatabase,
+    TextField,
+    fn,
+)
+
+"""
+Persistent conversation store on SQLite (peewee).
+
+Agents keep every message of a chat in memory (`_oai_messages`) until the process exits, and
+`ChatResult.chat_history` disappears with it. `ConversationStore` appends each message to SQLite
+the moment it is sent (through the `process_message_before_send` hook), indexed by conversation,
+agent and timestamp, so that:
+
+- past conversations can be listed and searched without loading their messages,
+- history can be read back page by page (`page`, `iter_messages`),
+- long sessions can keep only the last few messages in memory (`keep_in_memory`), with the full
+  history on disk; older messages are paged back in lazily, either for every reply (`context`:
+  the LLM sees that many messages, the older ones read from disk for that reply only) or on
+  demand (`page_in`). Trimming and paging never separate tool responses from the message
+  that called the tools.
+
+    store = get_conversation_store()
+    conversation = store.start_conversation("travel", agents=[traveler_agent, guide_agent])
+    traveler_agent.initiate_chat(guide_agent, message="...")
+    for message in store.iter_messages(conversation.id):
+        ...
+
+The database defaults to `.cache/conversations.sqlite3` (override with AG2_CONVERSATION_DB).
+In group chats, attach the speaking agents, not the GroupChatManager: the manager re-sends every
+message to every participant. Histories are only trimmed between two attached agents, since the
+messages of an unattached peer are not stored.
+"""
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "conversations.sqlite3")
+
+TOOL_RESPONSE_ROLES = ("tool", "function")
+OAI_MESSAGE_KEYS = ("content", "function_call", "tool_calls", "tool_responses", "tool_call_id", "context")
+
+
+def define_models(db):
+    """Conversation and Message models bound to `db`; every store binds its own."""
+
+    class BaseModel(Model):
+        class Meta:
+            database = db
+
+    class Conversation(BaseModel):
+        id = AutoField()
+        name = CharField(index=True)
+        created_at = FloatField(index=True)
+        metadata = TextField(default="{}")
+
+    class Message(BaseModel):
+        id = AutoField()
+        conversation = ForeignKeyField(Conversation, backref="messages", on_delete="CASCADE")
+        seq = IntegerField()
+        sender = CharField()
+        recipient = CharField(null=True)
+        role = CharField(null=True)
+        content = TextField(null=True)
+        # Remaining message fields (tool_calls, tool_responses, multimodal content, ...) as JSON
+        extra = TextField(null=True)
+        created_at = FloatField()
+
+        class Meta:
+            indexes = (
+                (("conversation", "seq"), True),
+                (("conversation", "created_at"), False),
+                (("sender", "created_at"), False),
+            )
+
+    return Conversation, Message
+
+
+def _message_to_dict(message):
+    if isinstance(message, dict):
+        return message
+    return {"content": message}
+
+
+def _to_record(message) -> dict:
+    """A stored message in the shape of a chat_history entry, plus its store metadata."""
+    record = json.loads(message.extra) if message.extra else {}
+    if message.content is not None:
+        record["content"] = message.content
+    if message.role:
+        record["role"] = message.role
+    record.update(
+        {
+            "name": message.sender,
+            "recipient": message.recipient,
+            "seq": message.seq,
+            "created_at": message.created_at,
+        }
+    )
+    return record
+
+
+def _to_oai_message(record, owner):
+    """A stored message as it appears in `owner`'s `_oai_messages` (see `_append_oai_message`)."""
+    message = {key: record[key] for key in OAI_MESSAGE_KEYS if record.get(key) is not None}
+    message.setdefault("content", None)
+    if record.get("role") in TOOL_RESPONSE_ROLES:
+        message["role"] = record["role"]
+    else:
+        message["role"] = "assistant" if record["name"] == owner else "user"
+    if message.get("function_call") or message.get("tool_calls"):
+        message["role"] = "assistant"
+    else:
+        message["name"] = record["name"]
+    return message
+
+
+def _boundary(history, cut, incoming=None):
+    """Move `cut` back until it no longer separates tool responses from the call that produced them."""
+    while cut > 0:
+        message = history[cut] if cut < len(history) else incoming
+        if not isinstance(message, dict) or message.get("role") not in TOOL_RESPONSE_ROLES:
+            break
+        cut -= 1
+    return cut
+
+
+class ConversationStore:
+    """
+    Append-only store of conversations and their messages.
+
+    Args:
+        path: SQLite file, ":memory:" for a throw-away store.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("AG2_CONVERSATION_DB", DEFAULT_DB_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = SqliteDatabase(
+            self.path,
+            pragmas={"journal_mode": "wal", "synchronous": "normal", "foreign_keys": 1},
+        )
+        self.Conversation, self.Message = define_models(self.db)
+        self.db.create_tables([self.Conversation, self.Message], safe=True)
+        self._lock = threading.Lock()
+        self._next_seq = {}
+        self._attached = {}
+        # Messages trimmed from memory, by (conversation, owner, peer)
+        self._trimmed = {}
+
+    # Writing
+
+    def start_conversation(self, name, agents=(), keep_in_memory=None, context=None, **metadata):
+        """Create a conversation and record every message the given agents send from now on."""
+        conversation = self.Conversation.create(name=name, created_at=time.time(), metadata=json.dumps(metadata))
+        self._next_seq[conversation.id] = 0
+        for agent in agents:
+            self.attach(agent, conversation.id, keep_in_memory=keep_in_memory, context=context)
+        return conversation
+
+    def attach(self, agent, conversation_id, keep_in_memory=None, context=None):
+        """
+        Record the messages `agent` sends into `conversation_id`.
+
+        With `keep_in_memory`, the agent and its (attached) peer keep only about that many recent
+        messages of their chat in memory; the cut is moved back when it would separate tool
+        responses from their tool call. With `context`, the agent's LLM still sees the last
+        `context` messages: the trimmed ones are read back from the store for each reply.
+        Use `page_in` to restore trimmed messages into memory, e.g. before a summary.
+        """
+        with self._lock:
+            self._attached.setdefault(conversation_id, set()).add(agent.name)
+
+        def record_message(sender, message, recipient, silent):
+            self.append(conversation_id, sender.name, message, recipient=getattr(recipient, "name", None))
+            if keep_in_memory and getattr(recipient, "name", None) in self._attached[conversation_id]:
+                for owner, peer in ((sender, recipient), (recipient, sender)):
+                    self._trim(conversation_id, owner, peer, keep_in_memory, message)
+            return message
+
+        agent.register_hook("process_message_before_send", record_message)
+        if context:
+            agent.register_hook("process_all_messages_before_reply", self._context_loader(agent, conversation_id, context))
+        return self
+
+    def _trim(self, conversation_id, owner, peer, keep, incoming):
+        history = owner._oai_messages.get(peer)
+        if history is None or len(history) < keep:
+            return
+        # Leave room for the message that send() is about to append on both sides
+        cut = _boundary(history, len(history) - keep + 1, incoming)
+        if cut:
+            del history[:cut]
+            key = (conversation_id, owner.name, peer.name)
+            with self._lock:
+                self._trimmed[key] = self._trimmed.get(key, 0) + cut
+
+    def _pair_messages(self, conversation_id, owner, peer, before, limit):
+        """The `limit` stored messages between `owner` and `peer` preceding their `before`-th one."""
+        start = max(0, before - limit)
+        Message = self.Message
+        between = ((Message.sender == owner) & (Message.recipient == peer)) | (
+            (Message.sender == peer) & (Message.recipient == owner)
+        )
+        rows = (
+            Message.select()
+            .where((Message.conversation == conversation_id) & between)
+            .order_by(Message.seq)
+            .offset(start)
+            .limit(before - start)
+        )
+        messages = [_to_oai_message(_to_record(row), owner) for row in rows]
+        # A page must not start with tool responses whose tool call is on the previous page
+        while messages and messages[0]["role"] in TOOL_RESPONSE_ROLES:
+            messages.pop(0)
+        return messages
+
+    def trimmed(self, conversation_id, agent, peer) -> int:
+        """Number of messages of `agent`'s chat with `peer` that are only on disk."""
+        return self._trimmed.get((conversation_id, agent.name, peer.name), 0)
+
+    def page_in(self, conversation_id, agent, peer, limit=50) -> int:
+        """Restore up to `limit` trimmed messages of `agent`'s chat with `peer` into memory; returns how many."""
+        key = (conversation_id, agent.name, peer.name)
+        with self._lock:
+            trimmed = self._trimmed.get(key, 0)
+        if not trimmed:
+            return 0
+        older = self._pair_messages(conversation_id, agent.name, peer.name, trimmed, limit)
+        history = agent._oai_messages[peer]
+        history[:0] = older
+        with self._lock:
+            self._trimmed[key] = trimmed - len(older)
+        return len(older)
+
+    def _context_loader(self, agent, conversation_id, context):
+        def load_context(messages):
+            # The hook only gets the history: find the peer it belongs to
+            peer = next((p for p, history in agent._oai_messages.items() if history is messages), None)
+            if peer is None:
+                return messages
+            missing = context - len(messages)
+            trimmed = self.trimmed(conversation_id, agent, peer)
+            if missing <= 0 or not trimmed:
+                return messages
+            return self._pair_messages(conversation_id, agent.name, peer.name, trimmed, missing) + messages
+
+        return load_context
+
+    def _seq(self, conversation_id):
+        Message = self.Message
+        with self._lock:
+            if conversation_id not in self._next_seq:
+                last = Message.select(fn.MAX(Message.seq)).where(Message.conversation == conversation_id).scalar()
+                self._next_seq[conversation_id] = 0 if last is None else last + 1
+            seq = self._next_seq[conversation_id]
+            self._next_seq[conversation_id] = seq + 1
+            return seq
+
+    def append(self, conversation_id, sender, message, recipient=None) -> int:
+        """Store one message and return its sequence number within the conversation."""
+        Message = self.Message
+        message = dict(_message_to_dict(message))
+        content = message.pop("content", None)
+        if content is not None and not isinstance(content, str):
+            message["content"] = content
+            content = None
+        role = message.pop("role", None)
+        message.pop("name", None)
+        seq = self._seq(conversation_id)
+        Message.create(
+            conversation=conversation_id,
+            seq=seq,
+            sender=sender,
+            recipient=recipient,
+            role=role,
+            content=content,
+            extra=json.dumps(message, default=str) if message else None,
+            created_at=time.time(),
+        )
+        return seq
+
+    # Reading
+
+    def conversations(self, name=None, agent=None, since=None, limit=20) -> list[dict]:
+        """Most recent conversations with their message counts, without loading any message."""
+        Conversation = self.Conversation
+        Message = self.Message
+        query = (
+            Conversation.select(Conversation, fn.COUNT(Message.id).alias("message_count"))
+            .join(Message, JOIN.LEFT_OUTER)
+            .group_by(Conversation.id)
+            .order_by(Conversation.created_at.desc())
+            .limit(limit)
+        )
+        if name is not None:
+            query = query.where(Conversation.name == name)
+        if since is not None:
+            query = query.where(Conversation.created_at >= since)
+        if agent is not None:
+            query = query.where(
+                Conversation.id.in_(Message.select(Message.conversation).where(Message.sender == agent))
+            )
+        return [
+            {
+                "id": c.id,
+                "name": c.name,
+                "created_at": c.created_at,
+                "messages": c.message_count,
+                "metadata": json.loads(c.metadata),
+            }
+            for c in query
+        ]
+
+    def page(self, conversation_id, before_seq=None, limit=50) -> list[dict]:
+        """Up to `limit` messages preceding `before_seq` (default: the latest), in chronological order."""
+        Message = self.Message
+        query = Message.select().where(Message.conversation == conversation_id)
+        if before_seq is not None:
+            query = query.where(Message.seq < before_seq)
+        rows = list(query.order_by(Message.seq.desc()).limit(limit))
+        return [_to_record(row) for row in reversed(rows)]
+
+    def iter_messages(self, conversation_id, batch_size=200):
+        """Yield a conversation's messages in order, loading `batch_size` rows at a time."""
+        Message = self.Message
+        after = -1
+        while True:
+            rows = list(
+                Message.select()
+                .where((Message.conversation == conversation_id) & (Message.seq > after))
+                .order_by(Message.seq)
+                .limit(batch_size)
+            )
+            if not rows:
+                return
+            for row in rows:
+                yield _to_record(row)
+            after = rows[-1].seq
+
+    def messages_by_agent(self, agent, since=None, limit=100) -> list[dict]:
+        """Latest messages sent by `agent` across all conversations."""
+        Message = self.Message
+        query = Message.select().where(Message.sender == agent)
+        if since is not None:
+            query = query.where(Message.created_at >= since)
+        return [_to_record(row) for row in query.order_by(Message.created_at.desc()).limit(limit)]
+
+    def search(self, text, conversation_id=None, limit=20) -> list[dict]:
+        """Messages whose content contains `text`, newest first."""
+        Message = self.Message
+        query = Message.select().where(Message.content.contains(text))
+        if conversation_id is not None:
+            query = query.where(Message.conversation == conversation_id)
+        return [_to_record(row) for row in query.order_by(Message.created_at.desc()).limit(limit)]
+
+    def count(self, conversation_id) -> int:
+        Message = self.Message
+        return Message.select().where(Message.conversation == conversation_id).count()
+
+    def close(self):
+        self.db.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """Process-wide store at AG2_CONVERSATION_DB (default `.cache/conversations.sqlite3`)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ConversationStore()
+        return _store
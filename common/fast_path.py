@@ -0,0 +1,85 @@
+from autogen import Agent, ConversableAgent
+
+"""
+Hybrid agents that answer deterministic requests in-process.
+
+Some pipeline stages are plain string operations (echo, uppercase, word count, reverse). Sending
+them to the LLM costs a round trip and is error-prone: models count words badly. A
+`FastPathAgent` is a ConversableAgent with a local reply function registered just before its
+LLM reply. When the local function can handle the message it answers directly; when it returns
+None the agent falls back to the LLM as usual.
+
+Because it is an ordinary ConversableAgent, it plugs into `initiate_chat` / `initiate_chats`
+unchanged, and its replies land in `chat_history` and `ChatResult.summary` exactly like LLM
+replies.
+
+    uppercase_agent = FastPathAgent(name="Uppercase_Agent", local_reply=uppercase_text, llm_config=llm_config)
+"""
+
+# Separator autogen uses to append carryover from earlier chats to a message
+CARRYOVER_SEPARATOR = "\nContext: \n"
+
+
+def echo_text(text):
+    return text
+
+
+def uppercase_text(text):
+    return text.upper()
+
+
+def count_words(text):
+    count = len(text.split())
+    return f"The text contains {count} word{'s' if count != 1 else ''}."
+
+
+def reverse_text(text):
+    return text[::-1]
+
+
+class FastPathAgent(ConversableAgent):
+    """
+    ConversableAgent that replies through a local function when it can.
+
+    Args:
+        local_reply: Callable (text) -> reply text, or None to fall back to the LLM.
+        include_carryover: Pass the carryover appended by `initiate_chats` to `local_reply`
+            instead of only the message itself.
+        **kwargs: ConversableAgent arguments.
+    """
+
+    def __init__(self, *args, local_reply=None, include_carryover=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.local_reply = local_reply
+        self.include_carryover = include_carryover
+        self.fast_path_stats = {"local": 0, "fallback": 0}
+        builtin = (ConversableAgent.generate_oai_reply, ConversableAgent.a_generate_oai_reply)
+        position = next(
+            (i for i, entry in enumerate(self._reply_func_list) if entry["reply_func"] in builtin),
+            len(self._reply_func_list),
+        )
+        self.register_reply([Agent, None], FastPathAgent.generate_local_reply, position=position)
+
+    def generate_local_reply(self, messages=None, sender=None, config=None):
+        """Answer the last message locally, or return (False, None) so the LLM reply runs."""
+        if self.local_reply is None:
+            return False, None
+        if messages is None:
+            messages = self._oai_messages[sender]
+        message = messages[-1] if messages else {}
+        content = message.get("content")
+        if not isinstance(content, str) or message.get("tool_calls") or message.get("role") == "tool":
+            self.fast_path_stats["fallback"] += 1
+            return False, None
+
+        text = content if self.include_carryover else content.split(CARRYOVER_SEPARATOR, 1)[0]
+        try:
+            reply = self.local_reply(text)
+        except Exception:
+            # A failing local handler is treated like one that declined the message
+            reply = None
+        if reply is None:
+            self.fast_path_stats["fallback"] += 1
+            return False, None
+        self.fast_path_stats["local"] += 1
+        return True, reply
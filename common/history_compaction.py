@@ -0,0 +1,240 @@
+import hashlib
+import json
+
+from autogen import OpenAIWrapper
+from autogen.agentchat.contrib.capabilities.transform_messages import TransformMessages
+from autogen.token_count_utils import count_token
+
+"""
+History compaction for long-running group chats.
+
+Every speaker in a group chat receives the whole `GroupChat.messages` history on every round, so
+prompt tokens grow roughly quadratically with `max_round`. `RollingSummaryCompactor` is a
+MessageTransform (the contract used by autogen's `TransformMessages` capability) that:
+
+- keeps the last `keep_last` messages verbatim,
+- folds everything older into a single rolling summary message, summarizing only the messages
+  that became "old" since the previous round,
+- folds further recent messages into the summary until the history fits `max_tokens`,
+- records how many tokens it saved on every round.
+
+The summarizer is pluggable: the default one is a cheap local extractive summarizer; use
+`llm_summarizer(llm_config)` to let a model write the rolling summary instead.
+
+    compactors = add_history_compaction(agents, keep_last=4, max_tokens=1500)
+    group_chat = GroupChat(..., select_speaker_transform_messages=compactors.speaker_selection)
+    print(compaction_report(compactors))
+"""
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _content_text(message):
+    content = message.get("content")
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    if not content and message.get("tool_calls"):
+        content = json.dumps(message["tool_calls"])
+    return content or ""
+
+
+def text_tokens(text, model="gpt-3.5-turbo"):
+    """Token count of `text`, estimated from its length when the tiktoken encoding cannot be loaded (offline runs)."""
+    try:
+        return count_token(text, model=model)
+    except Exception:
+        return len(text) // 4
+
+
+def message_tokens(messages, model="gpt-3.5-turbo"):
+    """Approximate prompt tokens of a message list."""
+    return sum(text_tokens(_content_text(m), model) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def extractive_summarizer(previous_summary, messages, max_chars=240):
+    """Default summarizer: the first sentence of each message, prefixed with its author."""
+    lines = [previous_summary] if previous_summary else []
+    for message in messages:
+        text = " ".join(_content_text(message).split())
+        if not text:
+            continue
+        sentence = text.split(". ")[0]
+        if len(sentence) > max_chars:
+            sentence = sentence[: max_chars - 3] + "..."
+        author = message.get("name") or message.get("role", "")
+        lines.append(f"- {author}: {sentence}")
+    return "\n".join(lines)
+
+
+def llm_summarizer(llm_config, max_words=150):
+    """Build a summarizer that asks a model to update the rolling summary."""
+    client = OpenAIWrapper(**{k: v for k, v in llm_config.items() if k != "cache"})
+
+    def summarize(previous_summary, messages):
+        transcript = "\n".join(f"{m.get('name') or m.get('role')}: {_content_text(m)}" for m in messages)
+        prompt = (
+            f"Update the summary of a conversation with the new messages below. "
+            f"Keep decisions, facts and open questions. Use at most {max_words} words.\n\n"
+            f"Current summary:\n{previous_summary or '(empty)'}\n\nNew messages:\n{transcript}"
+        )
+        response = client.create(messages=[{"role": "user", "content": prompt}])
+        return client.extract_text_or_completion_object(response)[0] or previous_summary
+
+    return summarize
+
+
+def _fingerprint(messages):
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(json.dumps([message.get("name"), message.get("role"), _content_text(message)]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RollingSummaryCompactor:
+    """
+    Keep recent turns verbatim and fold older turns into a rolling summary.
+
+    Args:
+        keep_last: Number of most recent messages always kept verbatim (at least one is kept).
+        max_tokens: Token budget for the compacted history, None for no budget.
+        summarizer: Callable (previous_summary, messages) -> summary, defaults to `extractive_summarizer`.
+        max_summary_tokens: Older summary lines are dropped once the summary exceeds this size.
+        model: Model name used for token counting.
+        name: Label used in reports, usually the agent name.
+    """
+
+    def __init__(
+        self,
+        keep_last=4,
+        max_tokens=None,
+        summarizer=None,
+        max_summary_tokens=600,
+        model="gpt-3.5-turbo",
+        name=None,
+    ):
+        self.keep_last = max(1, keep_last)
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer or extractive_summarizer
+        self.max_summary_tokens = max_summary_tokens
+        self.model = model
+        self.name = name
+        self.rounds = []
+        # Fold state per conversation, keyed by the fingerprint of its opening message
+        self._conversations = {}
+
+    def _state(self, messages):
+        """Fold state of the conversation `messages` belongs to, reset when its history was rewritten."""
+        state = self._conversations.setdefault(_fingerprint(messages[:1]), {"summary": "", "folded": 0, "fingerprint": None})
+        folded = state["folded"]
+        if folded and (len(messages) <= folded or _fingerprint(messages[:folded]) != state["fingerprint"]):
+            # e.g. the chat was restarted with the same opening message: rebuild from scratch
+            state.update(summary="", folded=0, fingerprint=None)
+        return state
+
+    def _fold(self, state, older):
+        """Extend the conversation's rolling summary so that it covers `older`."""
+        new_messages = older[state["folded"] :]
+        if new_messages:
+            state["summary"] = self._trim_summary(self.summarizer(state["summary"], new_messages))
+            state["folded"] = len(older)
+            state["fingerprint"] = _fingerprint(older)
+        return state["summary"]
+
+    def _trim_summary(self, summary):
+        lines = summary.splitlines()
+        while len(lines) > 1 and text_tokens("\n".join(lines), self.model) > self.max_summary_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def _compact(self, state, messages, keep):
+        older, recent = messages[:-keep], messages[-keep:]
+        if not older:
+            return list(recent)
+        summary = self._fold(state, older)
+        return [{"role": "user", "content": SUMMARY_PREFIX + summary}] + list(recent)
+
+    def apply_transform(self, messages):
+        if not messages:
+            return messages
+        tokens_in = message_tokens(messages, self.model)
+        state = self._state(messages)
+        # Messages already folded into the summary stay folded, even when the budget no longer requires it
+        keep = max(1, min(self.keep_last, len(messages) - state["folded"]))
+        compacted = self._compact(state, messages, keep)
+        if self.max_tokens is not None:
+            while keep > 1 and message_tokens(compacted, self.model) > self.max_tokens:
+                keep -= 1
+                compacted = self._compact(state, messages, keep)
+        tokens_out = message_tokens(compacted, self.model)
+        self.rounds.append(
+            {
+                "round": len(self.rounds) + 1,
+                "messages_in": len(messages),
+                "messages_out": len(compacted),
+                "tokens_in": tokens_in,
+                "tokens_out": tokens_out,
+                "tokens_saved": tokens_in - tokens_out,
+            }
+        )
+        return compacted
+
+    def get_logs(self, pre_transform_messages, post_transform_messages):
+        last = self.rounds[-1] if self.rounds else None
+        if not last or last["tokens_saved"] <= 0:
+            return "No history compaction applied.", False
+        return (
+            f"Compacted {last['messages_in']} messages into {last['messages_out']}, "
+            f"saving {last['tokens_saved']} tokens ({last['tokens_in']} -> {last['tokens_out']}).",
+            True,
+        )
+
+    @property
+    def tokens_saved(self):
+        return sum(r["tokens_saved"] for r in self.rounds)
+
+
+class CompactorSet(dict):
+    """Compactors by agent name, plus the one used for group chat speaker selection."""
+
+    speaker_selection = None
+
+
+def add_history_compaction(agents, keep_last=4, max_tokens=None, budgets=None, summarizer=None, speaker_selection=True, verbose=False):
+    """
+    Attach a RollingSummaryCompactor to each agent.
+
+    Args:
+        agents: Agents whose replies should be generated from compacted history.
+        keep_last: Messages kept verbatim.
+        max_tokens: Default per-agent token budget.
+        budgets: Optional {agent name: token budget} overriding `max_tokens`.
+        summarizer: Summarizer shared by all compactors.
+        speaker_selection: Also build a TransformMessages for `GroupChat(select_speaker_transform_messages=...)`.
+        verbose: Print the compaction log of every round.
+    """
+    budgets = budgets or {}
+    compactors = CompactorSet()
+    for agent in agents:
+        compactor = RollingSummaryCompactor(
+            keep_last=keep_last,
+            max_tokens=budgets.get(agent.name, max_tokens),
+            summarizer=summarizer,
+            name=agent.name,
+        )
+        TransformMessages(transforms=[compactor], verbose=verbose).add_to_agent(agent)
+        compactors[agent.name] = compactor
+    if speaker_selection:
+        selector = RollingSummaryCompactor(keep_last=keep_last, max_tokens=max_tokens, summarizer=summarizer, name="speaker_selection")
+        compactors["speaker_selection"] = selector
+        compactors.speaker_selection = TransformMessages(transforms=[selector], verbose=verbose)
+    return compactors
+
+
+def compaction_report(compactors) -> dict:
+    """Tokens saved per round and in total, keyed by compactor name."""
+    return {
+        name: {"tokens_saved": compactor.tokens_saved, "rounds": [r["tokens_saved"] for r in compactor.rounds]}
+        for name, compactor in compactors.items()
+    }
@@ -0,0 +1,273 @@
+import asyncio
+import os
+import time
+
+from autogen.io.base import IOStream
+
+"""
+Asynchronous human input for many concurrent supervised sessions.
+
+With `human_input_mode="ALWAYS"` or `"TERMINATE"`, autogen asks for human input through
+`input()`, which blocks the process (or, in async chats, an executor thread) until someone types.
+`HumanInputHub` replaces the `a_get_human_input` of the attached agents: a session that needs
+a human gets a future on the event loop and is suspended on it, holding no thread, while the
+other sessions keep running. Answers arrive through:
+
+- the in-process API: `hub.answer(session, text)` (thread-safe),
+- a local socket inbox: `nc 127.0.0.1 <port>` shows the waiting sessions; type
+  `<session> <reply>` to answer (`<session>` alone sends an empty reply, i.e. auto-reply or
+  stop, as with `input()`), `list` to show the waiting sessions again, `stats` for the wait times,
+- a file inbox: for every waiting session the hub writes `<inbox_dir>/<session>.prompt`;
+  writing `<inbox_dir>/<session>.reply` answers it.
+
+The hub records, per session, how often and how long it waited for a human.
+
+    async with HumanInputHub(port=8765) as hub:
+        hub.attach(human_proxy, session="game-1")
+        await human_proxy.a_initiate_chat(agent_with_animal, message="Parrot")
+    print(hub.stats())
+
+Only async chats (`a_initiate_chat`) are suspended without a thread; a sync chat calling
+`get_human_input` on an attached agent blocks its own thread until the answer arrives.
+"""
+
+INBOX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "human_inbox")
+
+
+class HumanInputHub:
+    """
+    Routes human input requests of many sessions to a queue, a socket and a file inbox.
+
+    Args:
+        port: Port of the local socket inbox (127.0.0.1), None for no socket, 0 for any free port.
+        inbox_dir: Directory of the file inbox, None for no file inbox.
+        timeout: Seconds to wait for a human before answering with `timeout_reply`, None to wait forever.
+        timeout_reply: Reply used on timeout ("" lets autogen auto-reply, or stop in TERMINATE mode).
+        poll_interval: Seconds between two scans of the file inbox.
+    """
+
+    def __init__(self, port=None, inbox_dir=INBOX_DIR, timeout=None, timeout_reply="", poll_interval=0.2):
+        self.port = port
+        self.inbox_dir = inbox_dir
+        self.timeout = timeout
+        self.timeout_reply = timeout_reply
+        self.poll_interval = poll_interval
+        self.loop = None
+        self.queue = None
+        self._pending = {}
+        self._sessions = {}
+        self._writers = set()
+        self._server = None
+        self._tasks = []
+
+    # Lifecycle
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        # Every request, in the order sessions asked; consumers that want to answer in-process read it
+        self.queue = asyncio.Queue()
+        if self.port is not None:
+            self._server = await asyncio.start_server(self._handle_operator, "127.0.0.1", self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+        if self.inbox_dir:
+            os.makedirs(self.inbox_dir, exist_ok=True)
+            self._tasks.append(asyncio.create_task(self._poll_inbox()))
+        return self
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for writer in list(self._writers):
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for session, request in list(self._pending.items()):
+            request["future"].cancel()
+            self._remove_prompt_file(session)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+    # Sessions
+
+    def attach(self, agent, session=None):
+        """Send the human input requests of `agent` to the hub, under `session` (default: the agent name)."""
+        session = session or agent.name
+        self._sessions.setdefault(session, {"requests": 0, "waits": [], "timeouts": 0})
+
+        async def a_get_human_input(prompt):
+            return await self.request(session, agent, prompt)
+
+        def get_human_input(prompt):
+            return asyncio.run_coroutine_threadsafe(self.request(session, agent, prompt), self.loop).result()
+
+        agent.a_get_human_input = a_get_human_input
+        agent.get_human_input = get_human_input
+        return agent
+
+    async def request(self, session, agent, prompt) -> str:
+        """Suspend until a human answers for `session`; returns the reply."""
+        if session in self._pending:
+            raise RuntimeError(f"Session {session!r} is already waiting for human input")
+        context = self._last_message(agent)
+        request = {
+            "session": session,
+            "agent": agent.name,
+            "prompt": prompt,
+            "context": context,
+            "asked": time.monotonic(),
+            "future": self.loop.create_future(),
+        }
+        self._pending[session] = request
+        stats = self._sessions.setdefault(session, {"requests": 0, "waits": [], "timeouts": 0})
+        stats["requests"] += 1
+        self.queue.put_nowait({k: v for k, v in request.items() if k != "future"})
+        self._write_prompt_file(request)
+        IOStream.get_default().print(f"[{session}] waiting for a human: {prompt}", flush=True)
+        await self._broadcast(self._describe(request))
+        try:
+            reply = await asyncio.wait_for(asyncio.shield(request["future"]), self.timeout)
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            reply = self.timeout_reply
+        finally:
+            del self._pending[session]
+            self._remove_prompt_file(session)
+            stats["waits"].append(time.monotonic() - request["asked"])
+        IOStream.get_default().print(f"[{session}] human replied after {stats['waits'][-1]:.1f}s: {reply!r}", flush=True)
+        return reply
+
+    def answer(self, session, reply="") -> bool:
+        """Answer the waiting session (callable from any thread); False when it is not waiting."""
+        if self.loop is None:
+            return False
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            return self._resolve(session, reply)
+
+        async def resolve():
+            return self._resolve(session, reply)
+
+        return asyncio.run_coroutine_threadsafe(resolve(), self.loop).result()
+
+    def _resolve(self, session, reply):
+        request = self._pending.get(session)
+        if request is None or request["future"].done():
+            return False
+        request["future"].set_result(reply)
+        return True
+
+    def waiting(self) -> list[str]:
+        return list(self._pending)
+
+    @staticmethod
+    def _last_message(agent):
+        try:
+            message = agent.last_message()
+        except (ValueError, KeyError):
+            return None
+        return (message or {}).get("content")
+
+    def _describe(self, request):
+        context = f"\n    last message: {request['context']}" if request["context"] else ""
+        return f"[{request['session']}] {request['agent']}: {request['prompt']}{context}"
+
+    # Socket inbox
+
+    async def _handle_operator(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            await self._send(writer, self._listing())
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8", errors="replace").strip()
+                if not command:
+                    continue
+                if command == "list":
+                    await self._send(writer, self._listing())
+                elif command == "stats":
+                    await self._send(writer, str(self.stats()))
+                else:
+                    session, _, reply = command.partition(" ")
+                    if not self._resolve(session, reply):
+                        await self._send(writer, f"Session {session!r} is not waiting for input. Waiting: {self.waiting()}")
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _listing(self):
+        if not self._pending:
+            return "No session is waiting for input."
+        return "\n".join(self._describe(request) for request in self._pending.values())
+
+    async def _broadcast(self, text):
+        for writer in list(self._writers):
+            await self._send(writer, text)
+
+    async def _send(self, writer, text):
+        try:
+            writer.write((text + "\n").encode("utf-8"))
+            await writer.drain()
+        except ConnectionError:
+            self._writers.discard(writer)
+
+    # File inbox
+
+    def _write_prompt_file(self, request):
+        if not self.inbox_dir:
+            return
+        with open(os.path.join(self.inbox_dir, f"{request['session']}.prompt"), "w", encoding="utf-8") as file:
+            file.write(self._describe(request) + "\n")
+
+    def _remove_prompt_file(self, session):
+        if not self.inbox_dir:
+            return
+        try:
+            os.remove(os.path.join(self.inbox_dir, f"{session}.prompt"))
+        except OSError:
+            pass
+
+    async def _poll_inbox(self):
+        while True:
+            for session in list(self._pending):
+                path = os.path.join(self.inbox_dir, f"{session}.reply")
+                if not os.path.exists(path):
+                    continue
+                try:
+                    with open(path, "r", encoding="utf-8") as file:
+                        reply = file.read().strip()
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._resolve(session, reply)
+            await asyncio.sleep(self.poll_interval)
+
+    # Reporting
+
+    def stats(self) -> dict:
+        """Per session: number of human input requests, total and longest wait, timeouts."""
+        now = time.monotonic()
+        report = {}
+        for session, stats in self._sessions.items():
+            waits = list(stats["waits"])
+            if session in self._pending:
+                waits.append(now - self._pending[session]["asked"])
+            report[session] = {
+                "requests": stats["requests"],
+                "waiting": session in self._pending,
+                "total_wait_s": round(sum(waits), 2),
+                "max_wait_s": round(max(waits), 2) if waits else 0.0,
+                "timeouts": stats["timeouts"],
+            }
+        return report
@@ -0,0 +1,311 @@
+import atexit
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from hashlib import md5
+from pathlib import Path
+
+from autogen.coding import CodeBlock, MarkdownCodeExtractor
+from autogen.coding.base import CommandLineCodeResult
+from autogen.coding.local_commandline_code_executor import PYTHON_VARIANTS, LocalCommandLineCodeExecutor
+from autogen.coding.utils import _get_file_name_from_content, silence_pip
+
+"""
+Pre-warmed, persistent Python kernels for UserProxyAgent code execution.
+
+With `code_execution_config={"work_dir": ..., "use_docker": False}` every generated code block is
+written to a file and run by a fresh interpreter, which re-imports pandas and matplotlib each
+time. `PooledCodeExecutor` runs Python blocks in a kernel instead:
+
+- `KernelPool` keeps a few interpreters started ahead of time with the common libraries already
+  imported (pandas, numpy, matplotlib with the headless Agg backend),
+- an executor leases one kernel for its session: variables and imports persist from one code
+  block to the next,
+- every execution has a timeout; a kernel that times out or dies is killed and the next block
+  runs in a fresh one (the output tells the agent its earlier variables are gone),
+- a kernel is recycled, never reused by another session, when the session ends (`restart()`,
+  which autogen calls on agent reset, or `close()`), or after `max_executions` blocks.
+
+Shell blocks keep running through autogen's LocalCommandLineCodeExecutor.
+
+    user_proxy = UserProxyAgent(
+        name="user_proxy",
+        code_execution_config={"executor": PooledCodeExecutor(work_dir="code_execution", timeout=60)},
+    )
+
+Pool size and preloaded modules come from AG2_KERNEL_POOL_SIZE and AG2_KERNEL_PRELOAD
+(comma-separated).
+"""
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kernel_worker.py")
+DEFAULT_PRELOAD = ("numpy", "pandas", "matplotlib.pyplot")
+DEFAULT_POOL_SIZE = 2
+TIMEOUT_MSG = "Timeout"
+KERNEL_RESTARTED_MSG = (
+    "\nThe Python kernel was restarted; variables and imports from earlier code blocks are no longer defined."
+)
+
+
+class KernelError(RuntimeError):
+    """The kernel died or stopped answering."""
+
+
+class Kernel:
+    """One persistent interpreter process running `kernel_worker.py`."""
+
+    def __init__(self, preload=DEFAULT_PRELOAD):
+        env = {**os.environ, "MPLBACKEND": "Agg", "PYTHONIOENCODING": "utf-8"}
+        self.process = subprocess.Popen(
+            [sys.executable, "-u", WORKER_PATH, json.dumps(list(preload))],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            env=env,
+        )
+        self.executions = 0
+        self.startup_s = None
+        self.preloaded = []
+        self._responses = queue.Queue()
+        self._ready = None
+        threading.Thread(target=self._read, name=f"kernel-{self.process.pid}", daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            self._responses.put(json.loads(line))
+        self._responses.put(None)
+
+    def _next(self, timeout):
+        try:
+            response = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(TIMEOUT_MSG) from None
+        if response is None:
+            raise KernelError(f"kernel exited with code {self.process.wait()}")
+        return response
+
+    def wait_ready(self, timeout=120):
+        """Block until the preloaded modules are imported."""
+        if self._ready is None:
+            self._ready = self._next(timeout)
+            self.startup_s = self._ready.get("startup_s")
+            self.preloaded = self._ready.get("preloaded", [])
+        return self
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def execute(self, code, filename, cwd, timeout=None) -> dict:
+        """Run `code` in the kernel's namespace; raises TimeoutError or KernelError."""
+        self.wait_ready()
+        self.executions += 1
+        try:
+            self.process.stdin.write(json.dumps({"code": code, "filename": filename, "cwd": cwd}) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise KernelError(str(e)) from e
+        return self._next(timeout)
+
+    def kill(self):
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class KernelPool:
+    """
+    Kernels started ahead of time, so leasing one costs no interpreter startup.
+
+    Args:
+        size: Number of idle kernels kept warm.
+        preload: Modules every kernel imports before it is leased.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, preload=DEFAULT_PRELOAD):
+        self.size = size
+        self.preload = tuple(preload)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"leased": 0, "recycled": 0, "lease_wait_s": 0.0}
+        for _ in range(size):
+            self._idle.put(Kernel(self.preload))
+
+    def acquire(self) -> Kernel:
+        """Lease a warm kernel and start its replacement."""
+        start = time.perf_counter()
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("KernelPool is shut down")
+                kernel = self._idle.get() if not self._idle.empty() else Kernel(self.preload)
+                if self.size:
+                    self._idle.put(Kernel(self.preload))
+            try:
+                kernel.wait_ready()
+            except (TimeoutError, KernelError):
+                kernel.kill()
+                continue
+            if kernel.alive:
+                break
+        self._stats["leased"] += 1
+        self._stats["lease_wait_s"] += time.perf_counter() - start
+        return kernel
+
+    def release(self, kernel: Kernel):
+        """Kill a leased kernel: its namespace belongs to the session that used it."""
+        kernel.kill()
+        self._stats["recycled"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "preload": list(self.preload),
+            "leased": self._stats["leased"],
+            "recycled": self._stats["recycled"],
+            "lease_wait_s": round(self._stats["lease_wait_s"], 3),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            while not self._idle.empty():
+                self._idle.get().kill()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_kernel_pool() -> KernelPool:
+    """Process-wide pool sized by AG2_KERNEL_POOL_SIZE, preloading AG2_KERNEL_PRELOAD."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            preload = os.getenv("AG2_KERNEL_PRELOAD")
+            _pool = KernelPool(
+                size=int(os.getenv("AG2_KERNEL_POOL_SIZE", str(DEFAULT_POOL_SIZE))),
+                preload=[m.strip() for m in preload.split(",") if m.strip()] if preload is not None else DEFAULT_PRELOAD,
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+class PooledCodeExecutor:
+    """
+    autogen CodeExecutor that runs Python blocks in a pooled persistent kernel.
+
+    Args:
+        work_dir: Directory code files are saved to and run from.
+        timeout: Timeout per code block in seconds.
+        pool: KernelPool to lease from, default the process-wide pool (started here, so the kernels
+            warm up while the agents talk).
+        max_executions: Recycle the kernel after this many blocks, None to keep it for the session.
+    """
+
+    def __init__(self, work_dir="code_execution", timeout=60, pool=None, max_executions=None):
+        self._work_dir = Path(work_dir)
+        self._work_dir.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self.max_executions = max_executions
+        self.pool = pool or get_kernel_pool()
+        self._kernel = None
+        self._shell = LocalCommandLineCodeExecutor(timeout=timeout, work_dir=self._work_dir)
+        self.executions = []
+
+    @property
+    def code_extractor(self):
+        return MarkdownCodeExtractor()
+
+    @property
+    def work_dir(self) -> Path:
+        return self._work_dir
+
+    def _lease(self):
+        """The session's kernel, leasing a fresh one when it is missing, dead or due for recycling."""
+        restarted = False
+        if self._kernel is not None and (
+            not self._kernel.alive or (self.max_executions and self._kernel.executions >= self.max_executions)
+        ):
+            self._recycle()
+            restarted = True
+        if self._kernel is None:
+            self._kernel = self.pool.acquire()
+        return self._kernel, restarted
+
+    def _recycle(self):
+        if self._kernel is not None:
+            self.pool.release(self._kernel)
+            self._kernel = None
+
+    def _run_python(self, code):
+        try:
+            filename = _get_file_name_from_content(code, self._work_dir)
+        except ValueError:
+            return 1, "Filename is not in the workspace", None
+        if filename is None:
+            filename = f"tmp_code_{md5(code.encode()).hexdigest()}.py"
+        code_file = (self._work_dir / filename).resolve()
+        code_file.write_text(code, encoding="utf-8")
+
+        kernel, restarted = self._lease()
+        start = time.perf_counter()
+        try:
+            response = kernel.execute(code, str(code_file), str(self._work_dir.resolve()), self.timeout)
+            exit_code, output = response["exit_code"], response["output"]
+        except TimeoutError:
+            exit_code, output = 124, f"\n{TIMEOUT_MSG}{KERNEL_RESTARTED_MSG}"
+            self._recycle()
+        except KernelError as e:
+            exit_code, output = 1, f"\n{e}{KERNEL_RESTARTED_MSG}"
+            self._recycle()
+        if restarted:
+            output = KERNEL_RESTARTED_MSG.strip() + "\n" + output
+        self.executions.append({"language": "python", "exit_code": exit_code, "duration_s": round(time.perf_counter() - start, 4)})
+        return exit_code, output, str(code_file)
+
+    def execute_code_blocks(self, code_blocks: list[CodeBlock]) -> CommandLineCodeResult:
+        """Execute the blocks in order, stopping at the first failure, like LocalCommandLineCodeExecutor."""
+        logs_all, code_files, exit_code = "", [], 0
+        for block in code_blocks:
+            language = block.language.lower()
+            if language in PYTHON_VARIANTS:
+                exit_code, output, code_file = self._run_python(silence_pip(block.code, "python"))
+            else:
+                start = time.perf_counter()
+                result = self._shell.execute_code_blocks([block])
+                exit_code, output, code_file = result.exit_code, result.output, result.code_file
+                self.executions.append({"language": language, "exit_code": exit_code, "duration_s": round(time.perf_counter() - start, 4)})
+            logs_all += output
+            if code_file:
+                code_files.append(code_file)
+            if exit_code != 0:
+                break
+        return CommandLineCodeResult(exit_code=exit_code, output=logs_all, code_file=code_files[0] if code_files else None)
+
+    def restart(self):
+        """Recycle the session's kernel; the next block starts from a fresh namespace."""
+        self._recycle()
+
+    def close(self):
+        self._recycle()
+
+    def stats(self) -> dict:
+        python = [e for e in self.executions if e["language"] == "python"]
+        return {
+            "executions": len(self.executions),
+            "python_executions": len(python),
+            "python_s": round(sum(e["duration_s"] for e in python), 3),
+            "kernel_startup_s": self._kernel.startup_s if self._kernel is not None else None,
+            "pool": self.pool.stats(),
+        }
@@ -0,0 +1,95 @@
+import builtins
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+"""
+Persistent Python interpreter behind `common.kernel_pool`.
+
+Started as a script (`python kernel_worker.py '<json list of modules>'`), it imports the modules
+to preload, then executes code blocks in one `__main__` namespace for as long as it lives, so
+imports and variables carry over from one block to the next.
+
+Protocol: one JSON request per line on stdin ({"code", "filename", "cwd"}), one JSON response
+per line on stdout ({"exit_code", "output", "duration_s"}). Both pipes are moved to private file
+descriptors at startup; file descriptors 1 and 2 point to a capture file, so the output of
+child processes and C extensions is captured along with `print`. Standard library only: it must
+start fast and must not import the parent's modules.
+"""
+
+
+def _preload(modules):
+    loaded, failed = [], []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            failed.append(name)
+    return loaded, failed
+
+
+def _close_figures():
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    if pyplot is not None:
+        try:
+            pyplot.close("all")
+        except Exception:
+            pass
+
+
+def main():
+    start = time.perf_counter()
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    responses = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    sys.stdin = open(os.devnull, "r")
+
+    capture = tempfile.TemporaryFile(mode="a+b")
+    os.dup2(capture.fileno(), 1)
+    os.dup2(capture.fileno(), 2)
+
+    loaded, failed = _preload(json.loads(sys.argv[1]) if len(sys.argv) > 1 else [])
+
+    def respond(payload):
+        responses.write(json.dumps(payload) + "\n")
+        responses.flush()
+
+    respond({"ready": True, "preloaded": loaded, "failed": failed, "startup_s": round(time.perf_counter() - start, 3)})
+
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    for line in requests:
+        request = json.loads(line)
+        capture.seek(0)
+        capture.truncate()
+        begin = time.perf_counter()
+        exit_code = 0
+        try:
+            os.chdir(request["cwd"])
+            sys.argv = [request["filename"]]
+            namespace["__file__"] = request["filename"]
+            exec(compile(request["code"], request["filename"], "exec"), namespace)
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            if e.code is not None and not isinstance(e.code, int):
+                print(e.code, file=sys.stderr)
+        except BaseException:
+            exit_code = 1
+            # Leave this module's frame out of the traceback the agent sees
+            error_type, error, tb = sys.exc_info()
+            traceback.print_exception(error_type, error, tb.tb_next)
+        _close_figures()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        capture.seek(0)
+        output = capture.read().decode("utf-8", errors="replace")
+        respond({"exit_code": exit_code, "output": output, "duration_s": round(time.perf_counter() - begin, 4)})
+
+
+if __name__ == "__main__":
+    main()
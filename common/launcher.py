@@ -0,0 +1,349 @@
+import argparse
+import ast
+import difflib
+import importlib.abc
+import json
+import os
+import re
+import runpy
+import shlex
+import subprocess
+import sys
+import time
+import warnings
+
+"""
+Single launcher for every example scenario.
+
+    python -m common list                              # scenarios by name
+    python -m common run customer_support              # run one scenario
+    python -m common run simple_agent initiate_chat    # several, in one warm interpreter
+    python -m common serve                             # warm interpreter, scenario names from stdin
+    python -m common importtime customer_support --json before.json
+    python -m common importtime customer_support --baseline before.json
+
+Run it from the repository root. A scenario is a script under one of the topic directories,
+named by its file name (or `topic/name` when the name is ambiguous); arguments after the name
+are passed to the script. Helper modules that other scripts of the same directory import are
+not scenarios, unless they also have a `__main__` block. The script runs as `__main__` with its own directory first on
+sys.path, exactly as `python path/to/script.py` would run it.
+
+Startup work the scenarios never need is deferred:
+
+- the launcher itself imports only the standard library; autogen and friends are imported by
+  the scenario when it needs them,
+- flaml's AutoML (scikit-learn, lightgbm, xgboost, pandas), which `import autogen` pulls in for
+  the legacy `Completion.tune` API only, is not imported; flaml then behaves as if AutoML were not
+  installed. Set AG2_LAUNCHER_FULL_IMPORTS=1 to import it anyway.
+
+With several scenarios, or in `serve`, the interpreter imports autogen once and forks a child per
+scenario (on platforms without fork the scenarios run one after the other in the same process).
+
+`importtime` runs a scenario's imports under `python -X importtime` in a fresh interpreter and
+prints the slowest packages; `--json` saves the breakdown and `--baseline` compares against a
+saved one, to catch cold-start regressions.
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIO_DIRS = ("conversation/src", "human/src", "simple/src", "tools/src", "usecase/src", "code_execution")
+WARM_MODULES = ("autogen", "dotenv", "common.llm_client")
+# Modules the scenarios never use, which are not imported at startup -> what they provide
+DEFERRED_IMPORTS = {"flaml.automl.automl": "flaml AutoML (autogen's legacy Completion.tune)"}
+IMPORT_MARKER = "ag2-launcher: scenario imports start"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _module_summary(path):
+    """(top-level module names the script imports, whether it has an `if __name__ == "__main__"` block)."""
+    with open(path, "r", encoding="utf-8") as file:
+        tree = ast.parse(file.read(), filename=path)
+    imported, guarded = set(), False
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            imported.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            imported.add(node.module.split(".")[0])
+        elif isinstance(node, ast.If) and "__main__" in ast.unparse(node.test):
+            guarded = True
+    return imported, guarded
+
+
+def discover() -> dict:
+    """Scenario name -> script path; names used by several topics are only reachable as `topic/name`."""
+    scenarios, seen = {}, {}
+    for directory in SCENARIO_DIRS:
+        full = os.path.join(ROOT, directory)
+        if not os.path.isdir(full):
+            continue
+        topic = directory.split("/")[0]
+        scripts = {
+            filename[:-3]: os.path.join(full, filename)
+            for filename in sorted(os.listdir(full))
+            if filename.endswith(".py") and not filename.startswith("_")
+        }
+        summaries = {name: _module_summary(path) for name, path in scripts.items()}
+        # Modules the other scripts import are helpers (review_pipeline, ...), not something to run
+        helpers = {module for name, (imported, _) in summaries.items() for module in imported if module != name}
+        for name, path in scripts.items():
+            if name in helpers and not summaries[name][1]:
+                continue
+            scenarios[f"{topic}/{name}"] = path
+            seen.setdefault(name, []).append(path)
+    for name, paths in seen.items():
+        if len(paths) == 1:
+            scenarios[name] = paths[0]
+    return scenarios
+
+
+def resolve(name) -> str:
+    if name.endswith(".py") and os.path.exists(name):
+        return os.path.abspath(name)
+    scenarios = discover()
+    if name in scenarios:
+        return scenarios[name]
+    close = difflib.get_close_matches(name, scenarios, n=3)
+    hint = f" Did you mean: {', '.join(close)}?" if close else " Run `python -m common list`."
+    raise SystemExit(f"Unknown scenario {name!r}.{hint}")
+
+
+class _DeferredImportFinder(importlib.abc.MetaPathFinder):
+    """Makes the imports in DEFERRED_IMPORTS fail fast, as if the optional dependency were missing."""
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname in DEFERRED_IMPORTS:
+            raise ModuleNotFoundError(f"{fullname} is deferred by the launcher ({DEFERRED_IMPORTS[fullname]})", name=fullname)
+        return None
+
+
+def install_import_deferrals():
+    if os.getenv("AG2_LAUNCHER_FULL_IMPORTS", "0") == "1":
+        return
+    if not any(isinstance(finder, _DeferredImportFinder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _DeferredImportFinder())
+    warnings.filterwarnings("ignore", category=UserWarning, message=".*flaml.automl is not available.*")
+
+
+def _script_path_setup(path):
+    script_dir = os.path.dirname(path)
+    sys.path[:] = [script_dir, ROOT] + [p for p in sys.path[1:] if p not in (script_dir, ROOT)]
+
+
+def run_scenario(path, args=()) -> int:
+    """Run a script as __main__ in this process; returns its exit code."""
+    _script_path_setup(path)
+    sys.argv = [path, *args]
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    return 0
+
+
+def warm_up():
+    """Import the modules every scenario needs, once, before forking."""
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    for module in WARM_MODULES:
+        __import__(module)
+    return time.perf_counter() - start
+
+
+def run_forked(path, args=()) -> int:
+    """Run a scenario in a forked child of the warm interpreter (in-process without fork)."""
+    if not hasattr(os, "fork"):
+        return run_scenario(path, args)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            code = run_scenario(path, args)
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+def _run_many(scenarios):
+    """Run (path, args) pairs from one warm interpreter; prints the time of each."""
+    warm_s = warm_up()
+    print(f"[launcher] warm imports: {warm_s:.2f}s", file=sys.stderr)
+    code = 0
+    for path, args in scenarios:
+        start = time.perf_counter()
+        code = run_forked(path, args) or code
+        print(f"[launcher] {os.path.basename(path)} finished in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return code
+
+
+def serve(stream=sys.stdin):
+    """Warm interpreter running one scenario per input line (`name args...`) until EOF or `exit`."""
+    warm_s = warm_up()
+    print(f"[launcher] warm imports: {warm_s:.2f}s; enter a scenario name (or 'exit')", file=sys.stderr)
+    for line in stream:
+        words = shlex.split(line)
+        if not words:
+            continue
+        if words[0] in ("exit", "quit"):
+            break
+        try:
+            path = resolve(words[0])
+        except SystemExit as e:
+            print(e, file=sys.stderr)
+            continue
+        start = time.perf_counter()
+        code = run_forked(path, words[1:])
+        print(f"[launcher] {words[0]} exited with {code} after {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+# Import-time profiling
+
+
+def scenario_imports(path) -> str:
+    """Source of the module-level import statements of a script."""
+    with open(path, "r", encoding="utf-8") as file:
+        tree = ast.parse(file.read(), filename=path)
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return ast.unparse(ast.Module(body=imports, type_ignores=[]))
+
+
+def _exec_imports(path):
+    """Child side of `importtime`: execute only the scenario's imports."""
+    _script_path_setup(path)
+    source = scenario_imports(path)
+    print(IMPORT_MARKER, file=sys.stderr, flush=True)
+    exec(compile(source, path, "exec"), {"__name__": "__scenario_imports__"})
+
+
+def profile_imports(path, full=False) -> dict:
+    """Run the scenario's imports under -X importtime in a fresh interpreter and parse the breakdown."""
+    env = {**os.environ, "AG2_LAUNCHER_FULL_IMPORTS": "1" if full else os.getenv("AG2_LAUNCHER_FULL_IMPORTS", "0")}
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "common", "_imports", path],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_s = time.perf_counter() - start
+    lines = completed.stderr.splitlines()
+    if IMPORT_MARKER in lines:
+        interpreter, scenario = lines[: lines.index(IMPORT_MARKER)], lines[lines.index(IMPORT_MARKER) + 1 :]
+    else:
+        interpreter, scenario = [], lines
+    packages, modules = {}, {}
+    for line in scenario:
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        modules[name] = self_us
+        if len(indent) <= 1:
+            # Top-level entries: everything below them is included in their cumulative time
+            packages[name] = packages.get(name, 0) + cumulative_us
+    errors = [line for line in lines if not IMPORTTIME_LINE.match(line) and line != IMPORT_MARKER]
+    return {
+        "scenario": os.path.relpath(path, ROOT),
+        "deferrals": not full and os.getenv("AG2_LAUNCHER_FULL_IMPORTS", "0") != "1",
+        "exit_code": completed.returncode,
+        "wall_s": round(wall_s, 3),
+        "interpreter_us": sum(int(m[2]) for m in map(IMPORTTIME_LINE.match, interpreter) if m and len(m[3]) <= 1),
+        "imports_us": sum(packages.values()),
+        "packages_us": dict(sorted(packages.items(), key=lambda item: -item[1])),
+        "slowest_modules_us": dict(sorted(modules.items(), key=lambda item: -item[1])[:50]),
+        "errors": errors[-5:] if completed.returncode else [],
+    }
+
+
+def format_profile(profile, top=15, baseline=None, threshold=0.1) -> str:
+    lines = [
+        f"{profile['scenario']}: imports {profile['imports_us'] / 1e6:.3f}s, process {profile['wall_s']:.2f}s"
+        f" (deferrals {'on' if profile['deferrals'] else 'off'})"
+    ]
+    if baseline is not None:
+        delta = profile["imports_us"] - baseline["imports_us"]
+        lines[0] += f", {delta / 1e6:+.3f}s vs baseline"
+    lines.append(f"  {'package':<40} {'cumulative':>12}" + (f" {'baseline':>12} {'change':>8}" if baseline else ""))
+    for name, us in list(profile["packages_us"].items())[:top]:
+        row = f"  {name:<40} {us / 1e3:>10.1f}ms"
+        if baseline is not None:
+            before = baseline["packages_us"].get(name)
+            if before is None:
+                row += f" {'new':>12}"
+            else:
+                change = (us - before) / before if before else 0.0
+                flag = "  REGRESSION" if change > threshold and us - before > 20_000 else ""
+                row += f" {before / 1e3:>10.1f}ms {change:>+7.0%}{flag}"
+        lines.append(row)
+    lines.append("  slowest modules (self time):")
+    for name, us in list(profile["slowest_modules_us"].items())[:5]:
+        lines.append(f"    {name:<38} {us / 1e3:>10.1f}ms")
+    if profile["errors"]:
+        lines.append("  import failed: " + " | ".join(profile["errors"]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m common", description="Run the example scenarios.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List the scenarios")
+    run = commands.add_parser("run", help="Run one or more scenarios; options (or anything after `--`) go to a single scenario")
+    run.add_argument("scenarios", nargs=argparse.REMAINDER)
+    commands.add_parser("serve", help="Keep a warm interpreter and run scenarios named on stdin")
+    profile = commands.add_parser("importtime", help="Import-time breakdown of a scenario")
+    profile.add_argument("scenario")
+    profile.add_argument("--top", type=int, default=15)
+    profile.add_argument("--full", action="store_true", help="Profile without the import deferrals")
+    profile.add_argument("--json", help="Save the breakdown to this file")
+    profile.add_argument("--baseline", help="Compare with a breakdown saved by --json")
+    imports = commands.add_parser("_imports")
+    imports.add_argument("path")
+
+    args, extra = parser.parse_known_args(argv)
+    install_import_deferrals()
+
+    if args.command == "list":
+        scenarios = discover()
+        for name in sorted(n for n in scenarios if "/" in n):
+            short = name.split("/", 1)[1]
+            print(f"{short if scenarios.get(short) == scenarios[name] else name:<32} {os.path.relpath(scenarios[name], ROOT)}")
+        return 0
+    if args.command == "run":
+        words = list(args.scenarios) + extra
+        split = next((i for i, word in enumerate(words) if word.startswith("-")), len(words))
+        names, script_args = words[:split], words[split:]
+        if script_args[:1] == ["--"]:
+            script_args = script_args[1:]
+        if not names:
+            parser.error("run: name at least one scenario")
+        if script_args and len(names) > 1:
+            parser.error("run: script arguments need a single scenario")
+        if len(names) == 1:
+            # A single scenario runs in this process: nothing to amortize, no fork needed
+            return run_scenario(resolve(names[0]), script_args)
+        return _run_many([(resolve(name), []) for name in names])
+    if args.command == "serve":
+        return serve()
+    if args.command == "importtime":
+        result = profile_imports(resolve(args.scenario), full=args.full)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as file:
+                baseline = json.load(file)
+        print(format_profile(result, top=args.top, baseline=baseline))
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as file:
+                json.dump(result, file, indent=2)
+        return result["exit_code"]
+    if args.command == "_imports":
+        _exec_imports(args.path)
+        return 0
+    return 2
@@ -0,0 +1,131 @@
+import os
+import threading
+
+import httpx
+
+from common.rate_limiter import RateLimitedTransport, get_rate_limiter
+
+"""
+Shared LLM client layer for every script in the repository.
+
+Each ConversableAgent builds its own OpenAIWrapper and therefore its own OpenAI client.
+Without a shared transport every one of those clients opens its own connection pool, so
+agents running in the same process never reuse HTTP connections or TLS sessions.
+
+This module keeps a single keep-alive httpx client per process and hands it to every
+agent through the `http_client` entry of the config list. ConversableAgent deep-copies
+`llm_config`, so the client implements `__deepcopy__` and returns itself.
+
+All scripts build their `llm_config` through `build_llm_config()`, which makes this
+module the one place where model, key, timeout, retries and pool limits are configured.
+"""
+
+DEFAULT_MODEL = os.getenv("AG2_MODEL", "gpt-3.5-turbo")
+DEFAULT_TIMEOUT = 60
+DEFAULT_MAX_RETRIES = 3
+
+# Connection pool limits, overridable from the environment
+MAX_CONNECTIONS = int(os.getenv("AG2_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("AG2_MAX_KEEPALIVE_CONNECTIONS", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("AG2_KEEPALIVE_EXPIRY", "30"))
+
+
+class SharedHttpClient(httpx.Client):
+    """httpx client that is shared, not copied, when an agent deep-copies its llm_config."""
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+_lock = threading.Lock()
+_http_client = None
+
+
+def get_http_client() -> SharedHttpClient:
+    """Return the process-wide pooled HTTP client, creating it on first use."""
+    global _http_client
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            transport = httpx.HTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+            )
+            # Every request of every agent is scheduled against the key's rate limits
+            limiter = get_rate_limiter()
+            if limiter is not None:
+                transport = RateLimitedTransport(transport, limiter)
+            _http_client = SharedHttpClient(
+                transport=transport,
+                timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=10),
+                follow_redirects=True,
+            )
+        return _http_client
+
+
+def close_http_client():
+    """Close the shared client, e.g. at the end of a long-running process."""
+    global _http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+def pool_stats() -> dict:
+    """Report how many pooled connections the shared client currently holds."""
+    client = get_http_client()
+    transport = getattr(client, "_transport", None)
+    pool = getattr(getattr(transport, "wrapped", transport), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    idle = sum(1 for conn in connections if getattr(conn, "is_idle", lambda: False)())
+    return {
+        "connections": len(connections),
+        "idle": idle,
+        "max_connections": MAX_CONNECTIONS,
+        "max_keepalive_connections": MAX_KEEPALIVE_CONNECTIONS,
+    }
+
+
+def build_llm_config(temperature=None, model=None, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, cache=False, **overrides) -> dict:
+    """
+    Build an llm_config dict that routes every agent through the shared HTTP client.
+
+    Args:
+        temperature: Sampling temperature, omitted from the config when None.
+        model: Model name, defaults to AG2_MODEL or gpt-3.5-turbo.
+        timeout: Per-request timeout in seconds.
+        max_retries: Retries performed by the OpenAI client.
+        cache: True to use the process-wide ResponseCache, or a ResponseCache instance.
+        **overrides: Extra top-level llm_config entries (e.g. cache_seed, stream).
+    """
+    model = model or DEFAULT_MODEL
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
+
+    llm_config = {
+        "model": model,
+        "api_key": api_key,
+        "config_list": [{
+            "model": model,
+            "api_key": api_key,
+            "timeout": timeout,
+            "max_retries": max_retries,
+            "http_client": get_http_client(),
+        }],
+    }
+    # Lets every script target an OpenAI-compatible endpoint, e.g. the local mock server
+    base_url = os.getenv("OPENAI_BASE_URL")
+    if base_url:
+        llm_config["config_list"][0]["base_url"] = base_url
+    if temperature is not None:
+        llm_config["temperature"] = temperature
+    if cache:
+        from common.response_cache import get_response_cache
+
+        llm_config["cache"] = get_response_cache() if cache is True else cache
+    llm_config.update(overrides)
+    return llm_config
@@ -0,0 +1,347 @@
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import threading
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+"""
+Latency-aware routing over several OpenAI-compatible endpoints, with hedged requests.
+
+A config_list entry normally names one endpoint, so a slow or degraded deployment becomes the
+latency users see. `RoutingClient` is an autogen custom model client that owns several endpoints
+(deployments, regions, a local OpenAI-compatible server, ...) and for every request:
+
+- picks the endpoint with the lowest expected time to a successful reply (EWMA latency divided
+  by the EWMA success rate); endpoints with few requests are tried first and, occasionally, a random one is probed so a recovered
+  endpoint gets noticed,
+- fails over to the next endpoint when a request errors,
+- with `hedge`, sends a duplicate to the second-best endpoint once the first has been pending
+  longer than its p95 latency; the first answer wins and the other request is cancelled.
+
+Latency and error statistics are shared by all agents of the process, per endpoint name.
+
+    llm_config = build_routed_llm_config([
+        {"name": "primary", "base_url": "https://api.openai.com/v1"},
+        {"name": "local", "base_url": "http://127.0.0.1:8000/v1", "api_key": "local"},
+    ], hedge=True)
+    assistant = AssistantAgent(name="assistant", llm_config=llm_config)
+    assistant.register_model_client(model_client_cls=RoutingClient)
+
+Routed replies are not streamed, and routed requests use their own async HTTP clients (they
+do not pass through the shared client's rate limiter).
+
+    python -m common.llm_router --requests 40    # demo against local stand-in endpoints
+"""
+
+# config_list keys that configure the router rather than the chat completion request
+ROUTER_KEYS = {
+    "endpoints", "hedge", "hedge_after", "hedge_quantile", "min_samples", "explore", "model_client_cls",
+    "api_key", "base_url", "api_type", "api_version", "http_client", "timeout", "max_retries", "tags", "price", "stream",
+}
+
+
+class EndpointStats:
+    """Latency and error tracking for one endpoint."""
+
+    def __init__(self, name, alpha=0.2, window=200):
+        self.name = name
+        self.alpha = alpha
+        self.latency_ewma = None
+        self.error_ewma = 0.0
+        self.samples = collections.deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+        self.cancelled = 0
+        # Requests to this endpoint that were still pending at the deadline and got a hedge
+        self.hedged = 0
+
+    def observe(self, latency, ok=True):
+        self.requests += 1
+        self.errors += not ok
+        self.error_ewma = (1 - self.alpha) * self.error_ewma + self.alpha * (0.0 if ok else 1.0)
+        if latency is not None:
+            self.latency_ewma = latency if self.latency_ewma is None else (1 - self.alpha) * self.latency_ewma + self.alpha * latency
+            if ok:
+                self.samples.append(latency)
+
+    def observe_cancelled(self, elapsed):
+        """
+        A request cut short after `elapsed` seconds because another one won the hedge race.
+
+        Its real latency is unknown, only that it exceeds `elapsed`: the EWMA is raised towards that
+        lower bound when it is below it (so an endpoint that keeps losing stops being picked first), and
+        nothing goes into the success rate or the latency samples behind the hedge deadline.
+        """
+        self.cancelled += 1
+        if self.latency_ewma is not None and elapsed > self.latency_ewma:
+            self.latency_ewma = (1 - self.alpha) * self.latency_ewma + self.alpha * elapsed
+
+    def quantile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def score(self):
+        """Expected time until a successful reply when sending here (attempts until success times latency)."""
+        return (self.latency_ewma or 0.0) / max(0.05, 1 - self.error_ewma)
+
+    def report(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "wins": self.wins,
+            "cancelled": self.cancelled,
+            "hedged": self.hedged,
+            "latency_ewma_s": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "p95_s": round(self.quantile(0.95), 3) if self.samples else None,
+            "error_ewma": round(self.error_ewma, 3),
+        }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def endpoint_stats(name) -> EndpointStats:
+    with _stats_lock:
+        if name not in _stats:
+            _stats[name] = EndpointStats(name)
+        return _stats[name]
+
+
+def router_stats() -> dict:
+    """Per-endpoint statistics of every endpoint used in this process."""
+    with _stats_lock:
+        return {name: stats.report() for name, stats in _stats.items()}
+
+
+def _background_loop():
+    """Event loop on a daemon thread that runs the async requests of the sync `create` calls."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-router", daemon=True).start()
+        return _loop
+
+
+class RoutingClient:
+    """
+    autogen ModelClient routing each request to the best of several endpoints.
+
+    Config entry keys:
+        endpoints: List of {"name", "base_url", "api_key", "model", "timeout"}; missing values
+            come from the entry itself.
+        hedge: Send a hedged duplicate to the runner-up endpoint after the p95 deadline.
+        hedge_after: Deadline in seconds while an endpoint has fewer than `min_samples` samples.
+        hedge_quantile: Latency quantile used as the hedging deadline.
+        min_samples: Requests an endpoint needs before its statistics are trusted.
+        explore: Probability of probing a random endpoint instead of the best one.
+    """
+
+    def __init__(self, config, **kwargs):
+        self.model = config.get("model")
+        self.hedge = config.get("hedge", False)
+        self.hedge_after = config.get("hedge_after", 2.0)
+        self.hedge_quantile = config.get("hedge_quantile", 0.95)
+        self.min_samples = config.get("min_samples", 10)
+        self.explore = config.get("explore", 0.05)
+        self.endpoints = []
+        for i, endpoint in enumerate(config["endpoints"]):
+            name = endpoint.get("name") or endpoint.get("base_url") or f"endpoint-{i}"
+            self.endpoints.append(
+                {
+                    "name": name,
+                    "model": endpoint.get("model", self.model),
+                    "client": AsyncOpenAI(
+                        api_key=endpoint.get("api_key", config.get("api_key")),
+                        base_url=endpoint.get("base_url", config.get("base_url")),
+                        timeout=endpoint.get("timeout", config.get("timeout", 60)),
+                        # Failover and hedging replace the client's own retries
+                        max_retries=0,
+                        http_client=httpx.AsyncClient(limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)),
+                    ),
+                    "stats": endpoint_stats(name),
+                }
+            )
+
+    def _ranked(self):
+        """Endpoints in the order they should be tried."""
+        untried = [e for e in self.endpoints if e["stats"].requests < self.min_samples]
+        if untried:
+            # Warm-up: spread requests over the endpoints without enough samples
+            untried.sort(key=lambda e: e["stats"].requests)
+            rest = [e for e in self.endpoints if e not in untried]
+            return untried + sorted(rest, key=lambda e: e["stats"].score())
+        ranked = sorted(self.endpoints, key=lambda e: e["stats"].score())
+        if len(ranked) > 1 and random.random() < self.explore:
+            probe = random.choice(ranked[1:])
+            ranked.remove(probe)
+            ranked.insert(0, probe)
+        return ranked
+
+    def _deadline(self, endpoint):
+        stats = endpoint["stats"]
+        if len(stats.samples) < self.min_samples:
+            return self.hedge_after
+        return max(0.05, stats.quantile(self.hedge_quantile))
+
+    async def _call(self, endpoint, params):
+        start = time.perf_counter()
+        try:
+            response = await endpoint["client"].chat.completions.create(**{**params, "model": endpoint["model"]})
+        except asyncio.CancelledError:
+            # The request lost a hedge race: its latency is at least this long
+            endpoint["stats"].observe_cancelled(time.perf_counter() - start)
+            raise
+        except Exception:
+            endpoint["stats"].observe(time.perf_counter() - start, ok=False)
+            raise
+        endpoint["stats"].observe(time.perf_counter() - start, ok=True)
+        return response
+
+    async def a_create(self, params):
+        params = {k: v for k, v in params.items() if k not in ROUTER_KEYS}
+        queue = self._ranked()
+        pending = {}
+        last_error = None
+
+        def launch():
+            endpoint = queue.pop(0)
+            pending[asyncio.ensure_future(self._call(endpoint, params))] = endpoint
+
+        launch()
+        try:
+            while pending:
+                primary = next(iter(pending.values()))
+                timeout = self._deadline(primary) if self.hedge and queue and len(pending) == 1 else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Pending past the deadline: hedge on the next endpoint
+                    primary["stats"].hedged += 1
+                    launch()
+                    continue
+                for task in done:
+                    endpoint = pending.pop(task)
+                    if task.exception() is None:
+                        endpoint["stats"].wins += 1
+                        return task.result()
+                    last_error = task.exception()
+                if not pending and queue:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error
+
+    def create(self, params):
+        return asyncio.run_coroutine_threadsafe(self.a_create(params), _background_loop()).result()
+
+    def message_retrieval(self, response):
+        return [
+            choice.message if choice.message.function_call is not None or choice.message.tool_calls else choice.message.content
+            for choice in response.choices
+        ]
+
+    def cost(self, response) -> float:
+        from autogen.oai.client import OpenAIClient
+
+        return OpenAIClient.cost(self, response)
+
+    @staticmethod
+    def get_usage(response) -> dict:
+        from autogen.oai.client import OpenAIClient
+
+        return OpenAIClient.get_usage(response)
+
+
+def build_routed_llm_config(endpoints, model=None, hedge=False, **options) -> dict:
+    """
+    llm_config whose single config entry routes over `endpoints`.
+
+    Register the client on every agent using it: `agent.register_model_client(model_client_cls=RoutingClient)`.
+    """
+    from common.llm_client import DEFAULT_MODEL
+
+    model = model or DEFAULT_MODEL
+    entry = {
+        "model": model,
+        "model_client_cls": "RoutingClient",
+        "api_key": os.getenv("OPENAI_API_KEY"),
+        "endpoints": endpoints,
+        "hedge": hedge,
+        **options,
+    }
+    return {"config_list": [entry], "cache_seed": None}
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def main(argv=None):
+    """Compare a single degraded endpoint with routing and hedging, all on local stand-in servers."""
+    from autogen import OpenAIWrapper
+
+    from common.mock_openai_server import MockOpenAIServer
+
+    parser = argparse.ArgumentParser(description="Latency-aware routing demo against local mock endpoints.")
+    parser.add_argument("--requests", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    # "degraded": slow and with a heavy tail, "healthy": fast with an occasional stall
+    degraded = MockOpenAIServer({"default_reply": "ok", "latency": 0.4, "jitter": 0.1, "slow_rate": 0.2, "slow_latency": 1.5, "seed": 1}).start()
+    healthy = MockOpenAIServer({"default_reply": "ok", "latency": 0.1, "jitter": 0.03, "slow_rate": 0.1, "slow_latency": 1.5, "seed": 2}).start()
+    endpoints = [
+        {"name": "degraded", "base_url": degraded.base_url, "api_key": "mock"},
+        {"name": "healthy", "base_url": healthy.base_url, "api_key": "mock"},
+    ]
+    messages = [{"role": "user", "content": "ping"}]
+    results = {}
+
+    single = OpenAIWrapper(config_list=[{"model": "gpt-3.5-turbo", "api_key": "mock", "base_url": degraded.base_url}], cache_seed=None)
+    setups = {
+        "single endpoint": lambda: single,
+        "routed": lambda: _routed_wrapper(endpoints, hedge=False, min_samples=5),
+        "routed + hedged": lambda: _routed_wrapper([{**e, "name": e["name"] + "-h"} for e in endpoints], hedge=True, min_samples=5),
+    }
+    for label, make in setups.items():
+        wrapper = make()
+        latencies = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            wrapper.create(messages=messages)
+            latencies.append(time.perf_counter() - start)
+        results[label] = {
+            "p50_s": round(_percentile(latencies, 0.5), 3),
+            "p95_s": round(_percentile(latencies, 0.95), 3),
+            "max_s": round(max(latencies), 3),
+        }
+    print(json.dumps({"latency": results, "endpoints": router_stats()}, indent=2))
+    degraded.stop()
+    healthy.stop()
+    return results
+
+
+def _routed_wrapper(endpoints, **options):
+    from autogen import OpenAIWrapper
+
+    config = build_routed_llm_config(endpoints, model="gpt-3.5-turbo", **options)
+    wrapper = OpenAIWrapper(config_list=config["config_list"], cache_seed=None)
+    wrapper.register_model_client(model_client_cls=RoutingClient)
+    return wrapper
+
+
+if __name__ == "__main__":
+    main()
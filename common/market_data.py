@@ -0,0 +1,280 @@
+import datetime
+import json
+import os
+import re
+import threading
+from typing import Annotated as A
+
+import numpy as np
+import pandas as pd
+
+"""
+Local OHLC market-data store with incremental fetch.
+
+Stock chart tasks used to call `yf.download` for the full date range on every run. The store
+keeps daily bars on disk, one directory per symbol with one `.npy` file per column
+(`.cache/market_data/META/close.npy`, ...), and remembers which date ranges it has already
+fetched, so a request:
+
+- fetches only the parts of the range not covered yet (weekends and holidays inside a fetched
+  range are not fetched again),
+- loads the columns memory-mapped and slices the range with a binary search on the dates.
+
+    store = get_market_data_store()
+    frames = store.get_many(["META", "TSLA"], "2022-01-01", "2024-01-01")
+    frames["META"]["Close"]
+
+Ranges are half-open, [start, end), like `yf.download`. Data is fetched through a provider:
+`YFinanceProvider` (default, needs the yfinance package) or `CSVFixtureProvider`, which serves
+the synthetic bars in `common/fixtures/market_data` for offline runs and tests. Set
+AG2_MARKET_DATA_PROVIDER=fixtures to use the fixtures.
+
+`stock_prices_tool(work_dir)` exposes the store to agents as the `get_stock_prices` tool. Symbols
+name directories and files, and the tool's come from the model, so only ticker-like symbols
+(letters, digits, `.`, `-`, `^`, `=`) are accepted.
+"""
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "market_data")
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "market_data")
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+# Ticker symbols as Yahoo Finance writes them: BRK-B, ^GSPC, EURUSD=X, 7203.T
+SYMBOL_PATTERN = re.compile(r"[A-Za-z0-9.\-^=]{1,20}")
+
+
+def check_symbol(symbol) -> str:
+    """The upper-cased symbol; anything that is not a ticker (path separators, `.`, `..`) raises ValueError."""
+    if not isinstance(symbol, str) or not SYMBOL_PATTERN.fullmatch(symbol) or symbol in (".", ".."):
+        raise ValueError(f"invalid ticker symbol {symbol!r}")
+    return symbol.upper()
+
+
+def _day(value) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+def _empty():
+    return {"dates": np.array([], dtype="datetime64[D]"), **{c: np.array([], dtype="float64") for c in COLUMNS}}
+
+
+class YFinanceProvider:
+    """Daily bars from Yahoo Finance (imports yfinance on first use)."""
+
+    def fetch(self, symbol, start, end) -> dict:
+        import yfinance as yf
+
+        frame = yf.download(symbol, start=str(start), end=str(end), progress=False, auto_adjust=False)
+        if isinstance(frame.columns, pd.MultiIndex):
+            # Recent yfinance versions return (field, ticker) columns even for a single ticker
+            frame = frame.xs(symbol, axis=1, level=-1)
+        frame = frame.dropna()
+        if frame.empty:
+            return _empty()
+        return {
+            "dates": frame.index.values.astype("datetime64[D]"),
+            **{c: frame[c].to_numpy(dtype="float64") for c in COLUMNS},
+        }
+
+
+class CSVFixtureProvider:
+    """Daily bars from `<directory>/<SYMBOL>.csv` files (Date, Open, High, Low, Close, Volume)."""
+
+    def __init__(self, directory=FIXTURES_DIR):
+        self.directory = directory
+
+    def fetch(self, symbol, start, end) -> dict:
+        path = os.path.join(self.directory, f"{symbol.upper()}.csv")
+        if not os.path.exists(path):
+            return _empty()
+        frame = pd.read_csv(path, parse_dates=["Date"]).dropna()
+        dates = frame["Date"].values.astype("datetime64[D]")
+        mask = (dates >= start) & (dates < end)
+        return {"dates": dates[mask], **{c: frame[c].to_numpy(dtype="float64")[mask] for c in COLUMNS}}
+
+
+def default_provider():
+    """Provider selected by AG2_MARKET_DATA_PROVIDER ("yfinance" or "fixtures")."""
+    if os.getenv("AG2_MARKET_DATA_PROVIDER", "yfinance").lower() == "fixtures":
+        return CSVFixtureProvider()
+    return YFinanceProvider()
+
+
+def _merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _missing(start, end, covered):
+    """Sub-ranges of [start, end) not in the covered intervals."""
+    gaps, cursor = [], start
+    for covered_start, covered_end in covered:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class MarketDataStore:
+    """
+    Columnar on-disk store of daily OHLCV bars.
+
+    Args:
+        root: Store directory, default `.cache/market_data`.
+        provider: Object with `fetch(symbol, start, end) -> {"dates", "Open", ...}` (numpy arrays).
+    """
+
+    def __init__(self, root=None, provider=None):
+        self.root = root or STORE_DIR
+        self.provider = provider or default_provider()
+        self._lock = threading.Lock()
+        self.fetches = []
+        self.requests = 0
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, symbol.upper())
+
+    def _coverage(self, symbol):
+        try:
+            with open(os.path.join(self._dir(symbol), "coverage.json"), "r", encoding="utf-8") as file:
+                return [[_day(s), _day(e)] for s, e in json.load(file)]
+        except (OSError, ValueError):
+            return []
+
+    def _load(self, symbol, mmap_mode="r"):
+        directory = self._dir(symbol)
+        if not os.path.exists(os.path.join(directory, "dates.npy")):
+            return _empty()
+        return {
+            "dates": np.load(os.path.join(directory, "dates.npy"), mmap_mode=mmap_mode),
+            **{c: np.load(os.path.join(directory, f"{c.lower()}.npy"), mmap_mode=mmap_mode) for c in COLUMNS},
+        }
+
+    def _save(self, symbol, columns, coverage):
+        directory = self._dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        for name, values in columns.items():
+            path = os.path.join(directory, f"{name.lower()}.npy")
+            with open(path + ".tmp", "wb") as file:
+                np.save(file, values)
+            os.replace(path + ".tmp", path)
+        # Coverage last: if anything above fails, the range is simply fetched again
+        path = os.path.join(directory, "coverage.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump([[str(s), str(e)] for s, e in coverage], file)
+        os.replace(path + ".tmp", path)
+
+    def _update(self, symbol, start, end):
+        """Fetch the missing parts of [start, end) and merge them into the symbol's columns."""
+        covered = self._coverage(symbol)
+        gaps = _missing(start, end, covered)
+        if not gaps:
+            return
+        fetched = [self.provider.fetch(symbol, gap_start, gap_end) for gap_start, gap_end in gaps]
+        self.fetches.extend({"symbol": symbol, "start": str(s), "end": str(e)} for s, e in gaps)
+
+        existing = self._load(symbol, mmap_mode=None)
+        # New bars first, so np.unique keeps them over stored bars for the same date
+        dates = np.concatenate([f["dates"] for f in fetched] + [existing["dates"]])
+        dates, index = np.unique(dates, return_index=True)
+        columns = {"dates": dates}
+        for c in COLUMNS:
+            columns[c] = np.concatenate([f[c] for f in fetched] + [existing[c]])[index]
+
+        # Today's bar may still change: only mark ranges up to yesterday as covered
+        today = np.datetime64(datetime.date.today(), "D")
+        covered += [[s, min(e, today)] for s, e in gaps if s < today]
+        self._save(symbol, columns, _merge_intervals(covered))
+
+    def get(self, symbol, start, end) -> pd.DataFrame:
+        """Daily bars of `symbol` in [start, end), indexed by date."""
+        symbol = check_symbol(symbol)
+        start, end = _day(start), _day(end)
+        with self._lock:
+            self.requests += 1
+            self._update(symbol, start, end)
+            columns = self._load(symbol)
+        dates = columns["dates"]
+        lo, hi = np.searchsorted(dates, start, "left"), np.searchsorted(dates, end, "left")
+        # Copy the slices so the memory maps are released (files can then be replaced, also on Windows)
+        return pd.DataFrame(
+            {c: np.array(columns[c][lo:hi]) for c in COLUMNS},
+            index=pd.DatetimeIndex(np.array(dates[lo:hi]), name="Date"),
+        )
+
+    def get_many(self, symbols, start, end) -> dict:
+        return {check_symbol(symbol): self.get(symbol, start, end) for symbol in symbols}
+
+    def closes(self, symbols, start, end) -> pd.DataFrame:
+        """Close prices of several symbols, one column per symbol."""
+        return pd.DataFrame({symbol: frame["Close"] for symbol, frame in self.get_many(symbols, start, end).items()})
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "fetches": len(self.fetches), "fetched_ranges": list(self.fetches)}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_market_data_store() -> MarketDataStore:
+    """Process-wide store in `.cache/market_data` using the default provider."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MarketDataStore()
+        return _store
+
+
+def stock_prices_tool(work_dir="code_execution", store=None):
+    """
+    Build the `get_stock_prices` tool: it saves the close prices to a CSV in `work_dir` for the
+    agent's code to read, and returns a short summary instead of the raw rows.
+    """
+
+    def get_stock_prices(
+        symbols: A[str, "Comma-separated ticker symbols, e.g. 'META,TSLA'"],
+        start_date: A[str, "First date, YYYY-MM-DD"],
+        end_date: A[str, "End date (exclusive), YYYY-MM-DD"],
+    ) -> str:
+        tickers, errors = [], []
+        for symbol in (s.strip() for s in symbols.split(",")):
+            if not symbol:
+                continue
+            try:
+                tickers.append(check_symbol(symbol))
+            except ValueError as e:
+                errors.append(f"{symbol}: {e}")
+        if not tickers:
+            return "\n".join(errors or ["No ticker symbols given."])
+        # Normalized dates, so the file name is built from tickers and digits only
+        start_date, end_date = str(_day(start_date)), str(_day(end_date))
+        closes = (store or get_market_data_store()).closes(tickers, start_date, end_date)
+        os.makedirs(work_dir, exist_ok=True)
+        filename = f"prices_{'_'.join(tickers)}_{start_date}_{end_date}.csv"
+        closes.to_csv(os.path.join(work_dir, filename))
+
+        lines = [f"Saved daily close prices to {filename} (columns: Date, {', '.join(tickers)})."] + errors
+        for ticker in tickers:
+            series = closes[ticker].dropna()
+            if series.empty:
+                lines.append(f"{ticker}: no data")
+                continue
+            change = (series.iloc[-1] / series.iloc[0] - 1) * 100
+            lines.append(
+                f"{ticker}: {len(series)} days {series.index[0].date()}..{series.index[-1].date()}, "
+                f"close {series.iloc[0]:.2f} -> {series.iloc[-1]:.2f} ({change:+.1f}%), "
+                f"min {series.min():.2f}, max {series.max():.2f}"
+            )
+        return "\n".join(lines)
+
+    return get_stock_prices
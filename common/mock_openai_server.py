@@ -0,0 +1,316 @@
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+Offline, scriptable stand-in for the OpenAI chat completions API.
+
+Serves `POST /v1/chat/completions` (plain and `stream: true`) and `GET /v1/models` so the example
+scripts can run without an API key or network access. Point an OpenAI client at it with
+`OPENAI_BASE_URL=http://127.0.0.1:<port>/v1`.
+
+Replies come from a script (a dict, or a JSON file on the command line):
+
+    {
+        "default_reply": "TERMINATE",
+        "tool_result_reply": "Here is what I found. TERMINATE",
+        "latency": 0.2,                # seconds added to every request
+        "jitter": 0.05,                # +/- uniform jitter on top of latency
+        "slow_rate": 0.05,             # fraction of requests that get `slow_latency` on top (a slow tail)
+        "slow_latency": 3.0,
+        "error_rate": 0.1,             # fraction of requests answered with `error_status`
+        "error_status": 429,
+        "rules": [
+            {"match": "Add 3 and 2", "tool_calls": [{"name": "add_numbers", "arguments": {"a": 3, "b": 2}}]},
+            {"system": "guess an animal", "reply": "Is it an elephant?"}
+        ]
+    }
+
+Rules are tried in order. `match` is searched in the last message, `system` in the system message;
+a rule may carry its own `latency`. When the last message is a tool result, `tool_result_reply` is
+returned. Group chat speaker selection prompts are answered automatically by cycling through the
+listed roles.
+"""
+
+DEFAULT_SCRIPT = {
+    # A bare "TERMINATE" satisfies autogen's default is_termination_msg, which compares for equality
+    "default_reply": "TERMINATE",
+    "tool_result_reply": "Here is what I found. TERMINATE",
+    "latency": 0.0,
+    "jitter": 0.0,
+    "slow_rate": 0.0,
+    "slow_latency": 0.0,
+    "error_rate": 0.0,
+    "error_status": 429,
+    "rules": [],
+}
+SPEAKER_SELECTION_PATTERN = re.compile(r"select the next role from \[(.*?)\]")
+
+
+def _approx_tokens(text):
+    return max(1, len(text) // 4) if text else 0
+
+
+def _text(message):
+    content = message.get("content")
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+class MockOpenAIServer:
+    """
+    Threaded HTTP server answering chat completion requests from a reply script.
+
+    Args:
+        script: Reply script, merged over DEFAULT_SCRIPT.
+        host: Interface to bind.
+        port: Port to bind, 0 picks a free one.
+    """
+
+    def __init__(self, script=None, host="127.0.0.1", port=0):
+        self.script = {**DEFAULT_SCRIPT, **(script or {})}
+        self._ids = itertools.count(1)
+        self._speaker_turns = itertools.count()
+        self._lock = threading.Lock()
+        self._random = random.Random(self.script.get("seed", 0))
+        self.requests = 0
+        self.errors = 0
+        self.injected_latency = 0.0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def stats(self):
+        return {"requests": self.requests, "errors": self.errors, "injected_latency_s": round(self.injected_latency, 3)}
+
+    # Reply selection
+
+    def _match_rule(self, messages):
+        system = next((_text(m) for m in messages if m.get("role") == "system"), "")
+        last = _text(messages[-1]) if messages else ""
+        for rule in self.script["rules"]:
+            if "match" in rule and not re.search(rule["match"], last, re.IGNORECASE | re.DOTALL):
+                continue
+            if "system" in rule and not re.search(rule["system"], system, re.IGNORECASE | re.DOTALL):
+                continue
+            return rule
+        return None
+
+    def reply_for(self, request):
+        """Return (message, rule) for a chat completion request."""
+        messages = request.get("messages", [])
+        last = messages[-1] if messages else {}
+        if last.get("role") == "tool":
+            return {"role": "assistant", "content": self.script["tool_result_reply"]}, None
+
+        selection = SPEAKER_SELECTION_PATTERN.search(_text(last))
+        if selection:
+            roles = [r.strip() for r in selection.group(1).split(",") if r.strip()]
+            with self._lock:
+                role = roles[next(self._speaker_turns) % len(roles)]
+            return {"role": "assistant", "content": role}, None
+
+        rule = self._match_rule(messages)
+        if rule and rule.get("tool_calls") and request.get("tools"):
+            with self._lock:
+                call_ids = [f"call_mock_{next(self._ids)}" for _ in rule["tool_calls"]]
+            tool_calls = [
+                {
+                    "id": call_id,
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))},
+                }
+                for call_id, call in zip(call_ids, rule["tool_calls"])
+            ]
+            return {"role": "assistant", "content": None, "tool_calls": tool_calls}, rule
+        if rule and "reply" in rule:
+            return {"role": "assistant", "content": rule["reply"]}, rule
+        return {"role": "assistant", "content": self.script["default_reply"]}, rule
+
+    def _latency(self, rule):
+        latency = (rule or {}).get("latency", self.script["latency"])
+        jitter = self.script["jitter"]
+        with self._lock:
+            if self.script["slow_rate"] and self._random.random() < self.script["slow_rate"]:
+                latency += self.script["slow_latency"]
+            return max(0.0, latency + (self._random.uniform(-jitter, jitter) if jitter else 0.0))
+
+    def _should_fail(self):
+        rate = self.script["error_rate"]
+        with self._lock:
+            return rate > 0 and self._random.random() < rate
+
+    def completion(self, request, message):
+        prompt_tokens = sum(_approx_tokens(_text(m)) for m in request.get("messages", []))
+        completion_tokens = _approx_tokens(message.get("content") or json.dumps(message.get("tool_calls")))
+        with self._lock:
+            completion_id = f"chatcmpl-mock-{next(self._ids)}"
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                    "logprobs": None,
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def stream_chunks(self, completion):
+        """Split a completion into chat.completion.chunk events."""
+        base = {k: completion[k] for k in ("id", "created", "model")}
+        message = completion["choices"][0]["message"]
+        finish_reason = completion["choices"][0]["finish_reason"]
+
+        def chunk(delta, finish=None):
+            return {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": finish, "logprobs": None}]}
+
+        yield chunk({"role": "assistant", "content": ""})
+        for index, call in enumerate(message.get("tool_calls") or []):
+            yield chunk({"tool_calls": [{"index": index, "id": call["id"], "type": "function", "function": {"name": call["function"]["name"], "arguments": call["function"]["arguments"]}}]})
+        for piece in re.findall(r"\S+\s*|\s+", message.get("content") or ""):
+            yield chunk({"content": piece})
+        yield chunk({}, finish_reason)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                return None
+
+            def _send_json(self, status, body):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on the request (timeout, or a cancelled hedge)
+                    pass
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "gpt-3.5-turbo", "object": "model", "owned_by": "mock"}]})
+                else:
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+                    return
+
+                message, rule = server.reply_for(request)
+                latency = server._latency(rule)
+                with server._lock:
+                    server.requests += 1
+                    server.injected_latency += latency
+                time.sleep(latency)
+
+                if server._should_fail():
+                    with server._lock:
+                        server.errors += 1
+                    status = server.script["error_status"]
+                    self._send_json(status, {"error": {"message": "Injected mock error", "type": "mock_error", "code": status}})
+                    return
+
+                completion = server.completion(request, message)
+                if not request.get("stream"):
+                    self._send_json(200, completion)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                chunk_delay = server.script.get("chunk_delay", 0.0)
+                try:
+                    for event in server.stream_chunks(completion):
+                        self._write_chunk(f"data: {json.dumps(event)}\n\n")
+                        if chunk_delay:
+                            time.sleep(chunk_delay)
+                    self._write_chunk("data: [DONE]\n\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client cancelled the stream
+                    self.close_connection = True
+
+            def _write_chunk(self, text):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible mock endpoint.")
+    parser.add_argument("--script", help="JSON reply script")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, help="Seconds added to every request")
+    parser.add_argument("--error-rate", type=float, help="Fraction of requests that fail")
+    args = parser.parse_args(argv)
+
+    script = {}
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as file:
+            script = json.load(file)
+    if args.latency is not None:
+        script["latency"] = args.latency
+    if args.error_rate is not None:
+        script["error_rate"] = args.error_rate
+
+    server = MockOpenAIServer(script, host=args.host, port=args.port)
+    print(f"Mock OpenAI endpoint listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
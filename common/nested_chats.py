@@ -0,0 +1,170 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+from autogen import ConversableAgent
+
+from common.rate_limiter import ContextThreadPoolExecutor, run_llm_calls_on
+
+"""
+Concurrent nested chats.
+
+`register_nested_chats` runs its chat queue through `initiate_chats`, one chat after the other,
+even when the chats only read the triggering message. `register_parallel_nested_chats` keeps the
+same chat-queue format but runs the chats concurrently with `a_initiate_chat`:
+
+- every chat may carry a `chat_id` (defaults to its position in the queue),
+- a chat may list `prerequisites` (chat ids); it starts once those chats have finished and
+  receives their summaries as carryover, exactly like `a_initiate_chats`,
+- chats without prerequisites all start at once.
+
+The reply returned to the triggering agent merges the summaries in chat-queue order, so the
+output does not depend on which chat finished first.
+"""
+
+# Keys of a chat-queue entry that are consumed here rather than passed to a_initiate_chat
+_SCHEDULING_KEYS = ("sender", "recipient", "chat_id", "prerequisites")
+
+# Runs the blocking LLM calls of the chats' agents, keeping contextvars (request priority); threads start lazily
+_EXECUTOR = ContextThreadPoolExecutor(thread_name_prefix="nested-chat")
+
+
+def _chat_order(chats):
+    """Return chat ids in an order where every chat comes after its prerequisites."""
+    ids = [chat["chat_id"] for chat in chats]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate chat_id in nested chat queue: {ids}")
+    prerequisites = {chat["chat_id"]: [p for p in chat.get("prerequisites", []) if p in ids] for chat in chats}
+
+    order, visiting, done = [], set(), set()
+
+    def visit(chat_id):
+        if chat_id in done:
+            return
+        if chat_id in visiting:
+            raise ValueError(f"Circular prerequisites in nested chat queue at chat_id {chat_id!r}")
+        visiting.add(chat_id)
+        for prerequisite in prerequisites[chat_id]:
+            visit(prerequisite)
+        visiting.discard(chat_id)
+        done.add(chat_id)
+        order.append(chat_id)
+
+    for chat_id in ids:
+        visit(chat_id)
+    return order
+
+
+async def a_run_chats(chats: list[dict], timings: dict = None) -> dict:
+    """
+    Run a list of chats concurrently, honouring `prerequisites`.
+
+    Each chat is a dict in the `initiate_chats` format with `sender` and `recipient` set.
+    Returns a dict mapping chat_id to ChatResult, in the order of the input list. When `timings`
+    is given, it receives the start and end time (time.perf_counter) of every chat by chat_id.
+    """
+    chats = [{**chat, "chat_id": chat.get("chat_id", i)} for i, chat in enumerate(chats)]
+    for chat in chats:
+        # Agents already given an executor (e.g. by a SessionHost) keep it
+        run_llm_calls_on(chat["sender"], _EXECUTOR)
+        run_llm_calls_on(chat["recipient"], _EXECUTOR)
+    by_id = {chat["chat_id"]: chat for chat in chats}
+    tasks = {}
+
+    async def run(chat, prerequisite_tasks):
+        finished = [await task for task in prerequisite_tasks]
+        carryover = chat.get("carryover", [])
+        if isinstance(carryover, str):
+            carryover = [carryover]
+        carryover = list(carryover) + [result.summary for result in finished if result.summary]
+        kwargs = {k: v for k, v in chat.items() if k not in _SCHEDULING_KEYS}
+        kwargs["carryover"] = carryover
+        start = time.perf_counter()
+        result = await chat["sender"].a_initiate_chat(chat["recipient"], **kwargs)
+        if timings is not None:
+            timings[chat["chat_id"]] = {"start": start, "end": time.perf_counter()}
+        return result
+
+    for chat_id in _chat_order(chats):
+        chat = by_id[chat_id]
+        prerequisite_tasks = [tasks[p] for p in chat.get("prerequisites", []) if p in tasks]
+        tasks[chat_id] = asyncio.ensure_future(run(chat, prerequisite_tasks))
+
+    results = await asyncio.gather(*(tasks[chat["chat_id"]] for chat in chats))
+    return {chat["chat_id"]: result for chat, result in zip(chats, results)}
+
+
+def run_chats(chats: list[dict]) -> dict:
+    """Synchronous entry point for `a_run_chats`, usable from inside a sync or an async chat."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(a_run_chats(chats))
+
+    # Called from code already running on an event loop: use a private loop on a helper thread
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = asyncio.run(a_run_chats(chats))
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(target,), name="parallel-nested-chats")
+    thread.start()
+    thread.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def merge_summaries(chats: list[dict], results: dict) -> str:
+    """Join the chat summaries in chat-queue order, labelled by recipient name."""
+    sections = []
+    for chat in chats:
+        result = results.get(chat["chat_id"])
+        if result is not None and result.summary:
+            sections.append(f"{chat['recipient'].name}:\n{result.summary}")
+    return "\n\n".join(sections)
+
+
+def parallel_summary_from_nested_chats(chat_queue, recipient, messages=None, sender=None, config=None):
+    """Reply function for `register_nested_chats` that runs the chat queue concurrently."""
+    chats = ConversableAgent._get_chats_to_run(chat_queue, recipient, messages, sender, config)
+    if not chats:
+        return True, None
+    chats = [{**chat, "chat_id": chat.get("chat_id", i)} for i, chat in enumerate(chats)]
+    results = run_chats(chats)
+    return True, merge_summaries(chats, results)
+
+
+async def a_parallel_summary_from_nested_chats(chat_queue, recipient, messages=None, sender=None, config=None):
+    """Async variant of `parallel_summary_from_nested_chats` for chats started with `a_initiate_chat`."""
+    chats = ConversableAgent._get_chats_to_run(chat_queue, recipient, messages, sender, config)
+    if not chats:
+        return True, None
+    chats = [{**chat, "chat_id": chat.get("chat_id", i)} for i, chat in enumerate(chats)]
+    results = await a_run_chats(chats)
+    return True, merge_summaries(chats, results)
+
+
+def register_parallel_nested_chats(agent: ConversableAgent, chat_queue: list[dict], trigger, position: int = 2, use_async: bool = False, **kwargs):
+    """
+    Register `chat_queue` as nested chats of `agent` that run concurrently.
+
+    Accepts the same arguments as `ConversableAgent.register_nested_chats`; entries of the queue
+    may additionally declare `chat_id` and `prerequisites`. With `use_async` the nested chats run
+    on the event loop of an outer `a_initiate_chat` instead of a helper thread (sync chats then
+    skip them).
+    """
+    # Give every chat a stable id up front so prerequisites can refer to queue positions
+    chat_queue = [{**chat, "chat_id": chat.get("chat_id", i)} for i, chat in enumerate(chat_queue)]
+    agent.register_nested_chats(
+        chat_queue,
+        trigger=trigger,
+        reply_func_from_nested_chats=a_parallel_summary_from_nested_chats if use_async else parallel_summary_from_nested_chats,
+        position=position,
+        use_async=use_async,
+        **kwargs,
+    )
@@ -0,0 +1,149 @@
+import asyncio
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from autogen import Agent, ConversableAgent
+
+"""
+Concurrent execution of the tool calls in one assistant message.
+
+`generate_tool_calls_reply` executes the tool calls of a message one after the other, so a
+message asking for a hotel and a flight status waits for both tools in sequence.
+`ParallelToolExecutor` registers a reply function just before autogen's tool-call replies that:
+
+- runs sync tools on a shared thread pool and async tools on the event loop, all at once,
+- applies a per-tool timeout (a timed-out call returns an error message to the model; a sync
+  tool cannot be interrupted and finishes in the background),
+- returns the tool responses in the original call order, in the same message format as
+  `generate_tool_calls_reply`.
+
+    executor = ParallelToolExecutor(timeout=10, timeouts={"get_flight_status": 3})
+    executor.add_to_agent(user_proxy)
+    ...
+    print(executor.stats())
+"""
+
+
+class ParallelToolExecutor:
+    """
+    Reply function that executes the tool calls of a message concurrently.
+
+    Args:
+        max_workers: Size of the thread pool used for sync tools.
+        timeout: Default timeout per tool call in seconds, None for no timeout.
+        timeouts: Optional {tool name: timeout} overriding `timeout`.
+    """
+
+    def __init__(self, max_workers=8, timeout=30, timeouts=None):
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.batches = []
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    def add_to_agent(self, agent: ConversableAgent):
+        """Register the parallel replies on the agent that executes the tools."""
+        builtin = (ConversableAgent.generate_tool_calls_reply, ConversableAgent.a_generate_tool_calls_reply)
+        position = next(
+            (i for i, entry in enumerate(agent._reply_func_list) if entry["reply_func"] in builtin),
+            len(agent._reply_func_list),
+        )
+        agent.register_reply([Agent, None], self.generate_reply, position=position)
+        # Registered last at the same position, so async chats reach the async variant first
+        agent.register_reply([Agent, None], self.a_generate_reply, position=position, ignore_async_in_sync_chat=True)
+        return self
+
+    async def _execute(self, agent, tool_call):
+        function_call = tool_call.get("function", {})
+        name = function_call.get("name", "")
+        timeout = self.timeouts.get(name, self.timeout)
+        func = agent._function_map.get(name)
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(func):
+                call = agent.a_execute_function(function_call)
+            else:
+                loop = asyncio.get_running_loop()
+                call = loop.run_in_executor(self._pool, agent.execute_function, function_call)
+            _, func_return = await asyncio.wait_for(call, timeout)
+            content = func_return.get("content", "")
+        except asyncio.TimeoutError:
+            content = f"Error: {name} timed out after {timeout}s"
+        duration = time.perf_counter() - start
+
+        response = {"role": "tool", "content": "" if content is None else content}
+        # Like generate_tool_calls_reply, omit tool_call_id when the API did not send one (e.g. Mistral)
+        if tool_call.get("id") is not None:
+            response = {"tool_call_id": tool_call["id"], **response}
+        return response, {"name": name, "duration_s": round(duration, 3)}
+
+    async def _execute_all(self, agent, tool_calls):
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(self._execute(agent, tool_call) for tool_call in tool_calls))
+        responses = [response for response, _ in outcomes]
+        timings = [timing for _, timing in outcomes]
+        self.batches.append(
+            {
+                "calls": timings,
+                "wall_s": round(time.perf_counter() - start, 3),
+                "sequential_s": round(sum(t["duration_s"] for t in timings), 3),
+            }
+        )
+        return True, {
+            "role": "tool",
+            "tool_responses": responses,
+            "content": "\n\n".join(agent._str_for_tool_response(response) for response in responses),
+        }
+
+    @staticmethod
+    def _tool_calls(recipient, messages, sender):
+        if messages is None:
+            messages = recipient._oai_messages[sender]
+        return messages[-1].get("tool_calls") if messages else None
+
+    def generate_reply(self, recipient, messages=None, sender=None, config=None):
+        tool_calls = self._tool_calls(recipient, messages, sender)
+        if not tool_calls:
+            return False, None
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._execute_all(recipient, tool_calls))
+
+        # Called from code already running on an event loop: use a private loop on a helper thread
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = asyncio.run(self._execute_all(recipient, tool_calls))
+            except BaseException as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=target, name="parallel-tools")
+        thread.start()
+        thread.join()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    async def a_generate_reply(self, recipient, messages=None, sender=None, config=None):
+        tool_calls = self._tool_calls(recipient, messages, sender)
+        if not tool_calls:
+            return False, None
+        return await self._execute_all(recipient, tool_calls)
+
+    def stats(self) -> dict:
+        """Wall time of the parallel batches versus the time the same calls take one after the other."""
+        wall = sum(b["wall_s"] for b in self.batches)
+        sequential = sum(b["sequential_s"] for b in self.batches)
+        return {
+            "batches": len(self.batches),
+            "tool_calls": sum(len(b["calls"]) for b in self.batches),
+            "wall_s": round(wall, 3),
+            "sequential_s": round(sequential, 3),
+            "saved_s": round(sequential - wall, 3),
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,331 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+import httpx
+from autogen import ConversableAgent
+from autogen.io.base import IOStream
+
+"""
+Process-wide request scheduler for the shared API key.
+
+All agents of a script send their requests through the shared httpx client (`common.llm_client`),
+so one scheduler in its transport sees every request. Before a request goes out it must get:
+
+- a request from the requests-per-minute bucket and its estimated tokens (prompt plus
+  `max_tokens`) from the tokens-per-minute bucket; both buckets are corrected from the
+  `x-ratelimit-remaining-*` headers the API returns,
+- a concurrency slot; the limit adapts AIMD-style: +1/limit per success, halved on a 429 or a
+  latency spike (at most once per cooldown),
+- its turn: waiting requests are served by priority class (interactive, default, batch), then
+  in arrival order.
+
+A 429 also pauses the whole scheduler until its Retry-After has passed, so the OpenAI client's
+retries do not all fire again at the same moment.
+
+    with request_priority("batch"):
+        handle_inquiry(agents, inquiry)
+
+    print(get_rate_limiter().stats())   # queue wait and model latency, per priority class
+
+Limits come from AG2_RATE_LIMIT_RPM, AG2_RATE_LIMIT_TPM and AG2_MAX_CONCURRENCY;
+AG2_RATE_LIMIT=0 disables the scheduler.
+"""
+
+PRIORITIES = {"interactive": 0, "default": 1, "batch": 2}
+DEFAULT_RPM = 3500
+DEFAULT_TPM = 160000
+DEFAULT_COMPLETION_TOKENS = 256
+
+_priority = ContextVar("request_priority", default="default")
+
+
+@contextmanager
+def request_priority(name):
+    """Send the requests made inside the block (and the tasks it starts) with priority class `name`."""
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority {name!r}, expected one of {list(PRIORITIES)}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool that runs each call in a copy of the submitter's context, so contextvars
+    such as the request priority survive `loop.run_in_executor`."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(copy_context().run, fn, *args, **kwargs)
+
+
+def run_llm_calls_on(agent, executor):
+    """
+    Make `agent`'s async LLM replies run their blocking call on `executor` (a ContextThreadPoolExecutor).
+
+    autogen's `a_generate_oai_reply` always uses the event loop's default executor, which drops
+    contextvars such as the request priority; this swaps it for an equivalent reply function that
+    passes `executor` explicitly, leaving the loop alone. Agents already switched keep their executor.
+    """
+
+    async def a_generate_oai_reply(self, messages=None, sender=None, config=None):
+        iostream = IOStream.get_default()
+
+        def generate():
+            with IOStream.set_default(iostream):
+                return self.generate_oai_reply(messages=messages, sender=sender, config=config)
+
+        return await asyncio.get_running_loop().run_in_executor(executor, generate)
+
+    agent.replace_reply_func(ConversableAgent.a_generate_oai_reply, a_generate_oai_reply)
+
+
+class TokenBucket:
+    """Refills continuously up to `capacity` at `capacity` per minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` is available (requests larger than the bucket wait for a full bucket)."""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate else 0.0
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+class RateLimiter:
+    """
+    Token buckets, adaptive concurrency and priority queueing for one API key.
+
+    Args:
+        rpm: Requests per minute.
+        tpm: Tokens per minute (prompt plus max completion tokens).
+        max_concurrency: Upper bound of the adaptive concurrency limit.
+        min_concurrency: Lower bound of the limit.
+        latency_spike: A response slower than this many times the latency EWMA (and than
+            `min_spike_s`) counts as congestion.
+        cooldown_s: Minimum time between two decreases of the limit.
+    """
+
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_concurrency=16, min_concurrency=1, latency_spike=3.0, min_spike_s=2.0, cooldown_s=2.0):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.latency_spike = latency_spike
+        self.min_spike_s = min_spike_s
+        self.cooldown_s = cooldown_s
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.latency_ewma = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._stats = {name: {"requests": 0, "queue_wait": [], "latency": []} for name in PRIORITIES}
+        self._events = {"rate_limited": 0, "latency_spikes": 0, "decreases": 0}
+
+    def acquire(self, tokens, priority=None) -> float:
+        """Wait for a slot and bucket capacity; returns the queue wait in seconds."""
+        priority = priority or current_priority()
+        ticket = (PRIORITIES[priority], next(self._sequence))
+        start = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+                    if self._waiting[0] == ticket and self.in_flight < int(self.limit):
+                        wait = max(self.paused_until - now, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                        if wait <= 0:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            self.in_flight += 1
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+            finally:
+                # Also on errors (e.g. KeyboardInterrupt), so a dead ticket never blocks the queue
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+        queue_wait = time.monotonic() - start
+        self._stats[priority]["requests"] += 1
+        self._stats[priority]["queue_wait"].append(queue_wait)
+        return queue_wait
+
+    def release(self, latency=None, status=None, headers=None, priority=None):
+        """Return the slot and adapt the limit to the outcome of the request."""
+        now = time.monotonic()
+        with self._condition:
+            self.in_flight -= 1
+            if headers is not None:
+                self._sync_buckets(headers)
+            if status == 429:
+                self._events["rate_limited"] += 1
+                self.paused_until = max(self.paused_until, now + self._retry_after(headers))
+                self._decrease(now)
+            elif latency is not None and status is not None and status < 500:
+                spike = self.latency_ewma is not None and latency > max(self.latency_spike * self.latency_ewma, self.min_spike_s)
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+                if spike:
+                    self._events["latency_spikes"] += 1
+                    self._decrease(now)
+                else:
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            if latency is not None:
+                self._stats[priority or current_priority()]["latency"].append(latency)
+            self._condition.notify_all()
+
+    def _decrease(self, now):
+        if now - self._last_decrease >= self.cooldown_s:
+            self.limit = max(self.min_concurrency, self.limit / 2)
+            self._last_decrease = now
+            self._events["decreases"] += 1
+
+    @staticmethod
+    def _retry_after(headers):
+        headers = headers or {}
+        for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            try:
+                return float(headers[name]) * scale
+            except (KeyError, TypeError, ValueError):
+                continue
+        # No hint from the server: back off for about a second, jittered so waiters spread out
+        return 1.0 + random.random()
+
+    def _sync_buckets(self, headers):
+        for bucket, name in ((self.requests, "x-ratelimit-remaining-requests"), (self.tokens, "x-ratelimit-remaining-tokens")):
+            try:
+                bucket.level = min(bucket.level, float(headers[name]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def stats(self) -> dict:
+        """Queue wait and model latency per priority class, kept apart, plus the limiter state."""
+        classes = {}
+        for name, s in self._stats.items():
+            if not s["requests"]:
+                continue
+            classes[name] = {
+                "requests": s["requests"],
+                "queue_wait_avg_s": round(sum(s["queue_wait"]) / len(s["queue_wait"]), 3),
+                "queue_wait_p95_s": round(_percentile(s["queue_wait"], 95), 3),
+                "latency_avg_s": round(sum(s["latency"]) / len(s["latency"]), 3) if s["latency"] else None,
+                "latency_p95_s": round(_percentile(s["latency"], 95), 3) if s["latency"] else None,
+            }
+        return {
+            "classes": classes,
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            **self._events,
+        }
+
+
+def estimate_tokens(request: httpx.Request) -> int:
+    """Prompt tokens (about 4 characters each) plus the completion budget of a chat request."""
+    try:
+        body = json.loads(request.content or b"{}")
+    except (ValueError, httpx.RequestNotRead):
+        return DEFAULT_COMPLETION_TOKENS
+    if not isinstance(body, dict):
+        return DEFAULT_COMPLETION_TOKENS
+    prompt = len(json.dumps(body.get("messages", body.get("input", "")))) // 4
+    completion = body.get("max_completion_tokens") or body.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return prompt + completion
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that hands the slot back once it is closed (streamed responses hold it until then)."""
+
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close()
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """httpx transport that schedules every request through a RateLimiter."""
+
+    def __init__(self, wrapped: httpx.BaseTransport, limiter: RateLimiter):
+        self.wrapped = wrapped
+        self.limiter = limiter
+
+    def handle_request(self, request):
+        priority = current_priority()
+        self.limiter.acquire(estimate_tokens(request), priority)
+        start = time.monotonic()
+        try:
+            response = self.wrapped.handle_request(request)
+        except BaseException:
+            self.limiter.release(priority=priority)
+            raise
+        latency = time.monotonic() - start
+        response.stream = _ReleasingStream(
+            response.stream,
+            lambda: self.limiter.release(latency, response.status_code, response.headers, priority),
+        )
+        return response
+
+    def close(self):
+        self.wrapped.close()
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Process-wide limiter configured from the environment, None when AG2_RATE_LIMIT=0."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None and os.getenv("AG2_RATE_LIMIT", "1") != "0":
+            _limiter = RateLimiter(
+                rpm=int(os.getenv("AG2_RATE_LIMIT_RPM", str(DEFAULT_RPM))),
+                tpm=int(os.getenv("AG2_RATE_LIMIT_TPM", str(DEFAULT_TPM))),
+                max_concurrency=int(os.getenv("AG2_MAX_CONCURRENCY", "16")),
+            )
+        return _limiter
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import threading
+
+import diskcache
+
+"""
+Disk-backed, deterministic LLM response cache.
+
+OpenAIWrapper looks for a `cache` object in the llm_config and calls `get(key)` / `set(key, value)`
+on it around every completion, where `key` is the JSON dump of the request parameters.
+`ResponseCache` plugs into that hook and:
+
+- re-keys requests on model, normalized messages, tools and sampling parameters, so whitespace
+  differences or bookkeeping fields do not cause misses,
+- stores responses in a diskcache directory with LRU eviction, a size cap and a TTL,
+- keeps hit/miss counters per agent.
+
+ConversableAgent deep-copies its llm_config, so every agent built from a config containing a
+`ResponseCache` receives its own `AgentCacheView`: a thin view over the shared store that owns
+that agent's counters. Use `cache_stats(agents)` to read them back by agent name.
+"""
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "llm_responses")
+DEFAULT_SIZE_LIMIT = 256 * 1024 * 1024  # 256 MB
+DEFAULT_TTL = 7 * 24 * 3600  # one week
+
+# Request parameters that change the model output and therefore belong in the key
+SAMPLING_KEYS = (
+    "temperature",
+    "top_p",
+    "max_tokens",
+    "presence_penalty",
+    "frequency_penalty",
+    "stop",
+    "seed",
+    "n",
+    "response_format",
+    "tool_choice",
+    "logit_bias",
+)
+MESSAGE_KEYS = ("role", "content", "name", "tool_calls", "tool_call_id", "function_call")
+
+
+def _normalize_content(content):
+    if isinstance(content, str):
+        return "\n".join(line.rstrip() for line in content.strip().splitlines())
+    if isinstance(content, list):
+        return [_normalize_content(part) for part in content]
+    if isinstance(content, dict):
+        return {k: _normalize_content(v) for k, v in content.items()}
+    return content
+
+
+def _normalize_message(message):
+    if not isinstance(message, dict):
+        return message
+    normalized = {k: message[k] for k in MESSAGE_KEYS if message.get(k) is not None}
+    if "content" in normalized:
+        normalized["content"] = _normalize_content(normalized["content"])
+    return normalized
+
+
+def normalize_request(params: dict) -> dict:
+    """Reduce a create() request to the fields that determine the response."""
+    request = {
+        "model": params.get("model"),
+        "messages": [_normalize_message(m) for m in params.get("messages", [])],
+        "tools": params.get("tools") or params.get("functions") or [],
+    }
+    for key in SAMPLING_KEYS:
+        if params.get(key) is not None:
+            request[key] = params[key]
+    return request
+
+
+def make_key(raw_key: str) -> str:
+    """Turn the key OpenAIWrapper computes into a stable content hash."""
+    try:
+        request = normalize_request(json.loads(raw_key))
+        canonical = json.dumps(request, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        canonical = raw_key
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent response store shared by every agent of a process.
+
+    Args:
+        directory: Cache directory on disk.
+        size_limit: Maximum size of the store in bytes; least recently used entries are evicted first.
+        ttl: Seconds an entry stays valid, None to keep entries until evicted.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, size_limit=DEFAULT_SIZE_LIMIT, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.size_limit = size_limit
+        self.ttl = ttl
+        self._store = diskcache.Cache(directory, size_limit=size_limit, eviction_policy="least-recently-used")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def view(self) -> "AgentCacheView":
+        """Return a view with its own hit/miss counters."""
+        return AgentCacheView(self)
+
+    def lookup(self, key, default=None):
+        value = self._store.get(make_key(key), default)
+        with self._lock:
+            if value is default:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def store(self, key, value):
+        self._store.set(make_key(key), value, expire=self.ttl)
+
+    def clear(self):
+        self._store.clear()
+
+    def close(self):
+        self._store.close()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._store),
+            "size_bytes": self._store.volume(),
+        }
+
+    # AbstractCache protocol, used when the store itself ends up in an llm_config
+    def get(self, key, default=None):
+        return self.lookup(key, default)
+
+    def set(self, key, value):
+        self.store(key, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # OpenAIWrapper enters and exits the cache around every request, so keep the store open
+        return None
+
+    def __deepcopy__(self, memo):
+        return self.view()
+
+
+class AgentCacheView:
+    """Per-agent handle on a ResponseCache, implementing autogen's AbstractCache protocol."""
+
+    def __init__(self, cache: ResponseCache):
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        value = self.cache.lookup(key, default)
+        if value is default:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.cache.store(key, value)
+
+    def close(self):
+        return None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+    def __deepcopy__(self, memo):
+        return self.cache.view()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide cache, configured from AG2_CACHE_DIR / AG2_CACHE_SIZE_LIMIT / AG2_CACHE_TTL."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            ttl = os.getenv("AG2_CACHE_TTL")
+            _default_cache = ResponseCache(
+                directory=os.getenv("AG2_CACHE_DIR", DEFAULT_CACHE_DIR),
+                size_limit=int(os.getenv("AG2_CACHE_SIZE_LIMIT", DEFAULT_SIZE_LIMIT)),
+                ttl=float(ttl) if ttl else DEFAULT_TTL,
+            )
+        return _default_cache
+
+
+def cache_stats(agents) -> dict:
+    """Collect hit/miss counters keyed by agent name."""
+    stats = {}
+    for agent in agents:
+        llm_config = getattr(agent, "llm_config", None)
+        cache = llm_config.get("cache") if isinstance(llm_config, dict) else None
+        if isinstance(cache, (AgentCacheView, ResponseCache)):
+            stats[agent.name] = cache.stats()
+    return stats
@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common.mock_openai_server import MockOpenAIServer
+
+"""
+Run the example scenarios against the local mock OpenAI endpoint.
+
+Every scenario script is started in its own interpreter with OPENAI_BASE_URL pointing at a
+`MockOpenAIServer`, a dummy API key and throw-away cache, conversation-store and telemetry
+locations, so runs are reproducible, free and need no network. Scripts run from a scratch working directory, so
+autogen's cwd-relative `.cache/<cache_seed>` and the code executors' work dirs start empty. Scripts that ask for human input get "exit" on stdin.
+
+Scripts are started through `run_script_offline`, which lets autogen estimate the prompt tokens
+of streamed replies when tiktoken cannot download its encoding (there is no network here); that
+workaround only exists in these subprocesses, never in the scripts' own runs.
+
+For every scenario the runner reports wall time, the number of LLM requests served, the latency
+the mock injected, and the remainder: the time spent in the scripts themselves (interpreter
+start-up, imports, agent construction, message routing, nested chats, speaker selection).
+
+    python -m common.scenario_runner                       # all scenarios
+    python -m common.scenario_runner group_chat_simple --latency 0.2 --json report.json
+"""
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HUMAN_EXIT = "exit\n" * 20
+
+# name -> (script path relative to the repository root, stdin)
+SCENARIOS = {
+    "initiate_chat": ("conversation/src/initiate_chat.py", HUMAN_EXIT),
+    "sequential_chat": ("conversation/src/sequential_chat.py", ""),
+    "nested_chat": ("conversation/src/nested_chat.py", ""),
+    "group_chat_simple": ("conversation/src/group_chat_simple.py", ""),
+    "group_chat_sequential": ("conversation/src/group_chat_sequential.py", ""),
+    "simple_agent": ("simple/src/simple_agent.py", ""),
+    "assist_proxy_agent": ("simple/src/assist_proxy_agent.py", ""),
+    "simple_code_executor": ("simple/src/simple_code_executor.py", HUMAN_EXIT),
+    "always_mode": ("human/src/always_mode.py", HUMAN_EXIT),
+    "never_mode": ("human/src/never_mode.py", ""),
+    "terminate_mode": ("human/src/terminate_mode.py", HUMAN_EXIT),
+    "simple_tool": ("tools/src/simple_tool.py", ""),
+    "travel_tools": ("tools/src/travel_tools.py", ""),
+    "travel_planner_tools": ("tools/src/travel_planner_tools.py", HUMAN_EXIT),
+    "customer_support": ("usecase/src/customer_support.py", ""),
+    "financial_report": ("usecase/src/financial_report.py", ""),
+    "research_automation": ("usecase/src/research_automation.py", ""),
+}
+
+# Replies that drive the scripted scenarios to completion
+SCENARIO_SCRIPT = {
+    "rules": [
+        {"match": r"Add 3 and 2", "tool_calls": [{"name": "add_numbers", "arguments": {"a": 3, "b": 2}}]},
+        {
+            "match": r"traveling to New York",
+            "tool_calls": [
+                {"name": "get_hotel_info", "arguments": {"location": "New York"}},
+                {"name": "get_flight_status", "arguments": {"flight_number": "AA123"}},
+            ],
+        },
+        {"match": r"trip to Paris\. What should I do", "tool_calls": [{"name": "suggest_activity", "arguments": {"location": "Paris"}}]},
+        {"system": r"trying to guess an animal", "reply": "Is it an elephant?"},
+        # The first replies of the nested chat scenarios must not terminate, or the nested chats never run
+        {"system": r"professional writer", "reply": "The new Meta VR headset pairs a crisp display with comfortable ergonomics."},
+        {"system": r"handle customer inquiries and classify them", "reply": "Classified as a connectivity issue; routing it to the specialists."},
+        {"system": r"thinking of an elephant", "reply": "Yes, it is an elephant!"},
+    ],
+}
+
+
+def install_offline_token_count():
+    """
+    Let autogen count the prompt tokens of streamed completions without network access.
+
+    Streamed responses carry no usage, so autogen counts the prompt with tiktoken, which downloads
+    its encoding on first use. Offline that download fails and the chat with it; once it has
+    failed, prompt tokens are estimated from the message length instead.
+    """
+    import autogen.oai.client as oai_client
+
+    count_token = oai_client.count_token
+    offline = threading.Event()
+
+    def count_token_offline_safe(input, model="gpt-3.5-turbo-0613"):
+        if not offline.is_set():
+            try:
+                return count_token(input, model)
+            except OSError:
+                # requests' connection errors are OSErrors
+                offline.set()
+        text = input if isinstance(input, str) else json.dumps(input, default=str)
+        return len(text) // 4
+
+    oai_client.count_token = count_token_offline_safe
+
+
+def run_script_offline(path):
+    """Run a scenario script as `__main__`, like `python <path>`, with the offline token count installed."""
+    install_offline_token_count()
+    sys.argv = [path]
+    sys.path[0] = os.path.dirname(path)
+    runpy.run_path(path, run_name="__main__")
+
+
+def run_scenario(name, server, timeout=300, env=None, cwd=None):
+    """Run one scenario script as a subprocess and return its timing record."""
+    script, stdin = SCENARIOS[name]
+    before = server.stats()
+    start = time.perf_counter()
+    try:
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; from common.scenario_runner import run_script_offline; run_script_offline(sys.argv[1])",
+                os.path.join(REPO_ROOT, script),
+            ],
+            cwd=cwd or REPO_ROOT,
+            input=stdin,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            env=env,
+        )
+        exit_code, output = completed.returncode, completed.stdout + completed.stderr
+    except subprocess.TimeoutExpired as e:
+        exit_code, output = None, f"Timed out after {timeout}s\n{e.stdout or ''}"
+    wall = time.perf_counter() - start
+    after = server.stats()
+    injected = after["injected_latency_s"] - before["injected_latency_s"]
+    return {
+        "scenario": name,
+        "exit_code": exit_code,
+        "wall_s": round(wall, 3),
+        "llm_requests": after["requests"] - before["requests"],
+        "mock_errors": after["errors"] - before["errors"],
+        "injected_latency_s": round(injected, 3),
+        "overhead_s": round(wall - injected, 3),
+        "output_tail": output[-2000:] if exit_code != 0 else "",
+    }
+
+
+def run_all(names=None, script=None, timeout=300):
+    """Start a mock server, run the scenarios one after the other and return their records."""
+    names = names or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenarios {unknown}; choose from {sorted(SCENARIOS)}")
+
+    records = []
+    with MockOpenAIServer({**SCENARIO_SCRIPT, **(script or {})}) as server, tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": "sk-mock-0000000000000000000000000000000000000000",
+            "OPENAI_BASE_URL": server.base_url,
+            # Everything the scripts persist goes to the scratch directory, so runs never see each other's state
+            "AG2_CACHE_DIR": os.path.join(tmp, "llm_responses"),
+            "AG2_CONVERSATION_DB": os.path.join(tmp, "conversations.sqlite3"),
+            "AG2_TELEMETRY_DIR": os.path.join(tmp, "telemetry"),
+            "AG2_AGGREGATES_CACHE_DIR": os.path.join(tmp, "financial_aggregates"),
+            "AG2_ARTICLE_CACHE_DIR": os.path.join(tmp, "article_chunks"),
+            # For the bootstrap in run_scenario; the scripts add the repository root themselves
+            "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])),
+            "MPLBACKEND": "Agg",
+            "PYTHONIOENCODING": "utf-8",
+        }
+        for name in names:
+            workdir = os.path.join(tmp, name)
+            os.makedirs(workdir)
+            record = run_scenario(name, server, timeout=timeout, env=env, cwd=workdir)
+            status = "ok" if record["exit_code"] == 0 else f"FAILED ({record['exit_code']})"
+            print(
+                f"{name:<24} {status:<12} wall {record['wall_s']:>7.2f}s  requests {record['llm_requests']:>4}  "
+                f"overhead {record['overhead_s']:>7.2f}s",
+                file=sys.stderr,
+            )
+            records.append(record)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the example scenarios against a local mock OpenAI endpoint.")
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency injected per LLM request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM requests failing with HTTP 429")
+    parser.add_argument("--timeout", type=int, default=300, help="Per-scenario timeout in seconds")
+    parser.add_argument("--json", help="Write the records to this file")
+    args = parser.parse_args(argv)
+
+    records = run_all(args.scenarios, {"latency": args.latency, "error_rate": args.error_rate}, timeout=args.timeout)
+    for record in records:
+        if record["output_tail"]:
+            print(f"\n--- {record['scenario']} output ---\n{record['output_tail']}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(records, file, indent=2)
+    return 0 if all(r["exit_code"] == 0 for r in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
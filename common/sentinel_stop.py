@@ -0,0 +1,223 @@
+import json
+import os
+import threading
+import time
+
+"""
+Stop streamed completions as soon as the termination sentinel appears.
+
+The tools scripts tell the assistant to "Return 'TERMINATE' when the task is done", but their
+`is_termination_msg` only sees the sentinel once the whole completion has been generated. With
+streaming enabled (`build_llm_config(stream=True)`), `SentinelStopper` watches the chunks of
+every streamed completion of the attached agents and, once the sentinel has arrived:
+
+- closes the HTTP stream, so the model stops generating and the connection is released,
+- hands autogen a final `finish_reason="stop"` chunk, so the message is assembled from what
+  arrived (including the sentinel) and the chat ends as usual.
+
+Completions that call tools are never cut short.
+
+How much a stop saved cannot be observed, since the remaining tokens are never generated.
+Run once with AG2_SENTINEL_CALIBRATE=1 (or `calibrate=True`): the stream is then read to the end
+and the tokens and seconds that follow the sentinel are recorded per model in
+`.cache/sentinel_calibration.json`; later runs estimate their savings from those averages.
+
+    stopper = SentinelStopper("TERMINATE").attach(assistant)
+    user_proxy.initiate_chat(assistant, message="Add 3 and 2")
+    print(stopper.format_report())
+"""
+
+CALIBRATION_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "sentinel_calibration.json")
+
+
+def _load_calibration(path):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+class SentinelStopper:
+    """
+    Ends streamed completions of the attached agents at the termination sentinel.
+
+    Args:
+        sentinel: Text that marks the end of the task.
+        calibrate: Read streams to the end and record what follows the sentinel instead of
+            stopping; default from AG2_SENTINEL_CALIBRATE.
+        calibration_path: JSON file with the per-model calibration averages.
+    """
+
+    def __init__(self, sentinel="TERMINATE", calibrate=None, calibration_path=CALIBRATION_PATH):
+        self.sentinel = sentinel
+        self.calibrate = os.getenv("AG2_SENTINEL_CALIBRATE", "0") == "1" if calibrate is None else calibrate
+        self.calibration_path = calibration_path
+        self.calibration = _load_calibration(calibration_path)
+        self.turns = []
+        self._lock = threading.Lock()
+
+    def attach(self, *agents):
+        """Watch the streamed completions of `agents`."""
+        for agent in agents:
+            # autogen rebuilds an agent's client when tools are registered, so (re)wrap before every reply
+            agent.register_hook("process_all_messages_before_reply", self._wrapper_installer(agent))
+            self._install(agent)
+        return self
+
+    def _wrapper_installer(self, agent):
+        def install(messages):
+            self._install(agent)
+            return messages
+
+        return install
+
+    def _install(self, agent):
+        wrapper = getattr(agent, "client", None)
+        for client in getattr(wrapper, "_clients", []):
+            oai_client = getattr(client, "_oai_client", None)
+            if oai_client is None:
+                continue
+            completions = oai_client.chat.completions
+            # Other wrappers (e.g. StreamMonitor) may sit on top of ours
+            create = completions.create
+            while create is not None and getattr(create, "_sentinel_stopper", None) is not self:
+                create = getattr(create, "__wrapped__", None)
+            if create is None:
+                completions.create = self._wrap_create(agent.name, completions.create)
+
+    def _wrap_create(self, agent_name, create):
+        def create_watched(*args, **kwargs):
+            response = create(*args, **kwargs)
+            if not kwargs.get("stream"):
+                return response
+            return self._watch(agent_name, kwargs.get("model"), response)
+
+        create_watched._sentinel_stopper = self
+        create_watched.__wrapped__ = create
+        return create_watched
+
+    def _watch(self, agent_name, model, stream):
+        """Pass chunks through until every choice has produced the sentinel."""
+        start = time.perf_counter()
+        texts, tool_calls = {}, False
+        tokens = trailing_tokens = 0
+        sentinel_at = None
+        stopped = False
+        last = None
+        try:
+            for chunk in stream:
+                last = chunk
+                for choice in chunk.choices:
+                    delta = choice.delta
+                    if delta.tool_calls or getattr(delta, "function_call", None):
+                        tool_calls = True
+                    if delta.content:
+                        texts[choice.index] = texts.get(choice.index, "") + delta.content
+                        tokens += 1
+                        if sentinel_at is not None:
+                            trailing_tokens += 1
+                yield chunk
+                if sentinel_at is None and texts and not tool_calls and all(self.sentinel in t for t in texts.values()):
+                    sentinel_at = time.perf_counter()
+                    if not self.calibrate:
+                        stopped = True
+                        break
+            if stopped:
+                # autogen takes the finish reason from the last chunk it sees
+                yield self._final_chunk(last, texts)
+        finally:
+            stream.close()
+            end = time.perf_counter()
+            self._record(
+                {
+                    "agent": agent_name,
+                    "model": model,
+                    "sentinel": sentinel_at is not None,
+                    "stopped": stopped,
+                    "tokens": tokens,
+                    "duration_s": round(end - start, 3),
+                    # Only measured when the stream is read past the sentinel (calibration)
+                    "trailing_tokens": trailing_tokens if sentinel_at is not None and not stopped else None,
+                    "trailing_s": round(end - sentinel_at, 3) if sentinel_at is not None and not stopped else None,
+                }
+            )
+
+    @staticmethod
+    def _final_chunk(last, texts):
+        from openai.types.chat.chat_completion_chunk import Choice, ChoiceDelta
+
+        return last.model_copy(
+            update={"choices": [Choice(index=index, delta=ChoiceDelta(), finish_reason="stop") for index in sorted(texts)]}
+        )
+
+    def _record(self, turn):
+        with self._lock:
+            self.turns.append(turn)
+            if self.calibrate and turn["trailing_tokens"] is not None:
+                entry = self.calibration.setdefault(turn["model"] or "default", {"turns": 0, "trailing_tokens": 0, "trailing_s": 0.0})
+                entry["turns"] += 1
+                entry["trailing_tokens"] += turn["trailing_tokens"]
+                entry["trailing_s"] = round(entry["trailing_s"] + turn["trailing_s"], 3)
+                self._save_calibration()
+
+    def _save_calibration(self):
+        os.makedirs(os.path.dirname(self.calibration_path), exist_ok=True)
+        with open(self.calibration_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(self.calibration, file, indent=2)
+        os.replace(self.calibration_path + ".tmp", self.calibration_path)
+
+    def _estimate(self, model):
+        """Average tokens and seconds that follow the sentinel for `model`, None when never calibrated."""
+        entry = self.calibration.get(model or "default")
+        if not entry or not entry["turns"]:
+            return None
+        return entry["trailing_tokens"] / entry["turns"], entry["trailing_s"] / entry["turns"]
+
+    def report(self) -> dict:
+        """Stops and (estimated) tokens and latency saved, per agent and in total."""
+        agents = {}
+        for turn in self.turns:
+            stats = agents.setdefault(
+                turn["agent"], {"turns": 0, "early_stops": 0, "tokens_streamed": 0, "tokens_saved": 0.0, "latency_saved_s": 0.0}
+            )
+            stats["turns"] += 1
+            stats["tokens_streamed"] += turn["tokens"]
+            if not turn["stopped"]:
+                continue
+            stats["early_stops"] += 1
+            estimate = self._estimate(turn["model"])
+            if estimate is None or stats["tokens_saved"] is None:
+                # A stop without calibration makes the agent's savings unknown
+                stats["tokens_saved"] = stats["latency_saved_s"] = None
+            else:
+                stats["tokens_saved"] = round(stats["tokens_saved"] + estimate[0], 1)
+                stats["latency_saved_s"] = round(stats["latency_saved_s"] + estimate[1], 3)
+        known = all(s["tokens_saved"] is not None for s in agents.values())
+        return {
+            "mode": "calibrate" if self.calibrate else "stop",
+            "turns": len(self.turns),
+            "early_stops": sum(s["early_stops"] for s in agents.values()),
+            "tokens_saved": round(sum(s["tokens_saved"] for s in agents.values()), 1) if known else None,
+            "latency_saved_s": round(sum(s["latency_saved_s"] for s in agents.values()), 3) if known else None,
+            "agents": agents,
+        }
+
+    def format_report(self) -> str:
+        report = self.report()
+        if report["mode"] == "calibrate":
+            measured = [t for t in self.turns if t["trailing_tokens"] is not None]
+            return (
+                f"Sentinel calibration: {len(measured)} turns measured, "
+                f"{sum(t['trailing_tokens'] for t in measured)} tokens and "
+                f"{sum(t['trailing_s'] for t in measured):.2f}s after '{self.sentinel}'"
+            )
+        if report["tokens_saved"] is None:
+            return (
+                f"Sentinel stop: {report['early_stops']}/{report['turns']} streamed turns stopped at '{self.sentinel}' "
+                "(savings unknown, run once with AG2_SENTINEL_CALIBRATE=1)"
+            )
+        return (
+            f"Sentinel stop: {report['early_stops']}/{report['turns']} streamed turns stopped at '{self.sentinel}', "
+            f"about {report['tokens_saved']:.0f} tokens and {report['latency_saved_s']:.2f}s saved"
+        )
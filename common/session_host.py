@@ -0,0 +1,182 @@
+import asyncio
+import copy
+import threading
+import time
+from collections import defaultdict
+
+from common.rate_limiter import ContextThreadPoolExecutor, run_llm_calls_on
+
+"""
+Long-running host for many concurrent conversations over registered agent rosters.
+
+Building a roster of ConversableAgents is not free: every agent deep-copies its llm_config,
+validates it, builds an OpenAIWrapper with its model clients and registers its reply functions.
+The scripts pay that per run, and per ticket in the batch driver. `SessionHost` keeps a
+registry of roster templates instead:
+
+- a template's agents are built once, on registration, and never chat themselves,
+- every session gets clones: shallow copies of the template agents that share the immutable
+  parts (llm_config, model clients, termination functions, registered tools) and get fresh
+  copies of the per-conversation state (message history, counters, reply function and hook
+  lists), plus an OpenAIWrapper copy with its own usage summary so costs are per session,
+- an optional `wire(agents)` callback connects the clones of a session (nested chats, group
+  chats), so those links never point into another session,
+- sessions run concurrently as asyncio tasks (`a_initiate_chat`), bounded by `concurrency`.
+
+The host times template builds and clones, so `stats()` shows the setup cost per session
+amortized over all sessions next to the cost of building the roster from scratch.
+
+    host = SessionHost()
+    host.register("support", create_support_agents, wire=lambda agents: register_support_nested_chats(agents, use_async=True))
+    results = await host.run_sessions("support", [
+        lambda agents: agents["user_proxy"].a_initiate_chat(agents["inquiry"], message=inquiry, max_turns=2)
+        for inquiry in inquiries
+    ], concurrency=8)
+    print(host.stats())
+
+Agents holding per-session resources outside these containers (e.g. a `code_executor` with a
+live kernel) must get their own instances in `wire`.
+"""
+
+# Attributes every clone shares with its template instead of copying
+SHARED_ATTRIBUTES = {"llm_config", "client", "client_cache"}
+
+
+def clone_client(client):
+    """OpenAIWrapper sharing the template's model clients, with its own usage summary."""
+    if client is None:
+        return None
+    clone = copy.copy(client)
+    clone._clients = list(client._clients)
+    clone.wrapper_id = id(clone)
+    clone.total_usage_summary = None
+    clone.actual_usage_summary = None
+    return clone
+
+
+def clone_agent(agent):
+    """Per-session copy of a template agent (see the module docstring for what is shared)."""
+    clone = copy.copy(agent)
+    for name, value in vars(agent).items():
+        if name in SHARED_ATTRIBUTES:
+            continue
+        if name == "hook_lists":
+            setattr(clone, name, {hook: list(functions) for hook, functions in value.items()})
+        elif isinstance(value, (list, dict, set)):
+            # defaultdicts keep their default factory
+            setattr(clone, name, copy.copy(value))
+    clone._oai_messages = defaultdict(list)
+    clone._reply_func_list = [dict(entry) for entry in agent._reply_func_list]
+    if hasattr(agent, "_max_consecutive_auto_reply_dict"):
+        # The default factory is a bound method: point it at the clone
+        clone._max_consecutive_auto_reply_dict = defaultdict(clone.max_consecutive_auto_reply)
+    clone.client = clone_client(getattr(agent, "client", None))
+    return clone
+
+
+class RosterTemplate:
+    """Agents built once by `build()`, plus the per-session wiring."""
+
+    def __init__(self, name, build, wire=None):
+        self.name = name
+        self.wire = wire
+        start = time.perf_counter()
+        agents = build()
+        self.build_s = time.perf_counter() - start
+        self.agents = agents if isinstance(agents, dict) else {agent.name: agent for agent in agents}
+
+    def instantiate(self) -> dict:
+        agents = {key: clone_agent(agent) for key, agent in self.agents.items()}
+        if self.wire is not None:
+            self.wire(agents)
+        return agents
+
+
+class SessionHost:
+    """
+    Registry of roster templates that runs sessions on per-session clones.
+
+    Args:
+        concurrency: Default number of sessions running at once in `run_sessions`.
+        executor_threads: Size of the host's executor, which runs the blocking LLM calls of the
+            roster agents in async chats (instead of the event loop's default executor).
+    """
+
+    def __init__(self, concurrency=8, executor_threads=64):
+        self.concurrency = concurrency
+        self.executor_threads = executor_threads
+        self.executor = ContextThreadPoolExecutor(max_workers=executor_threads, thread_name_prefix="session")
+        self.templates = {}
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"sessions": 0, "errors": 0, "setup_s": 0.0, "session_s": 0.0, "cost": 0.0})
+
+    def register(self, name, build, wire=None) -> RosterTemplate:
+        """Build the roster once. `build()` returns a dict (or list) of agents; `wire(agents)` runs per session."""
+        template = RosterTemplate(name, build, wire)
+        # Clones copy the reply functions, so every session's agents use the host's executor
+        for agent in template.agents.values():
+            run_llm_calls_on(agent, self.executor)
+        with self._lock:
+            self.templates[name] = template
+        return template
+
+    def session_agents(self, name) -> dict:
+        """Fresh per-session clones of the roster `name`."""
+        start = time.perf_counter()
+        agents = self.templates[name].instantiate()
+        setup = time.perf_counter() - start
+        with self._lock:
+            self._stats[name]["setup_s"] += setup
+        return agents
+
+    async def run_session(self, name, conversation):
+        """Run `await conversation(agents)` on fresh clones of roster `name` and return its result."""
+        agents = self.session_agents(name)
+        start = time.perf_counter()
+        try:
+            return await conversation(agents)
+        except Exception:
+            with self._lock:
+                self._stats[name]["errors"] += 1
+            raise
+        finally:
+            cost = sum(
+                (agent.client.total_usage_summary or {}).get("total_cost", 0.0)
+                for agent in agents.values()
+                if getattr(agent, "client", None) is not None
+            )
+            with self._lock:
+                stats = self._stats[name]
+                stats["sessions"] += 1
+                stats["session_s"] += time.perf_counter() - start
+                stats["cost"] += cost
+
+    async def run_sessions(self, name, conversations, concurrency=None) -> list:
+        """Run many sessions of roster `name`, at most `concurrency` at once; results (or exceptions) in order."""
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def bounded(conversation):
+            async with semaphore:
+                return await self.run_session(name, conversation)
+
+        return await asyncio.gather(*(bounded(c) for c in conversations), return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Per roster: one-time build cost, per-session setup (clone and wire) and its amortized total."""
+        report = {}
+        with self._lock:
+            for name, template in self.templates.items():
+                stats = self._stats[name]
+                sessions = stats["sessions"]
+                report[name] = {
+                    "agents": len(template.agents),
+                    "template_build_s": round(template.build_s, 4),
+                    "sessions": sessions,
+                    "errors": stats["errors"],
+                    "setup_per_session_s": round(stats["setup_s"] / sessions, 5) if sessions else None,
+                    # What a session costs in setup once the template build is spread over all sessions
+                    "amortized_setup_per_session_s": round((template.build_s + stats["setup_s"]) / sessions, 5) if sessions else None,
+                    "avg_session_s": round(stats["session_s"] / sessions, 3) if sessions else None,
+                    "cost": round(stats["cost"], 6),
+                }
+        return report
@@ -0,0 +1,187 @@
+import math
+import re
+from collections import Counter
+
+"""
+Local speaker selection for group chats.
+
+With `speaker_selection_method="auto"` the GroupChatManager spends one LLM call per round just to
+pick the next speaker. `HeuristicSpeakerSelector` is a callable `speaker_selection_method` that
+does the obvious rounds locally:
+
+- every agent is indexed by its name, description and system message (plus optional keywords)
+  in a small TF-IDF index,
+- the last message is scored against that index, agents named in the message get a boost, and
+  specialists that have not spoken yet are preferred,
+- when the message matches nobody at all, the next specialist that has not spoken yet is chosen,
+- otherwise, when the best score is too low or too close to the runner-up it returns "auto", so autogen
+  falls back to the regular LLM selector for that round.
+
+    selector = HeuristicSpeakerSelector(keywords={"Weather_Agent": "temperature rain forecast"})
+    group_chat = GroupChat(agents=agents, messages=[], speaker_selection_method=selector)
+    print(selector.stats())
+"""
+
+STOP_WORDS = {
+    "a", "about", "an", "and", "any", "are", "as", "at", "be", "best", "by", "can", "do", "for", "from",
+    "given", "have", "help", "i", "in", "is", "it", "me", "my", "of", "on", "or", "please", "provide",
+    "provides", "should", "that", "the", "this", "to", "we", "what", "will", "with", "you", "your",
+}
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+
+def tokenize(text):
+    """Lower-cased word tokens without stop words, with a naive plural strip ("flights" -> "flight")."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall((text or "").lower()):
+        if token in STOP_WORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class TfidfIndex:
+    """Minimal TF-IDF index with cosine similarity over a fixed set of documents."""
+
+    def __init__(self, documents):
+        self.names = list(documents)
+        counts = {name: Counter(tokenize(text)) for name, text in documents.items()}
+        document_frequency = Counter(term for terms in counts.values() for term in terms)
+        n = len(counts)
+        self.idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        self.vectors = {name: self._normalize(self._weigh(terms)) for name, terms in counts.items()}
+
+    def _weigh(self, terms):
+        return {term: (1 + math.log(count)) * self.idf[term] for term, count in terms.items() if term in self.idf}
+
+    @staticmethod
+    def _normalize(vector):
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {term: w / norm for term, w in vector.items()} if norm else {}
+
+    def scores(self, text):
+        """Cosine similarity of `text` to every document."""
+        query = self._normalize(self._weigh(Counter(tokenize(text))))
+        return {
+            name: sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            for name, vector in self.vectors.items()
+        }
+
+
+class HeuristicSpeakerSelector:
+    """
+    Callable `speaker_selection_method` scoring agents against the last message.
+
+    Args:
+        keywords: Optional {agent name: extra text} appended to that agent's index document.
+        min_score: Minimum similarity of the best candidate to select it locally.
+        min_margin: Minimum relative lead of the best candidate over the runner-up.
+        unspoken_boost: Relative score bonus for agents that have not spoken yet.
+        mention_boost: Score added to agents whose name appears in the last message.
+        fallback: Speaker selection method autogen uses when the local choice is not confident.
+        prefer_unspoken: When no candidate matches the message, pick the first agent that has not spoken yet.
+        repeat_speaker: Let the local choice pick the last speaker again. A message matches its own
+            author best, so this is off by default; the fallback selector can still repeat a speaker.
+    """
+
+    def __init__(
+        self,
+        keywords=None,
+        min_score=0.12,
+        min_margin=0.25,
+        unspoken_boost=0.25,
+        mention_boost=0.5,
+        fallback="auto",
+        prefer_unspoken=True,
+        repeat_speaker=False,
+    ):
+        self.keywords = keywords or {}
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.unspoken_boost = unspoken_boost
+        self.mention_boost = mention_boost
+        self.fallback = fallback
+        self.prefer_unspoken = prefer_unspoken
+        self.repeat_speaker = repeat_speaker
+        self.decisions = []
+        self._index = None
+        self._indexed_agents = None
+
+    def _get_index(self, agents):
+        names = tuple(agent.name for agent in agents)
+        if self._index is None or self._indexed_agents != names:
+            documents = {
+                agent.name: " ".join(
+                    [
+                        agent.name.replace("_", " "),
+                        agent.description or "",
+                        getattr(agent, "system_message", "") or "",
+                        self.keywords.get(agent.name, ""),
+                    ]
+                )
+                for agent in agents
+            }
+            self._index = TfidfIndex(documents)
+            self._indexed_agents = names
+        return self._index
+
+    def _candidates(self, last_speaker, groupchat):
+        allow_repeat = groupchat.allow_repeat_speaker
+        if isinstance(allow_repeat, list):
+            allow_repeat = last_speaker in allow_repeat
+        if self.repeat_speaker and allow_repeat is not False:
+            return list(groupchat.agents)
+        return [agent for agent in groupchat.agents if agent is not last_speaker]
+
+    def score(self, last_speaker, groupchat):
+        """Return {agent name: score} for the agents eligible to speak next."""
+        candidates = self._candidates(last_speaker, groupchat)
+        message = (groupchat.messages[-1].get("content") or "") if groupchat.messages else ""
+        if not isinstance(message, str):
+            message = str(message)
+        similarity = self._get_index(groupchat.agents).scores(message)
+        spoken = {m.get("name") for m in groupchat.messages}
+        mentioned = message.lower()
+
+        scores = {}
+        for agent in candidates:
+            score = similarity.get(agent.name, 0.0)
+            if agent.name not in spoken:
+                score *= 1 + self.unspoken_boost
+            if agent.name.lower() in mentioned:
+                score += self.mention_boost
+            scores[agent.name] = score
+        return scores
+
+    def __call__(self, last_speaker, groupchat):
+        scores = self.score(last_speaker, groupchat)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best_name, best = ranked[0] if ranked else (None, 0.0)
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        confident = best >= self.min_score and (best - runner_up) >= self.min_margin * best
+        if not confident and best == 0.0 and self.prefer_unspoken:
+            spoken = {m.get("name") for m in groupchat.messages}
+            # sorted() is stable, so ties keep the group chat's agent order
+            best_name = next((name for name, _ in ranked if name not in spoken), None)
+            confident = best_name is not None
+
+        self.decisions.append(
+            {
+                "round": len(self.decisions) + 1,
+                "last_speaker": last_speaker.name,
+                "selected": best_name if confident else self.fallback,
+                "score": round(best, 3),
+                "runner_up": round(runner_up, 3),
+                "local": confident,
+            }
+        )
+        if not confident:
+            return self.fallback
+        return groupchat.agent_by_name(best_name)
+
+    def stats(self):
+        """Rounds decided locally versus handed to the fallback selector."""
+        local = sum(d["local"] for d in self.decisions)
+        return {"rounds": len(self.decisions), "local": local, "fallback": len(self.decisions) - local}
@@ -0,0 +1,211 @@
+import threading
+import time
+
+from autogen.io.base import IOStream
+
+"""
+Streaming output with time-to-first-token and tokens/sec per agent turn.
+
+With `"stream": True` in the llm_config (`build_llm_config(stream=True)`), autogen's OpenAI
+client prints every content chunk through the default IOStream while the completion is still
+arriving, and only then assembles the full message. `StreamMonitor` wraps the chat completion
+calls of the attached agents' OpenAI clients and times the chunks of every streamed completion:
+
+- `process_all_messages_before_reply` marks the start of an agent's turn (and wraps the agent's
+  clients, which autogen rebuilds when tools are registered),
+- the first content chunk gives the time to first token (TTFT),
+- `process_message_before_send` closes the turn and computes tokens/sec.
+
+The monitor is also an IOStream: used as a context manager it forwards all console output
+(`echo=False` silences it). The hooks return the messages unchanged, so `chat_history` is
+recorded exactly as without streaming.
+
+    llm_config = build_llm_config(stream=True)
+    monitor = StreamMonitor()
+    monitor.attach(traveler_agent, guide_agent)
+    with monitor:
+        chat_result = traveler_agent.initiate_chat(guide_agent, message="...")
+    print(monitor.report())
+"""
+
+
+class StreamMonitor:
+    """
+    Records per-turn streaming metrics of the attached agents; an IOStream forwarding the console output.
+
+    Args:
+        callback: Optional callable (agent_name, chunk) called for every streamed chunk.
+        echo: Forward the console output (including the printed chunks) to the wrapped stream.
+        report_turns: Print a TTFT / tokens-per-second line after every streamed turn.
+        stream: IOStream to forward to, defaults to the current default stream.
+    """
+
+    def __init__(self, callback=None, echo=True, report_turns=True, stream=None):
+        self.callback = callback
+        self.echo = echo
+        self.report_turns = report_turns
+        self.turns = []
+        self._stream = stream
+        self._active = {}
+        self._lock = threading.Lock()
+        self._previous_global = None
+        self._context = None
+
+    # IOStream protocol
+
+    def print(self, *objects, sep=" ", end="\n", flush=False):
+        if self.echo:
+            self._base().print(*objects, sep=sep, end=end, flush=flush)
+
+    def input(self, prompt="", *, password=False):
+        return self._base().input(prompt, password=password)
+
+    def _base(self):
+        if self._stream is None:
+            self._stream = IOStream.get_global_default()
+        return self._stream
+
+    # Turn tracking
+
+    def attach(self, *agents):
+        """Time the LLM turns of `agents`."""
+        for agent in agents:
+            agent.register_hook("process_all_messages_before_reply", self._turn_starter(agent))
+            agent.register_hook("process_message_before_send", self._turn_finisher(agent))
+            self._install(agent)
+        return self
+
+    def _install(self, agent):
+        wrapper = getattr(agent, "client", None)
+        for client in getattr(wrapper, "_clients", []):
+            oai_client = getattr(client, "_oai_client", None)
+            if oai_client is None:
+                continue
+            completions = oai_client.chat.completions
+            # Other wrappers (e.g. SentinelStopper) may sit on top of ours
+            create = completions.create
+            while create is not None and getattr(create, "_stream_monitor", None) is not self:
+                create = getattr(create, "__wrapped__", None)
+            if create is None:
+                completions.create = self._wrap_create(agent.name, completions.create)
+
+    def _wrap_create(self, agent_name, create):
+        def create_timed(*args, **kwargs):
+            response = create(*args, **kwargs)
+            if not kwargs.get("stream"):
+                return response
+            return self._time_chunks(agent_name, response)
+
+        create_timed._stream_monitor = self
+        create_timed.__wrapped__ = create
+        return create_timed
+
+    def _time_chunks(self, agent_name, stream):
+        for chunk in stream:
+            text = "".join(choice.delta.content or "" for choice in chunk.choices if choice.delta is not None)
+            if text:
+                self._on_chunk(agent_name, text)
+            yield chunk
+
+    def _turn_starter(self, agent):
+        def start_turn(messages):
+            self._install(agent)
+            with self._lock:
+                self._active[threading.get_ident()] = {
+                    "agent": agent.name,
+                    "start": time.perf_counter(),
+                    "first_chunk": None,
+                    "last_chunk": None,
+                    "chunks": 0,
+                }
+            return messages
+
+        return start_turn
+
+    def _turn_finisher(self, agent):
+        def finish_turn(sender, message, recipient, silent):
+            with self._lock:
+                turn = self._active.get(threading.get_ident())
+                if turn is None or turn["agent"] != agent.name:
+                    # Not an LLM turn (e.g. the opening message of initiate_chat)
+                    return message
+                del self._active[threading.get_ident()]
+            self._record(turn, recipient)
+            return message
+
+        return finish_turn
+
+    def _on_chunk(self, agent_name, chunk):
+        now = time.perf_counter()
+        with self._lock:
+            turn = self._active.get(threading.get_ident())
+            if turn is None or turn["agent"] != agent_name:
+                # Async chats generate replies on executor threads: use the agent's open turn
+                turn = next((t for t in self._active.values() if t["agent"] == agent_name), None)
+                if turn is None:
+                    return
+            if turn["first_chunk"] is None:
+                turn["first_chunk"] = now
+            turn["last_chunk"] = now
+            turn["chunks"] += 1
+        if self.callback is not None:
+            self.callback(turn["agent"], chunk)
+
+    def _record(self, turn, recipient):
+        end = time.perf_counter()
+        streamed = turn["first_chunk"] is not None
+        generation = (turn["last_chunk"] - turn["first_chunk"]) if streamed else 0.0
+        record = {
+            "turn": len(self.turns) + 1,
+            "agent": turn["agent"],
+            "recipient": getattr(recipient, "name", None),
+            "streamed": streamed,
+            "ttft_s": round(turn["first_chunk"] - turn["start"], 3) if streamed else None,
+            "duration_s": round(end - turn["start"], 3),
+            # The OpenAI API streams roughly one token per content chunk
+            "tokens": turn["chunks"],
+            "tokens_per_s": round(turn["chunks"] / generation, 1) if generation > 0 else None,
+        }
+        self.turns.append(record)
+        if self.report_turns and streamed and self.echo:
+            rate = f"{record['tokens_per_s']} tokens/s" if record["tokens_per_s"] else "n/a tokens/s"
+            self._base().print(
+                f"[{record['agent']}] TTFT {record['ttft_s']:.2f}s, {rate} ({record['tokens']} tokens)", flush=True
+            )
+
+    # Installation
+
+    def __enter__(self):
+        self._base()
+        self._previous_global = IOStream._global_default
+        IOStream.set_global_default(self)
+        self._context = IOStream.set_default(self)
+        self._context.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._context.__exit__(exc_type, exc_value, traceback)
+        IOStream.set_global_default(self._previous_global)
+
+    def report(self) -> dict:
+        """Per-agent averages over the streamed turns plus the raw per-turn records."""
+        agents = {}
+        for turn in self.turns:
+            if not turn["streamed"]:
+                continue
+            stats = agents.setdefault(turn["agent"], {"turns": 0, "ttft_s": [], "tokens_per_s": []})
+            stats["turns"] += 1
+            stats["ttft_s"].append(turn["ttft_s"])
+            if turn["tokens_per_s"]:
+                stats["tokens_per_s"].append(turn["tokens_per_s"])
+        summary = {
+            name: {
+                "turns": stats["turns"],
+                "avg_ttft_s": round(sum(stats["ttft_s"]) / len(stats["ttft_s"]), 3),
+                "avg_tokens_per_s": round(sum(stats["tokens_per_s"]) / len(stats["tokens_per_s"]), 1)
+                if stats["tokens_per_s"]
+                else None,
+            }
+            for name, stats in agents.items()
+        }
+        return {"agents": summary, "turns": self.turns}
@@ -0,0 +1,441 @@
+import datetime
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import autogen.runtime_logging as runtime_logging
+from autogen.logger.base_logger import BaseLogger
+
+"""
+Per-agent, per-round telemetry for LLM calls, tool calls and code execution.
+
+`Telemetry` is an autogen runtime logger (`autogen.runtime_logging.start(logger=...)`), so it sees
+every chat completion (including cache hits and failed attempts) and every registered tool call
+without changes to the agents. It records one event per operation with:
+
+- the agent and its round (the number of messages the agent had received at that point),
+- prompt/completion tokens, cost and cache status of LLM calls,
+- latency, and the HTTP retries the OpenAI client made inside the call,
+- the tool name or code exit code for tool calls and code execution.
+
+Events are appended to a JSONL file as they happen and aggregated into Prometheus metrics,
+written to a text file (node_exporter textfile format) and/or served on `/metrics`. Both files
+go to `.cache/telemetry` unless AG2_TELEMETRY_DIR points elsewhere.
+
+    telemetry = start_telemetry("financial_report", agents=[user_proxy])
+    ...
+    stop_telemetry()
+    print(telemetry.format_summary())
+
+Tool latency and code execution are only measured on the agents passed to `instrument()` (or
+`agents=`); LLM calls are recorded for every agent.
+"""
+
+TELEMETRY_DIR = os.getenv("AG2_TELEMETRY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "telemetry"))
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Start of the tool call currently running in this context, set by the instrumented function
+_tool_start = ContextVar("telemetry_tool_start", default=None)
+
+METRIC_HELP = {
+    "ag2_llm_calls_total": ("counter", "LLM calls by agent, model and cache status."),
+    "ag2_llm_tokens_total": ("counter", "LLM tokens by agent, model and type."),
+    "ag2_llm_cost_usd_total": ("counter", "LLM cost in USD by agent and model."),
+    "ag2_llm_retries_total": ("counter", "HTTP retries made inside LLM calls."),
+    "ag2_llm_errors_total": ("counter", "Failed LLM calls."),
+    "ag2_llm_latency_seconds": ("histogram", "LLM call latency."),
+    "ag2_tool_calls_total": ("counter", "Tool calls by agent, tool and status."),
+    "ag2_tool_latency_seconds": ("histogram", "Tool call latency."),
+    "ag2_code_executions_total": ("counter", "Code executions by agent and exit code."),
+    "ag2_code_execution_seconds": ("histogram", "Code execution latency."),
+}
+
+
+def _name(source):
+    return source if isinstance(source, str) else getattr(source, "name", type(source).__name__)
+
+
+def _parse_ts(value):
+    """Epoch seconds of an autogen timestamp (`get_current_ts()`, UTC without an offset)."""
+    try:
+        parsed = datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
+        return parsed.replace(tzinfo=datetime.timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _label_string(labels):
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped))
+
+
+class Telemetry(BaseLogger):
+    """
+    Runtime logger that records per-call telemetry and exports it as JSONL and Prometheus text.
+
+    Args:
+        run: Name of the run, used for the default file names and as a label.
+        jsonl_path: Event log, default `.cache/telemetry/<run>.jsonl`, rewritten on every start; False to disable.
+        prometheus_path: Metrics file, default `.cache/telemetry/<run>.prom`; False to disable.
+    """
+
+    def __init__(self, run="ag2", jsonl_path=None, prometheus_path=None):
+        self.run = run
+        self.jsonl_path = os.path.join(TELEMETRY_DIR, f"{run}.jsonl") if jsonl_path is None else jsonl_path
+        self.prometheus_path = os.path.join(TELEMETRY_DIR, f"{run}.prom") if prometheus_path is None else prometheus_path
+        self.session_id = None
+        self.events = []
+        self._lock = threading.Lock()
+        self._rounds = {}
+        self._counters = {}
+        self._histograms = {}
+        self._attempts = threading.local()
+        self._file = None
+        self._server = None
+        self._hooked_clients = []
+
+    # BaseLogger interface
+
+    def start(self) -> str:
+        self.session_id = str(uuid.uuid4())
+        if self.jsonl_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+            # One run per file: a rerun must not mix its events with the previous run's
+            self._file = open(self.jsonl_path, "w", encoding="utf-8")
+        from common.llm_client import get_http_client
+
+        self.count_retries(get_http_client())
+        return self.session_id
+
+    def log_chat_completion(self, invocation_id, client_id, wrapper_id, source, request, response, is_cached, cost, start_time):
+        started = _parse_ts(start_time)
+        attempts = getattr(self._attempts, "count", 0)
+        self._attempts.count = 0
+        usage = getattr(response, "usage", None)
+        error = response if isinstance(response, str) else None
+        self.record(
+            "llm",
+            _name(source),
+            model=getattr(response, "model", None) or request.get("model"),
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cost=cost or 0,
+            cached=bool(is_cached),
+            retries=max(0, attempts - 1),
+            latency_s=None if started is None else max(0.0, time.time() - started),
+            error=error,
+        )
+
+    def log_new_agent(self, agent, init_args):
+        pass
+
+    def log_event(self, source, name, **kwargs):
+        if name == "received_message":
+            agent = _name(source)
+            with self._lock:
+                self._rounds[agent] = self._rounds.get(agent, 0) + 1
+
+    def log_new_wrapper(self, wrapper, init_args):
+        pass
+
+    def log_new_client(self, client, wrapper, init_args):
+        pass
+
+    def log_function_use(self, source, function, args, returns):
+        start = _tool_start.get()
+        self.record(
+            "tool",
+            _name(source),
+            tool=getattr(function, "__name__", str(function)),
+            latency_s=None if start is None else time.perf_counter() - start,
+            status="ok",
+        )
+
+    def stop(self):
+        for client, hook in self._hooked_clients:
+            if hook in client.event_hooks.get("request", []):
+                client.event_hooks["request"].remove(hook)
+        self._hooked_clients = []
+        if self.prometheus_path:
+            self.write_prometheus()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+    def get_connection(self):
+        return None
+
+    # Instrumentation
+
+    def count_retries(self, http_client):
+        """Count the HTTP attempts made on `http_client`; attempts beyond the first are retries."""
+
+        def on_request(request):
+            self._attempts.count = getattr(self._attempts, "count", 0) + 1
+
+        http_client.event_hooks = {**http_client.event_hooks, "request": [*http_client.event_hooks.get("request", []), on_request]}
+        self._hooked_clients.append((http_client, on_request))
+        return self
+
+    def instrument(self, *agents):
+        """Time the tool calls and code execution of `agents`."""
+        for agent in agents:
+            for tool, func in list(getattr(agent, "_function_map", {}).items()):
+                agent._function_map[tool] = self._timed_tool(agent, tool, func)
+            self._time_code_execution(agent)
+        return self
+
+    def _timed_tool(self, agent, tool, func):
+        if getattr(func, "_telemetry", False):
+            return func
+
+        def failed(start, error):
+            self.record("tool", agent.name, tool=tool, latency_s=time.perf_counter() - start, status="error", error=repr(error))
+
+        if inspect.iscoroutinefunction(func):
+
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                token = _tool_start.set(start)
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    failed(start, e)
+                    raise
+                finally:
+                    _tool_start.reset(token)
+
+        else:
+
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                token = _tool_start.set(start)
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    failed(start, e)
+                    raise
+                finally:
+                    _tool_start.reset(token)
+
+        timed.__name__ = getattr(func, "__name__", tool)
+        timed.__doc__ = getattr(func, "__doc__", None)
+        timed._telemetry = True
+        return timed
+
+    def _time_code_execution(self, agent):
+        executor = getattr(agent, "_code_executor", None)
+        if executor is not None:
+            # Code executors configured through code_execution_config={"executor": ...}
+            run = executor.execute_code_blocks
+            if getattr(run, "_telemetry", False):
+                return
+
+            def execute_code_blocks(code_blocks):
+                start = time.perf_counter()
+                result = run(code_blocks)
+                self.record(
+                    "code", agent.name, blocks=len(code_blocks), exit_code=result.exit_code,
+                    latency_s=time.perf_counter() - start,
+                )
+                return result
+
+        elif getattr(agent, "_code_execution_config", False):
+            # Legacy code execution (work_dir / use_docker)
+            run = agent.execute_code_blocks
+            if getattr(run, "_telemetry", False):
+                return
+
+            def execute_code_blocks(code_blocks):
+                start = time.perf_counter()
+                exit_code, logs = run(code_blocks)
+                self.record(
+                    "code", agent.name, blocks=len(code_blocks), exit_code=exit_code,
+                    latency_s=time.perf_counter() - start,
+                )
+                return exit_code, logs
+
+        else:
+            return
+        execute_code_blocks._telemetry = True
+        if executor is not None:
+            executor.execute_code_blocks = execute_code_blocks
+        else:
+            agent.execute_code_blocks = execute_code_blocks
+
+    # Recording
+
+    def record(self, kind, agent, **fields):
+        """Record one event and update the metrics."""
+        with self._lock:
+            event = {"ts": time.time(), "run": self.run, "kind": kind, "agent": agent, "round": self._rounds.get(agent, 0)}
+            if fields.get("latency_s") is not None:
+                fields["latency_s"] = round(fields["latency_s"], 4)
+            event.update({k: v for k, v in fields.items() if v is not None})
+            self.events.append(event)
+            self._update_metrics(event)
+            if self._file is not None:
+                self._file.write(json.dumps(event, default=str) + "\n")
+                self._file.flush()
+        return event
+
+    def _inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def _observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.setdefault(key, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0})
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+    def _update_metrics(self, event):
+        agent, latency = event["agent"], event.get("latency_s")
+        if event["kind"] == "llm":
+            labels = {"agent": agent, "model": event.get("model") or "unknown"}
+            if event.get("error"):
+                self._inc("ag2_llm_errors_total", labels)
+            self._inc("ag2_llm_calls_total", {**labels, "cached": str(event["cached"]).lower()})
+            self._inc("ag2_llm_tokens_total", {**labels, "type": "prompt"}, event["prompt_tokens"])
+            self._inc("ag2_llm_tokens_total", {**labels, "type": "completion"}, event["completion_tokens"])
+            self._inc("ag2_llm_cost_usd_total", labels, event["cost"])
+            self._inc("ag2_llm_retries_total", labels, event["retries"])
+            if latency is not None:
+                self._observe("ag2_llm_latency_seconds", labels, latency)
+        elif event["kind"] == "tool":
+            self._inc("ag2_tool_calls_total", {"agent": agent, "tool": event["tool"], "status": event["status"]})
+            if latency is not None:
+                self._observe("ag2_tool_latency_seconds", {"agent": agent, "tool": event["tool"]}, latency)
+        elif event["kind"] == "code":
+            self._inc("ag2_code_executions_total", {"agent": agent, "exit_code": str(event["exit_code"])})
+            self._observe("ag2_code_execution_seconds", {"agent": agent}, latency)
+
+    # Export
+
+    def prometheus_text(self) -> str:
+        """Current metrics in the Prometheus text exposition format."""
+        run = ("run", self.run)
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in METRIC_HELP.items():
+                if kind == "counter":
+                    series = [(labels, v) for (n, labels), v in sorted(self._counters.items()) if n == name]
+                else:
+                    series = [(labels, h) for (n, labels), h in sorted(self._histograms.items()) if n == name]
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in series:
+                    labels = (run, *labels)
+                    if kind == "counter":
+                        lines.append(f"{name}{{{_label_string(labels)}}} {value:g}")
+                        continue
+                    for bound, count in zip(LATENCY_BUCKETS, value["buckets"]):
+                        lines.append(f'{name}_bucket{{{_label_string(labels)},le="{bound:g}"}} {count}')
+                    lines.append(f'{name}_bucket{{{_label_string(labels)},le="+Inf"}} {value["count"]}')
+                    lines.append(f"{name}_sum{{{_label_string(labels)}}} {value['sum']:g}")
+                    lines.append(f"{name}_count{{{_label_string(labels)}}} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        """Write the metrics file atomically, so a scraper never reads a partial file."""
+        path = path or self.prometheus_path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            file.write(self.prometheus_text())
+        os.replace(path + ".tmp", path)
+        return path
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """Serve the metrics on http://host:port/metrics from a background thread."""
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="telemetry-metrics", daemon=True).start()
+        return self._server.server_address
+
+    def summary(self) -> dict:
+        """Per-agent totals: calls, tokens, cost, retries and time spent in LLM, tools and code."""
+        agents = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            entry = agents.setdefault(
+                event["agent"],
+                {"llm_calls": 0, "cached": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0,
+                 "retries": 0, "llm_s": 0.0, "tool_calls": 0, "tool_s": 0.0, "code_runs": 0, "code_s": 0.0, "rounds": 0},
+            )
+            entry["rounds"] = max(entry["rounds"], event["round"])
+            latency = event.get("latency_s") or 0.0
+            if event["kind"] == "llm":
+                entry["llm_calls"] += 1
+                entry["cached"] += event["cached"]
+                entry["prompt_tokens"] += event["prompt_tokens"]
+                entry["completion_tokens"] += event["completion_tokens"]
+                entry["cost"] += event["cost"]
+                entry["retries"] += event["retries"]
+                entry["llm_s"] += latency
+            elif event["kind"] == "tool":
+                entry["tool_calls"] += 1
+                entry["tool_s"] += latency
+            elif event["kind"] == "code":
+                entry["code_runs"] += 1
+                entry["code_s"] += latency
+        return agents
+
+    def format_summary(self) -> str:
+        """Per-agent table sorted by time spent, so the agent dominating wall time comes first."""
+        rows = sorted(
+            self.summary().items(), key=lambda item: item[1]["llm_s"] + item[1]["tool_s"] + item[1]["code_s"], reverse=True
+        )
+        lines = [f"{'agent':<28} {'calls':>5} {'tokens':>7} {'cost':>9} {'llm':>7} {'tools':>7} {'code':>7} {'retries':>7}"]
+        for agent, s in rows:
+            lines.append(
+                f"{agent:<28} {s['llm_calls']:>5} {s['prompt_tokens'] + s['completion_tokens']:>7} ${s['cost']:>8.4f} "
+                f"{s['llm_s']:>6.2f}s {s['tool_s']:>6.2f}s {s['code_s']:>6.2f}s {s['retries']:>7}"
+            )
+        return "\n".join(lines)
+
+
+def start_telemetry(run="ag2", agents=(), jsonl_path=None, prometheus_path=None, port=None) -> Telemetry:
+    """Start recording telemetry for this process; call `stop_telemetry()` at the end."""
+    telemetry = Telemetry(run, jsonl_path=jsonl_path, prometheus_path=prometheus_path)
+    runtime_logging.start(logger=telemetry)
+    telemetry.instrument(*agents)
+    if port is not None:
+        telemetry.serve(port)
+    return telemetry
+
+
+def stop_telemetry():
+    """Stop autogen runtime logging, which flushes the active Telemetry's JSONL and metrics files."""
+    runtime_logging.stop()
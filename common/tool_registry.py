@@ -0,0 +1,240 @@
+import json
+import threading
+import time
+
+from autogen import OpenAIWrapper
+from autogen.function_utils import get_function_schema
+
+from common.history_compaction import text_tokens
+from common.speaker_selection import TfidfIndex
+
+"""
+Shared tool registry with precompiled schemas and per-turn pruning of the tools sent.
+
+Registering tools one by one with `register_for_llm` rebuilds the JSON schema from the
+`Annotated` signature and the agent's whole OpenAIWrapper for every tool, and every schema is
+then sent with every request. `ToolRegistry` instead:
+
+- builds each schema once and caches it per (function, name, description) for the process,
+  so registries, agents and sessions declaring the same tool share it,
+- binds all its tools to an agent in one go: the caller gets them in `llm_config["tools"]`
+  with a single client rebuild, the executor gets them with a single `register_function`,
+- optionally (`top_k`) sends only the tools relevant to the current turn, for agents with many
+  tools (at least `min_tools`, default 10; fewer are always sent in full): the tools are indexed
+  by name, description and parameters in a local TF-IDF index, the message the agent answers is
+  scored against it, and the best `top_k` matches plus every tool scoring within `cutoff` of the
+  best one (and the tools already called in this exchange and any `always` tools) go into the
+  request. When nothing matches, all tools are sent.
+
+Pruning is lexical, so a message with several intents can still miss a tool it needs; keep it
+for large tool sets where the schema tokens matter.
+
+Bind before `register_model_client`, like `register_for_llm`, since the client is rebuilt.
+`report()` counts the schema tokens sent per turn and those saved by pruning (estimated from
+the schema JSON, which is close to, but not exactly, what the API bills for tools).
+
+    registry = ToolRegistry()
+    registry.add(get_flight_status, description="Get the current status of a flight")
+    registry.add(get_hotel_info, description="Get information about hotels in a location")
+    registry.bind(assistant, executor=user_proxy)
+    user_proxy.initiate_chat(assistant, message="Is flight AA123 on time?")
+    print(registry.format_report())
+"""
+
+# Pruning only pays off, and is only safe enough, with many tools to choose from
+DEFAULT_MIN_TOOLS = 10
+# Tools scoring at least this fraction of the best match are kept, whatever their rank
+DEFAULT_CUTOFF = 0.5
+
+_SCHEMA_CACHE = {}
+_SCHEMA_LOCK = threading.Lock()
+
+
+def tool_schema(func, name, description) -> dict:
+    """JSON schema of a tool, built once per (function, name, description)."""
+    key = (func, name, description)
+    with _SCHEMA_LOCK:
+        schema = _SCHEMA_CACHE.get(key)
+    if schema is None:
+        schema = get_function_schema(func, name=name, description=description)
+        with _SCHEMA_LOCK:
+            schema = _SCHEMA_CACHE.setdefault(key, schema)
+    return schema
+
+
+def _tool_name(tool):
+    return tool.get("function", {}).get("name")
+
+
+def _index_document(schema):
+    function = schema["function"]
+    parameters = function.get("parameters", {}).get("properties", {})
+    parts = [function["name"].replace("_", " "), function.get("description", "")]
+    for parameter, spec in parameters.items():
+        parts += [parameter.replace("_", " "), spec.get("description", "")]
+    return " ".join(parts)
+
+
+class ToolRegistry:
+    """
+    Tools with precompiled schemas, bound to agents in bulk.
+
+    Args:
+        model: Model whose tokenizer estimates the schema tokens in `report()`.
+    """
+
+    def __init__(self, model="gpt-3.5-turbo"):
+        self.model = model
+        self.tools = {}
+        self.turns = []
+        self.build_s = 0.0
+        self.bind_s = 0.0
+        self._index = None
+        self._lock = threading.Lock()
+
+    def add(self, func, name=None, description=None):
+        """Add `func` as a tool; the description defaults to its docstring."""
+        name = name or func.__name__
+        description = description or (func.__doc__ or "").strip()
+        if not description:
+            raise ValueError(f"Tool '{name}' needs a description.")
+        start = time.perf_counter()
+        schema = tool_schema(func, name, description)
+        self.build_s += time.perf_counter() - start
+        self.tools[name] = {"func": func, "schema": schema, "tokens": None}
+        self._index = None
+        return func
+
+    def tool(self, name=None, description=None):
+        """Decorator form of `add`."""
+        return lambda func: self.add(func, name=name, description=description)
+
+    def schema_tokens(self, name) -> int:
+        """Estimated prompt tokens of one tool schema, counted on first use."""
+        tool = self.tools[name]
+        if tool["tokens"] is None:
+            tool["tokens"] = text_tokens(json.dumps(tool["schema"]), self.model)
+        return tool["tokens"]
+
+    def schemas(self, names=None) -> list:
+        return [self.tools[name]["schema"] for name in (names or self.tools)]
+
+    def bind(self, caller, executor=None, names=None, top_k=None, always=(), min_tools=DEFAULT_MIN_TOOLS, cutoff=DEFAULT_CUTOFF):
+        """
+        Offer the tools (all, or `names`) to `caller` and let `executor` run them.
+
+        With `top_k`, and at least `min_tools` tools bound, `caller` only sends the tools relevant
+        to each turn: the `top_k` best matches, any tool scoring within `cutoff` of the best one,
+        the `always` tools and the ones already called in the current exchange.
+        """
+        names = list(names or self.tools)
+        if top_k is not None and (len(names) < min_tools or len(names) <= top_k):
+            top_k = None
+        start = time.perf_counter()
+        if caller is not None:
+            if not caller.llm_config:
+                raise RuntimeError("LLM config must be setup before registering a function for LLM.")
+            for name in names:
+                caller._assert_valid_name(name)
+            tools = [tool for tool in caller.llm_config.get("tools", []) if _tool_name(tool) not in names]
+            caller.llm_config["tools"] = tools + self.schemas(names)
+            caller.client = OpenAIWrapper(**caller.llm_config)
+            if top_k is not None:
+                caller.register_hook(
+                    "process_all_messages_before_reply", self._pruner(caller, names, top_k, set(always), cutoff)
+                )
+        if executor is not None:
+            executor.register_function({name: executor._wrap_function(self.tools[name]["func"]) for name in names})
+        self.bind_s += time.perf_counter() - start
+        return self
+
+    def _pruner(self, agent, names, top_k, always, cutoff):
+        def prune(messages):
+            self._prune(agent, messages, names, top_k, always, cutoff)
+            return messages
+
+        return prune
+
+    def select(self, messages, names, top_k, always=(), cutoff=DEFAULT_CUTOFF) -> list:
+        """Tools of `names` to send for a reply to `messages`, in registration order."""
+        query, called = "", set()
+        # The message being answered is the last one that is neither a tool result nor a tool call
+        for message in reversed(messages):
+            if message.get("role") == "tool" or message.get("tool_responses"):
+                continue
+            if message.get("tool_calls"):
+                called.update(call.get("function", {}).get("name") for call in message["tool_calls"])
+                continue
+            query = message.get("content") or ""
+            if not isinstance(query, str):
+                query = " ".join(part.get("text", "") for part in query if isinstance(part, dict))
+            break
+        if self._index is None:
+            self._index = TfidfIndex({name: _index_document(tool["schema"]) for name, tool in self.tools.items()})
+        scores = self._index.scores(query)
+        ranked = sorted((name for name in names if scores.get(name, 0.0) > 0), key=lambda name: -scores[name])
+        if not ranked and not called:
+            return list(names)
+        close = [name for name in ranked if scores[name] >= cutoff * scores[ranked[0]]]
+        keep = set(ranked[:top_k]) | set(close) | (called & set(names)) | set(always)
+        return [name for name in names if name in keep]
+
+    def _prune(self, agent, messages, names, top_k, always, cutoff):
+        wrapper = getattr(agent, "client", None)
+        if wrapper is None:
+            return
+        # Remember the full config list on the wrapper; a rebuilt wrapper starts from its own
+        full = getattr(wrapper, "_unpruned_config_list", None)
+        if full is None:
+            full = wrapper._unpruned_config_list = wrapper._config_list
+        selected = set(self.select(messages, names, top_k, always, cutoff))
+        config_list = []
+        for config in full:
+            tools = [tool for tool in config.get("tools", []) if _tool_name(tool) not in names or _tool_name(tool) in selected]
+            config = {key: value for key, value in config.items() if key != "tools"}
+            if tools:
+                config["tools"] = tools
+            config_list.append(config)
+        # Replaced, never mutated: session clones share the template's config list
+        wrapper._config_list = config_list
+        self._record(
+            {
+                "agent": agent.name,
+                "tools_available": len(names),
+                "tools_sent": len(selected),
+                "tokens_full": sum(self.schema_tokens(name) for name in names),
+                "tokens_sent": sum(self.schema_tokens(name) for name in names if name in selected),
+            }
+        )
+
+    def _record(self, turn):
+        with self._lock:
+            self.turns.append(turn)
+
+    def report(self) -> dict:
+        """Registration cost, and the tool schema tokens sent and saved per pruned turn."""
+        with self._lock:
+            turns = list(self.turns)
+        tokens_full = sum(turn["tokens_full"] for turn in turns)
+        tokens_sent = sum(turn["tokens_sent"] for turn in turns)
+        return {
+            "tools": len(self.tools),
+            "schema_tokens": sum(self.schema_tokens(name) for name in self.tools),
+            "schema_build_s": round(self.build_s, 4),
+            "bind_s": round(self.bind_s, 4),
+            "turns": len(turns),
+            "pruned_turns": sum(1 for turn in turns if turn["tools_sent"] < turn["tools_available"]),
+            "tools_sent_per_turn": [turn["tools_sent"] for turn in turns],
+            "tokens_sent": tokens_sent,
+            "tokens_saved": tokens_full - tokens_sent,
+            "tokens_saved_per_turn": round((tokens_full - tokens_sent) / len(turns), 1) if turns else 0.0,
+        }
+
+    def format_report(self) -> str:
+        report = self.report()
+        return (
+            f"Tool registry: {report['tools']} tools ({report['schema_tokens']} schema tokens) built in "
+            f"{report['schema_build_s'] * 1000:.1f}ms, bound in {report['bind_s'] * 1000:.1f}ms; "
+            f"{report['pruned_turns']}/{report['turns']} turns pruned, {report['tokens_saved']} tool tokens saved "
+            f"({report['tokens_saved_per_turn']} per turn)"
+        )
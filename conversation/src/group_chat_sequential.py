@@ -1,8 +1,11 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent, UserProxyAgent, GroupChat, GroupChatManager
 from dotenv import load_dotenv
-import pprint
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.history_compaction import add_history_compaction, compaction_report
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -33,21 +36,7 @@ load_dotenv()
 # This example showcases the integration of a group chat into a sequential chat to accomplish intricate, collaborative tasks.
 """
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0.7,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-    "config_list": [{
-        "model": model,
-        "api_key": os.getenv("OPENAI_API_KEY"),
-        "timeout": 60,
-        "max_retries": 3
-    }]
-}
-
-if not llm_config["api_key"]:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
+llm_config = build_llm_config(temperature=0.7)
 
 
 # Group Chat in a Sequential Chat
@@ -90,11 +79,17 @@ weather_agent = ConversableAgent(
     description="Provides weather forecast.",
 )
 
+# Introductions and the "refine the plan" pass make the history long, so each speaker and the
+# speaker selection see the last turns verbatim plus a rolling summary of everything older
+travel_agents = [flight_agent, hotel_agent, activity_agent, restaurant_agent, weather_agent]
+compactors = add_history_compaction(travel_agents, keep_last=4, max_tokens=1500)
+
 # Create a Group Chat with introduction messages
 group_chat_with_introductions = GroupChat(
-    agents=[flight_agent, hotel_agent, activity_agent, restaurant_agent, weather_agent],
+    agents=travel_agents,
     messages=[],
     max_round=6,
+    select_speaker_transform_messages=compactors.speaker_selection,
     send_introductions=True,  # Send system messages to introduce each agent
 )
 
@@ -132,3 +127,4 @@ chat_result = travel_planner_agent.initiate_chats(
 for result in chat_result:
     print(result.cost)
 
+print("Tokens saved by history compaction:", compaction_report(compactors))
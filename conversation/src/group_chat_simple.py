@@ -1,8 +1,12 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent, UserProxyAgent, GroupChat, GroupChatManager
 from dotenv import load_dotenv
-import pprint
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.history_compaction import add_history_compaction, compaction_report
+from common.speaker_selection import HeuristicSpeakerSelector
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -21,21 +25,7 @@ load_dotenv()
 - The script sets up a collaborative interaction using the GroupChat and GroupChatManager classes, allowing users to engage with multiple agents simultaneously to plan their travel effectively.
 """
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0.7,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-    "config_list": [{
-        "model": model,
-        "api_key": os.getenv("OPENAI_API_KEY"),
-        "timeout": 60,
-        "max_retries": 3
-    }]
-}
-
-if not llm_config["api_key"]:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
+llm_config = build_llm_config(temperature=0.7)
 
 flight_agent = ConversableAgent(
     name="Flight_Agent",
@@ -73,11 +63,28 @@ weather_agent = ConversableAgent(
     description="Provides weather forecast.",
 )
 
+# Compact the shared history: keep the last turns verbatim and fold older ones into a rolling summary
+travel_agents = [flight_agent, hotel_agent, activity_agent, restaurant_agent, weather_agent]
+compactors = add_history_compaction(travel_agents, keep_last=4, max_tokens=1500)
+
+# Pick the next speaker locally from the agent descriptions; ask the LLM only when the choice is unclear
+speaker_selector = HeuristicSpeakerSelector(
+    keywords={
+        "Flight_Agent": "flight airline airport departure departing arrival fly ticket",
+        "Hotel_Agent": "hotel accommodation stay room booking night",
+        "Activity_Agent": "activity attraction museum tour sightseeing visit",
+        "Restaurant_Agent": "restaurant dining dinner lunch food cuisine eat",
+        "Weather_Agent": "weather forecast temperature rain sunny climate",
+    }
+)
+
 # Create a Group Chat
 group_chat = GroupChat(
-    agents=[flight_agent, hotel_agent, activity_agent, restaurant_agent, weather_agent],
+    agents=travel_agents,
     messages=[],
     max_round=6,
+    speaker_selection_method=speaker_selector,
+    select_speaker_transform_messages=compactors.speaker_selection,
 )
 
 # Create a Group Chat Manager
@@ -91,4 +98,7 @@ chat_result = weather_agent.initiate_chat(
     group_chat_manager,
     message="I'm planning a trip to Paris for the first week of September. Can you help me plan? I will be departuring from Miami",
     summary_method="reflection_with_llm",
-)
\ No newline at end of file
+)
+
+print("Tokens saved by history compaction:", compaction_report(compactors))
+print("Speaker selection:", speaker_selector.stats())
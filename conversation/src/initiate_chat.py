@@ -1,8 +1,13 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent, UserProxyAgent
 from dotenv import load_dotenv
 import pprint
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.streaming import StreamMonitor
+from common.conversation_store import get_conversation_store
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -27,21 +32,7 @@ load_dotenv()
 - Enhances user travel planning through dynamic dialogue, allowing for a more personalized experience.
 """
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0.7,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-    "config_list": [{
-        "model": model,
-        "api_key": os.getenv("OPENAI_API_KEY"),
-        "timeout": 60,
-        "max_retries": 3
-    }]
-}
-
-if not llm_config["api_key"]:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
+llm_config = build_llm_config(temperature=0.7, stream=True)
 
 traveler_agent = ConversableAgent(
     name="Traveler_Agent",
@@ -63,12 +54,20 @@ guide_agent = ConversableAgent(
 Keep responses focused and structured."""
 )
 
+# Print replies while they stream in and report time to first token and tokens/sec per turn
+stream_monitor = StreamMonitor().attach(traveler_agent, guide_agent)
+
+# Persist every message to SQLite as it is sent, so the conversation outlives the process
+conversation_store = get_conversation_store()
+conversation = conversation_store.start_conversation("japan_trip", agents=[traveler_agent, guide_agent])
+
 try:
-    chat_result = traveler_agent.initiate_chat(
-        recipient=guide_agent,
-        message="I'm interested in visiting Japan for 5 days. Can you suggest the main cities I should visit?",
-        max_turns=2
-    )
+    with stream_monitor:
+        chat_result = traveler_agent.initiate_chat(
+            recipient=guide_agent,
+            message="I'm interested in visiting Japan for 5 days. Can you suggest the main cities I should visit?",
+            max_turns=2
+        )
     
     print("**********************")
     print("Chat History:")
@@ -80,9 +79,17 @@ try:
     print("Default Summary Prompt:")
     print(ConversableAgent.DEFAULT_SUMMARY_PROMPT)
     print("**********************")
-    print("Chat History:")
-    pprint.pprint(chat_result.chat_history)
+    print(f"Stored Chat History (conversation {conversation.id} in {conversation_store.path}):")
+    for message in conversation_store.iter_messages(conversation.id):
+        print(f"[{message['seq']}] {message['name']} -> {message['recipient']}: {message.get('content')}")
+    print("**********************")
+    print("Recent conversations:")
+    pprint.pprint(conversation_store.conversations(limit=5))
+    print("**********************")
+    print("Streaming metrics:")
+    pprint.pprint(stream_monitor.report()["agents"])
     print("**********************")
     
 except Exception as e:
-    print(f"Chat session failed: {str(e)}")
\ No newline at end of file
+    print(f"Chat session failed: {str(e)}")
+    sys.exit(1)
\ No newline at end of file
@@ -1,8 +1,10 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent, UserProxyAgent, GroupChat, GroupChatManager, AssistantAgent
 from dotenv import load_dotenv
-import pprint
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -22,21 +24,7 @@ The script sets up a collaborative environment where the writer creates content,
 """
 
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0.7,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-    "config_list": [{
-        "model": model,
-        "api_key": os.getenv("OPENAI_API_KEY"),
-        "timeout": 60,
-        "max_retries": 3
-    }]
-}
-
-if not llm_config["api_key"]:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
+llm_config = build_llm_config(temperature=0.7)
 
 
 
@@ -1,8 +1,12 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent, UserProxyAgent
 from dotenv import load_dotenv
-import pprint
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.response_cache import cache_stats
+from common.fast_path import FastPathAgent, count_words, echo_text, reverse_text, uppercase_text
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -34,53 +38,47 @@ load_dotenv()
 
 """
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0.7,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-    "config_list": [{
-        "model": model,
-        "api_key": os.getenv("OPENAI_API_KEY"),
-        "timeout": 60,
-        "max_retries": 3
-    }]
-}
-
-if not llm_config["api_key"]:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
+# The same "These are my numbers" prompt is sent on every run, so serve repeats from the response cache
+llm_config = build_llm_config(temperature=0.7, cache=True)
+
+# The string-manipulation stages are FastPathAgents: they answer in-process
+# and only fall back to the LLM for messages they cannot handle.
 
 # The Initial Agent always returns a given text.
-initial_agent = ConversableAgent(
+initial_agent = FastPathAgent(
     name="Initial_Agent",
     system_message="You return me the text I give you.",
     llm_config=llm_config,
     human_input_mode="NEVER",
+    local_reply=echo_text,
 )
 
 # The Uppercase Agent converts the text to uppercase.
-uppercase_agent = ConversableAgent(
+uppercase_agent = FastPathAgent(
     name="Uppercase_Agent",
     system_message="You convert the text I give you to uppercase.",
     llm_config=llm_config,
     human_input_mode="NEVER",
+    local_reply=uppercase_text,
 )
 
 # The Word Count Agent counts the number of words in the text.
-word_count_agent = ConversableAgent(
+word_count_agent = FastPathAgent(
     name="WordCount_Agent",
     system_message="You count the number of words in the text I give you.",
     llm_config=llm_config,
     human_input_mode="NEVER",
+    local_reply=count_words,
 )
 
 
 # The Reverse Text Agent reverses the text.
-reverse_text_agent = ConversableAgent(
+reverse_text_agent = FastPathAgent(
     name="ReverseText_Agent",
     system_message="You reverse the text I give you.",
     llm_config=llm_config,
     human_input_mode="NEVER",
+    local_reply=reverse_text,
 )
 
 # The Summarize Agent summarizes the text.
@@ -126,4 +124,7 @@ chat_results = initial_agent.initiate_chats(
 print("First Chat Summary: ", chat_results[0].summary)
 print("Second Chat Summary: ", chat_results[1].summary)
 print("Third Chat Summary: ", chat_results[2].summary)
-print("Fourth Chat Summary: ", chat_results[3].summary)
\ No newline at end of file
+print("Fourth Chat Summary: ", chat_results[3].summary)
+
+print("Fast-path replies:", {agent.name: agent.fast_path_stats for agent in [initial_agent, uppercase_agent, word_count_agent, reverse_text_agent]})
+print("Response cache stats:", cache_stats([initial_agent, uppercase_agent, word_count_agent, reverse_text_agent, summarize_agent]))
@@ -1,7 +1,11 @@
 import os
+import sys
 import warnings
 from autogen import AssistantAgent, UserProxyAgent, ConversableAgent
 from dotenv import load_dotenv
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.streaming import StreamMonitor
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -24,11 +28,8 @@ The conversation will continue prompting for human input until either:
 
 """
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-}
+# Stream replies as they are generated so the human sees them without waiting for the full completion
+llm_config = build_llm_config(stream=True)
 
 
 agent_with_animal = ConversableAgent(
@@ -50,9 +51,13 @@ human_proxy = UserProxyAgent(
     code_execution_config=False, # no code execution for human
 )
 
+stream_monitor = StreamMonitor().attach(agent_with_animal)
 
 # Start the conversation
-result = human_proxy.initiate_chat(
-    recipient=agent_with_animal,
-    message="Parrot"
-)
+with stream_monitor:
+    result = human_proxy.initiate_chat(
+        recipient=agent_with_animal,
+        message="Parrot"
+    )
+
+print("Streaming metrics:", stream_monitor.report()["agents"])
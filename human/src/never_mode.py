@@ -1,7 +1,11 @@
 import os
+import sys
 import warnings
 from autogen import AssistantAgent, UserProxyAgent, ConversableAgent
 from dotenv import load_dotenv
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.streaming import StreamMonitor
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -21,11 +25,8 @@ This shows how agents can carry out structured interactions without human input.
 
 """
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-}
+# Stream replies as they are generated so the human sees them without waiting for the full completion
+llm_config = build_llm_config(stream=True)
 
 
 agent_with_animal = ConversableAgent(
@@ -51,8 +52,12 @@ agent_guess_animal = ConversableAgent(
     human_input_mode="NEVER",
 )
 
+stream_monitor = StreamMonitor().attach(agent_with_animal, agent_guess_animal)
 
-agent_with_animal.initiate_chat(
-    recipient=agent_guess_animal,
-    message="I'm thinking of an animal. Ask me yes/no questions to guess what it is."
-)
+with stream_monitor:
+    agent_with_animal.initiate_chat(
+        recipient=agent_guess_animal,
+        message="I'm thinking of an animal. Ask me yes/no questions to guess what it is."
+    )
+
+print("Streaming metrics:", stream_monitor.report()["agents"])
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+import warnings
+from autogen import ConversableAgent, UserProxyAgent
+from dotenv import load_dotenv
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.human_inbox import HumanInputHub
+
+warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
+
+load_dotenv()
+
+"""
+This script lets one operator supervise several guessing games at the same time.
+Like always_mode.py, every game has an agent thinking of an animal and a human proxy in ALWAYS
+mode, but the games run concurrently and the human input goes through a HumanInputHub:
+- A game waiting for the human is suspended without holding a thread; the other games continue
+- The operator answers from another terminal with `nc 127.0.0.1 8765` by typing
+  '<game> <guess>' (e.g. 'game-2 Is it a bird?'), or by writing the guess to
+  .cache/human_inbox/<game>.reply
+- Each game ends when its animal is guessed or the operator types '<game> exit'
+
+At the end the script reports how long each game waited for the human.
+"""
+
+llm_config = build_llm_config()
+
+ANIMALS = ["elephant", "penguin", "octopus"]
+PORT = int(os.getenv("AG2_HUMAN_INBOX_PORT", "8765"))
+
+
+def create_game(animal):
+    agent_with_animal = ConversableAgent(
+        name="agent_with_animal",
+        system_message=f"""You are thinking of an {animal}. When asked questions:
+        - Answer only with 'yes' or 'no'
+        - You can add ONE short hint after your yes/no if relevant
+        - Never reveal directly that it's an {animal}
+        - Only confirm if someone explicitly guesses '{animal}'""",
+        llm_config=llm_config,
+        is_termination_msg=lambda msg: animal in (msg.get("content") or "").lower(),
+        human_input_mode="NEVER",
+    )
+    human_proxy = UserProxyAgent(
+        name="human_proxy",
+        llm_config=False,
+        human_input_mode="ALWAYS",
+        code_execution_config=False,
+    )
+    return human_proxy, agent_with_animal
+
+
+async def main():
+    async with HumanInputHub(port=PORT) as hub:
+        print(f"Answer the games with: nc 127.0.0.1 {hub.port}  (type '<game> <guess>')")
+        games = []
+        for i, animal in enumerate(ANIMALS, start=1):
+            human_proxy, agent_with_animal = create_game(animal)
+            hub.attach(human_proxy, session=f"game-{i}")
+            games.append(human_proxy.a_initiate_chat(recipient=agent_with_animal, message="Is it a mammal?"))
+        results = await asyncio.gather(*games)
+    return results, hub.stats()
+
+
+results, wait_stats = asyncio.run(main())
+
+for session, stats in wait_stats.items():
+    print(f"{session}: {stats['requests']} human inputs, waited {stats['total_wait_s']}s in total (longest {stats['max_wait_s']}s)")
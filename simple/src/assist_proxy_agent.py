@@ -1,7 +1,11 @@
 import os
+import sys
 import warnings
 from autogen import AssistantAgent, UserProxyAgent
 from dotenv import load_dotenv
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.kernel_pool import PooledCodeExecutor
+from common.llm_client import build_llm_config
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -14,11 +18,7 @@ The AssistantAgent acts as an AI assistant that can engage in conversation and h
 The UserProxyAgent simulates a user, can execute code, and manages the interaction with the assistant.
 """
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-}
+llm_config = build_llm_config()
 
 assistant = AssistantAgent(
     name="assistant",
@@ -28,10 +28,8 @@ assistant = AssistantAgent(
 user_proxy = UserProxyAgent(
     name="user_proxy",
     llm_config=llm_config,
-    code_execution_config={
-        "work_dir": "code_execution",
-        "use_docker": False,
-    },
+    # Python blocks run in a pre-warmed kernel with pandas and matplotlib already imported
+    code_execution_config={"executor": PooledCodeExecutor(work_dir="code_execution", timeout=60)},
     human_input_mode="NEVER",
 )
 
@@ -1,7 +1,10 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent
 from dotenv import load_dotenv
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -17,11 +20,7 @@ The script sends a test message to the agent and prints its response to demonstr
 
 """
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-}
+llm_config = build_llm_config()
 
 agent = ConversableAgent(
     name="simple_agent",
@@ -1,17 +1,18 @@
 import os
+import sys
 import warnings
 from autogen import AssistantAgent, UserProxyAgent
 from dotenv import load_dotenv
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.kernel_pool import PooledCodeExecutor
+from common.llm_client import build_llm_config
+from common.market_data import stock_prices_tool
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
 load_dotenv()
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-}
+llm_config = build_llm_config()
 
 assistant = AssistantAgent(
     name="Assistant",
@@ -21,13 +22,19 @@ assistant = AssistantAgent(
 user_proxy = UserProxyAgent(
     name="user_proxy",
     llm_config=llm_config,
-    code_execution_config={
-        "work_dir": "code_execution",
-        "use_docker": False,
-    },
+    # Python blocks run in a pre-warmed kernel with pandas and matplotlib already imported
+    code_execution_config={"executor": PooledCodeExecutor(work_dir="code_execution", timeout=60)},
     human_input_mode="ALWAYS",
 )
 
+# Prices come from the local market-data store, which only downloads the date ranges it does not have yet
+get_stock_prices = stock_prices_tool(work_dir="code_execution")
+assistant.register_for_llm(
+    name="get_stock_prices",
+    description="Save daily close prices of ticker symbols to a CSV file in the working directory and summarize them",
+)(get_stock_prices)
+user_proxy.register_for_execution(name="get_stock_prices")(get_stock_prices)
+
 user_proxy.initiate_chat(
     recipient=assistant,
     message="Plot a chart of META and TESLA stock prices from 2022 to 2024",
@@ -1,8 +1,14 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent, UserProxyAgent
 from dotenv import load_dotenv
 from typing import Annotated as A
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.response_cache import cache_stats
+from common.sentinel_stop import SentinelStopper
+from common.tool_registry import ToolRegistry
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -16,12 +22,9 @@ The assistant can execute registered functions for adding and multiplying number
 """
 
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-}
+# temperature 0 keeps replies deterministic, which makes them safe to replay from the response cache;
+# streaming lets the reply be cut off as soon as the assistant writes TERMINATE
+llm_config = build_llm_config(temperature=0, cache=True, stream=True)
 
 def add_numbers(a: A[int, "The first number to add"], b: A[int, "The second number to add"]) -> str:
     return f"The sum of {a} and {b} is {a + b}"
@@ -44,13 +47,13 @@ user_proxy = ConversableAgent(
 )
 
 
-# register tools with the assistant
-assistant.register_for_llm(name="add_numbers", description="Add two numbers")(add_numbers)
-assistant.register_for_llm(name="multiply_numbers", description="Multiply two numbers")(multiply_numbers)
+# register the tools with the assistant (for the LLM) and the user_proxy (for execution) in one go
+tools = ToolRegistry()
+tools.add(add_numbers, description="Add two numbers")
+tools.add(multiply_numbers, description="Multiply two numbers")
+tools.bind(assistant, executor=user_proxy)
 
-# register tools with the user_proxy
-user_proxy.register_for_execution(name="add_numbers")(add_numbers)
-user_proxy.register_for_execution(name="multiply_numbers")(multiply_numbers)
+stopper = SentinelStopper("TERMINATE").attach(assistant)
 
 
 user_proxy.initiate_chat(
@@ -58,4 +61,6 @@ user_proxy.initiate_chat(
     message="Add 3 and 2"
 )
 
-
+print("Response cache stats:", cache_stats([assistant, user_proxy]))
+print(stopper.format_report())
+print(tools.format_report())
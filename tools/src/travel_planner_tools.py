@@ -1,17 +1,18 @@
 import os
+import sys
 from autogen import ConversableAgent, AssistantAgent, UserProxyAgent
 from typing import Annotated
 
 from dotenv import load_dotenv
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.sentinel_stop import SentinelStopper
+from common.tool_registry import ToolRegistry
 
 load_dotenv()
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0.9,
-    "api_key": os.environ["OPENAI_API_KEY"],
-}
+# Streamed, so the reply can be cut off as soon as the assistant writes TERMINATE
+llm_config = build_llm_config(temperature=0.9, stream=True)
 
 
 # Define travel planner functions
@@ -55,25 +56,20 @@ user_proxy = ConversableAgent(
     human_input_mode="TERMINATE",
 )
 
-# Register the tool signatures with the assistant agent.
-assistant.register_for_llm(
-    name="calculate_travel_time",
-    description="Calculate travel time based on distance and speed",
-)(calculate_travel_time)
-assistant.register_for_llm(
-    name="convert_currency", description="Convert USD to EUR based on exchange rate"
-)(convert_currency)
-assistant.register_for_llm(
-    name="suggest_activity", description="Suggest activities for a specific location"
-)(suggest_activity)
+# Register the tools with the assistant agent (signatures) and the user proxy agent (execution) at once
+tools = ToolRegistry()
+tools.add(calculate_travel_time, description="Calculate travel time based on distance and speed")
+tools.add(convert_currency, description="Convert USD to EUR based on exchange rate")
+tools.add(suggest_activity, description="Suggest activities for a specific location")
+tools.bind(assistant, executor=user_proxy)
 
-
-# Register the tool functions with the user proxy agent.
-user_proxy.register_for_execution(name="calculate_travel_time")(calculate_travel_time)
-user_proxy.register_for_execution(name="convert_currency")(convert_currency)
-user_proxy.register_for_execution(name="suggest_activity")(suggest_activity)
+# End the assistant's final reply at TERMINATE instead of waiting for the rest of the completion
+stopper = SentinelStopper("TERMINATE").attach(assistant)
 
 # Example conversation with the assistant
 user_proxy.initiate_chat(
     assistant, message="I am planning a trip to Paris. What should I do there?"
-)
\ No newline at end of file
+)
+
+print(stopper.format_report())
+print(tools.format_report())
\ No newline at end of file
@@ -1,8 +1,15 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent, UserProxyAgent
 from dotenv import load_dotenv
 from typing import Annotated as A
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.response_cache import cache_stats
+from common.parallel_tools import ParallelToolExecutor
+from common.sentinel_stop import SentinelStopper
+from common.tool_registry import ToolRegistry
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -18,12 +25,8 @@ and another for the user to communicate effectively. This setup allows for dynam
 
 
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-}
+# Streamed, so the reply can be cut off as soon as the assistant writes TERMINATE
+llm_config = build_llm_config(temperature=0, cache=True, stream=True)
 
 def get_flight_status(flight_number: A[str, "Flight number"]) -> str:
     dummy_data = {"AA123": "On time", 
@@ -65,27 +68,25 @@ user_proxy = ConversableAgent(
     human_input_mode="NEVER",
 )
 
-# Register the tool signatures with the assistant agent.
-assistant.register_for_llm(
-    name="get_flight_status",
-    description="Get the current status of a flight based on the flight number",
-)(get_flight_status)
+# Register all tools at once: schemas are built once and the assistant gets them in one client rebuild
+tools = ToolRegistry()
+tools.add(get_flight_status, description="Get the current status of a flight based on the flight number")
+tools.add(get_hotel_info, description="Get information about hotels in a specific location")
+tools.add(get_travel_advice, description="Get travel advice for a specific location")
+tools.bind(assistant, executor=user_proxy)
 
-assistant.register_for_llm(
-    name="get_hotel_info",
-    description="Get information about hotels in a specific location",
-)(get_hotel_info)
+# Run the tool calls of one assistant message concurrently instead of one after the other
+tool_executor = ParallelToolExecutor(timeout=10).add_to_agent(user_proxy)
 
-assistant.register_for_llm(
-    name="get_travel_advice", description="Get travel advice for a specific location"
-)(get_travel_advice)
-
-# Register the tool functions with the user proxy agent.
-user_proxy.register_for_execution(name="get_flight_status")(get_flight_status)
-user_proxy.register_for_execution(name="get_hotel_info")(get_hotel_info)
-user_proxy.register_for_execution(name="get_travel_advice")(get_travel_advice)
+# End the assistant's final reply at TERMINATE instead of waiting for the rest of the completion
+stopper = SentinelStopper("TERMINATE").attach(assistant)
 
 user_proxy.initiate_chat(
     assistant,
     message="I need help with my travel plans. Can you help me? I am traveling to New York. I need hotel information. Also give me the status of my flight AA123.",
-)
\ No newline at end of file
+)
+
+print("Response cache stats:", cache_stats([assistant, user_proxy]))
+print("Parallel tool execution:", tool_executor.stats())
+print(stopper.format_report())
+print(tools.format_report())
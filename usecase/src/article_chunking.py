@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+import tiktoken
+from autogen import AssistantAgent, UserProxyAgent
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+
+"""
+Map-reduce analysis for articles too long for a single prompt.
+
+- split: the article is cut on section and paragraph boundaries into chunks that fit a token
+  budget (counted with tiktoken); a paragraph larger than the budget is split on sentences,
+- map: every chunk is analyzed by its own single-turn chat, all chunks concurrently (bounded by
+  `concurrency`),
+- reduce: the per-chunk findings are merged into one analysis; when the findings themselves
+  exceed the budget they are merged in groups first (in pairs when every part fills the budget
+  on its own, so no merge prompt grows much beyond twice the budget).
+
+Chunk findings are cached on disk (`.cache/article_chunks`, or AG2_ARTICLE_CACHE_DIR) under a hash of the model, the
+analyst and map prompts and the chunk text, so editing one section only re-analyzes the chunks it touches.
+
+    python usecase/src/article_chunking.py usecase/data/article.txt --max-chunk-tokens 400
+"""
+
+CACHE_DIR = os.getenv(
+    "AG2_ARTICLE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".cache", "article_chunks")
+)
+DEFAULT_MAX_CHUNK_TOKENS = 1500
+
+MAP_PROMPT = (
+    "You are analyzing part {index} of {total} of a longer article. Analyze this part for structure, "
+    "coherence, and completeness. List its key points, the factual claims it makes, and any issues you notice. "
+    "Be concise.\n\nArticle part {index}:\n{chunk}"
+)
+ANALYST_SYSTEM_MESSAGE = (
+    "You are a careful article analyst. You review articles and parts of articles for structure, coherence, "
+    "completeness and factual claims, and merge such analyses. Answer with the analysis only."
+)
+REDUCE_PROMPT = (
+    "Below are the analyses of consecutive parts of one article. Merge them into a single analysis of the "
+    "whole article covering structure, coherence, completeness, key points and factual claims. Remove "
+    "duplicates and keep the order of the article.\n\n{findings}"
+)
+
+HEADING_PATTERN = re.compile(r"^(#{1,6}\s|\d+(\.\d+)*\s+\S)")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?…”\"])\s+")
+
+
+def _encoding(model):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text, model="gpt-3.5-turbo"):
+    """Token count of `text` for `model`, estimated from its length when the encoding cannot be loaded (offline runs)."""
+    try:
+        return len(_encoding(model).encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def _is_heading(block):
+    first_line = block.strip().splitlines()[0] if block.strip() else ""
+    return bool(HEADING_PATTERN.match(first_line))
+
+
+def _split_oversized(block, max_tokens, model):
+    """Split a block larger than the budget on sentences, and sentences on tokens as a last resort."""
+    pieces = []
+    for sentence in SENTENCE_PATTERN.split(block):
+        if count_tokens(sentence, model) <= max_tokens:
+            pieces.append(sentence)
+            continue
+        try:
+            encoding = _encoding(model)
+            tokens = encoding.encode(sentence)
+            pieces.extend(encoding.decode(tokens[i : i + max_tokens]) for i in range(0, len(tokens), max_tokens))
+        except Exception:
+            step = max_tokens * 4
+            pieces.extend(sentence[i : i + step] for i in range(0, len(sentence), step))
+    return pieces
+
+
+def _pack(pieces, max_tokens, model, separator, new_section=lambda piece: False):
+    """Greedily pack pieces into chunks under `max_tokens`, starting a new chunk at section starts."""
+    chunks, current, current_tokens = [], [], 0
+    separator_tokens = count_tokens(separator, model)
+    for piece in pieces:
+        tokens = count_tokens(piece, model)
+        if current and (current_tokens + separator_tokens + tokens > max_tokens or new_section(piece)):
+            chunks.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens + (separator_tokens if len(current) > 1 else 0)
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def split_article(text, max_tokens=DEFAULT_MAX_CHUNK_TOKENS, model="gpt-3.5-turbo"):
+    """Split `text` into chunks of at most `max_tokens`, on section and paragraph boundaries."""
+    blocks = [block.strip() for block in re.split(r"\n\s*\n", text) if block.strip()]
+    pieces = []
+    for block in blocks:
+        if count_tokens(block, model) > max_tokens:
+            pieces.extend(_pack(_split_oversized(block, max_tokens, model), max_tokens, model, " "))
+        else:
+            pieces.append(block)
+    return _pack(pieces, max_tokens, model, "\n\n", new_section=_is_heading)
+
+
+def _cache_key(model, prompt, text):
+    return hashlib.sha256(json.dumps([model, ANALYST_SYSTEM_MESSAGE, prompt, text]).encode("utf-8")).hexdigest()
+
+
+def _read_cache(key):
+    try:
+        with open(os.path.join(CACHE_DIR, f"{key}.json"), "r", encoding="utf-8") as file:
+            return json.load(file)["findings"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_cache(key, findings):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump({"findings": findings}, file)
+    os.replace(path + ".tmp", path)
+
+
+async def _ask(llm_config, name, message, semaphore):
+    """One single-turn chat with a fresh analyst, so concurrent requests never share history."""
+    async with semaphore:
+        analyst = AssistantAgent(name=name, llm_config=llm_config, system_message=ANALYST_SYSTEM_MESSAGE)
+        requester = UserProxyAgent(
+            name=f"{name}_Requester", human_input_mode="NEVER", llm_config=False, code_execution_config=False
+        )
+        result = await requester.a_initiate_chat(
+            analyst, message=message, max_turns=1, summary_method="last_msg", silent=True
+        )
+        return result.summary.strip()
+
+
+async def _reduce(findings, llm_config, max_tokens, model, semaphore):
+    """Merge findings, in groups that fit the budget when they are too large for one prompt."""
+    if len(findings) == 1:
+        return findings[0]
+    labelled = [f"Part {i + 1}:\n{text}" for i, text in enumerate(findings)]
+    groups = _pack(labelled, max_tokens, model, "\n\n")
+    if len(groups) == 1:
+        return await _ask(llm_config, "Merge_Agent", REDUCE_PROMPT.format(findings=groups[0]), semaphore)
+    if len(groups) == len(findings):
+        # Every part fills the budget on its own: merge neighbours in pairs, which still halves the parts
+        groups = ["\n\n".join(labelled[i : i + 2]) for i in range(0, len(labelled), 2)]
+    merged = await asyncio.gather(
+        *(_ask(llm_config, f"Merge_Agent_{i}", REDUCE_PROMPT.format(findings=group), semaphore) for i, group in enumerate(groups))
+    )
+    return await _reduce(list(merged), llm_config, max_tokens, model, semaphore)
+
+
+async def a_analyze_article_chunked(
+    text, llm_config, max_chunk_tokens=DEFAULT_MAX_CHUNK_TOKENS, concurrency=4, use_cache=True
+) -> dict:
+    """
+    Analyze a long article chunk by chunk and merge the findings.
+
+    Returns {"findings": merged analysis, "chunks": [per-chunk records], "stats": {...}}.
+    """
+    model = llm_config.get("model", "gpt-3.5-turbo")
+    chunks = split_article(text, max_chunk_tokens, model)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    start = time.perf_counter()
+
+    async def analyze(index, chunk):
+        key = _cache_key(model, MAP_PROMPT, chunk)
+        findings = _read_cache(key) if use_cache else None
+        cached = findings is not None
+        if not cached:
+            message = MAP_PROMPT.format(index=index + 1, total=len(chunks), chunk=chunk)
+            findings = await _ask(llm_config, f"Chunk_Analyst_{index + 1}", message, semaphore)
+            if use_cache:
+                _write_cache(key, findings)
+        return {"index": index, "text": chunk, "tokens": count_tokens(chunk, model), "cached": cached, "findings": findings}
+
+    records = await asyncio.gather(*(analyze(i, chunk) for i, chunk in enumerate(chunks)))
+    map_seconds = time.perf_counter() - start
+    findings = await _reduce([r["findings"] for r in records], llm_config, max_chunk_tokens, model, semaphore)
+    return {
+        "findings": findings,
+        "chunks": records,
+        "stats": {
+            "chunks": len(records),
+            "cached": sum(r["cached"] for r in records),
+            "analyzed": sum(not r["cached"] for r in records),
+            "map_s": round(map_seconds, 3),
+            "total_s": round(time.perf_counter() - start, 3),
+        },
+    }
+
+
+def analyze_article_chunked(text, llm_config, max_chunk_tokens=DEFAULT_MAX_CHUNK_TOKENS, concurrency=4, use_cache=True) -> dict:
+    """Synchronous entry point for `a_analyze_article_chunked`."""
+    return asyncio.run(a_analyze_article_chunked(text, llm_config, max_chunk_tokens, concurrency, use_cache))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a long article with chunked map-reduce.")
+    parser.add_argument("path", help="Article text file")
+    parser.add_argument("--max-chunk-tokens", type=int, default=DEFAULT_MAX_CHUNK_TOKENS)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true", help="Re-analyze every chunk")
+    args = parser.parse_args(argv)
+
+    with open(args.path, "r", encoding="utf-8") as file:
+        text = file.read()
+    result = analyze_article_chunked(
+        text, build_llm_config(temperature=0.4), args.max_chunk_tokens, args.concurrency, not args.no_cache
+    )
+    print(result["findings"])
+    print(json.dumps(result["stats"]), file=sys.stderr)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent, UserProxyAgent, GroupChat, GroupChatManager, AssistantAgent
 from dotenv import load_dotenv
-import pprint
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.nested_chats import register_parallel_nested_chats
+from common.telemetry import start_telemetry, stop_telemetry
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -20,132 +24,164 @@ This script implements a customer support framework using multiple agents to han
 This structure allows for a streamlined and efficient customer support process, enhancing user satisfaction and operational effectiveness.
 """
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0.4,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-    "config_list": [{
-        "model": model,
-        "api_key": os.getenv("OPENAI_API_KEY"),
-        "timeout": 60,
-        "max_retries": 3
-    }]
-}
-
-if not llm_config["api_key"]:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
-
-
-
-# Define the customer inquiry agent
-inquiry_agent = ConversableAgent(
-    name="Inquiry_Agent",
-    llm_config=llm_config,
-    system_message="You handle customer inquiries and classify them.",
-)
-
-# Define the response agent
-response_agent = ConversableAgent(
-    name="Response_Agent",
-    llm_config=llm_config,
-    system_message="You provide automated responses based on the inquiry classification.",
-)
-
-# Define the knowledge base agent
-knowledge_base_agent = ConversableAgent(
-    name="Knowledge_Base_Agent",
-    llm_config=llm_config,
-    system_message="You search the company's knowledge base for solutions to customer issues.",
-)
-
-# Define the troubleshooting agent
-troubleshooting_agent = ConversableAgent(
-    name="Troubleshooting_Agent",
-    llm_config=llm_config,
-    system_message="You guide customers through troubleshooting steps to resolve their issues.",
-)
-
-# Define the feedback agent
-feedback_agent = ConversableAgent(
-    name="Feedback_Agent",
-    llm_config=llm_config,
-    system_message="You collect customer feedback on the resolution process.",
-)
-
-# Define the escalation agent
-escalation_agent = ConversableAgent(
-    name="Escalation_Agent",
-    llm_config=llm_config,
-    system_message="You identify cases that require human intervention.",
-)
-
-# Define the human support agent
-human_support_agent = ConversableAgent(
-    name="Human_Support_Agent",
-    llm_config=llm_config,
-    system_message="You connect customers with human support representatives.",
-)
-
-# Define the user proxy agent
-user_proxy = UserProxyAgent(
-    name="User",
-    human_input_mode="NEVER",
-    is_termination_msg=lambda x: x.get("content", "").find("TERMINATE") >= 0,
-    code_execution_config={
-        "last_n_messages": 1,
-        "work_dir": "my_code",
-        "use_docker": False,
-    },
-)
-
-# Register nested chats with the user proxy agent
-user_proxy.register_nested_chats(
-    [
-        {
-            "recipient": response_agent,
-            "message": lambda recipient, messages, sender, config: f"Classify and respond to this inquiry: {messages[-1]['content']}",
-            "summary_method": "last_msg",
-            "max_turns": 1,
+llm_config = build_llm_config(temperature=0.4)
+
+
+def create_support_agents(llm_config=llm_config):
+    """Build a fresh set of support agents, so every inquiry can have its own chat state."""
+    # Define the customer inquiry agent
+    inquiry_agent = ConversableAgent(
+        name="Inquiry_Agent",
+        llm_config=llm_config,
+        system_message="You handle customer inquiries and classify them.",
+    )
+
+    # Define the response agent
+    response_agent = ConversableAgent(
+        name="Response_Agent",
+        llm_config=llm_config,
+        system_message="You provide automated responses based on the inquiry classification.",
+    )
+
+    # Define the knowledge base agent
+    knowledge_base_agent = ConversableAgent(
+        name="Knowledge_Base_Agent",
+        llm_config=llm_config,
+        system_message="You search the company's knowledge base for solutions to customer issues.",
+    )
+
+    # Define the troubleshooting agent
+    troubleshooting_agent = ConversableAgent(
+        name="Troubleshooting_Agent",
+        llm_config=llm_config,
+        system_message="You guide customers through troubleshooting steps to resolve their issues.",
+    )
+
+    # Define the feedback agent
+    feedback_agent = ConversableAgent(
+        name="Feedback_Agent",
+        llm_config=llm_config,
+        system_message="You collect customer feedback on the resolution process.",
+    )
+
+    # Define the escalation agent
+    escalation_agent = ConversableAgent(
+        name="Escalation_Agent",
+        llm_config=llm_config,
+        system_message="You identify cases that require human intervention.",
+    )
+
+    # Define the human support agent
+    human_support_agent = ConversableAgent(
+        name="Human_Support_Agent",
+        llm_config=llm_config,
+        system_message="You connect customers with human support representatives.",
+    )
+
+    # Define the user proxy agent
+    user_proxy = UserProxyAgent(
+        name="User",
+        human_input_mode="NEVER",
+        is_termination_msg=lambda x: x.get("content", "").find("TERMINATE") >= 0,
+        code_execution_config={
+            "last_n_messages": 1,
+            "work_dir": "my_code",
+            "use_docker": False,
         },
-        {
-            "recipient": knowledge_base_agent,
-            "message": lambda recipient, messages, sender, config: f"Search for solutions to this issue: {messages[-1]['content']}",
-            "summary_method": "last_msg",
-            "max_turns": 1,
-        },
-        {
-            "recipient": troubleshooting_agent,
-            "message": lambda recipient, messages, sender, config: f"Guide through troubleshooting for this issue: {messages[-1]['content']}",
-            "summary_method": "last_msg",
-            "max_turns": 1,
-        },
-        {
-            "recipient": feedback_agent,
-            "message": lambda recipient, messages, sender, config: f"Collect feedback on this resolution process: {messages[-1]['content']}",
-            "summary_method": "last_msg",
-            "max_turns": 1,
-        },
-        {
-            "recipient": escalation_agent,
-            "message": lambda recipient, messages, sender, config: f"Determine if this case needs human intervention: {messages[-1]['content']}",
-            "summary_method": "last_msg",
-            "max_turns": 1,
-        },
-    ],
-    trigger=inquiry_agent,
-)
-
-
-# Define the initial customer inquiry
-initial_inquiry = (
-    """My internet is not working, and I have already tried rebooting the router."""
-)
-
-# Start the nested chat
-user_proxy.initiate_chat(
-    recipient=inquiry_agent,
-    message=initial_inquiry,
-    max_turns=2,
-    summary_method="last_msg",
-)
\ No newline at end of file
+    )
+
+    return {
+        "inquiry": inquiry_agent,
+        "response": response_agent,
+        "knowledge_base": knowledge_base_agent,
+        "troubleshooting": troubleshooting_agent,
+        "feedback": feedback_agent,
+        "escalation": escalation_agent,
+        "human_support": human_support_agent,
+        "user_proxy": user_proxy,
+    }
+
+
+def register_support_nested_chats(agents, silent=False, use_async=False):
+    """Register the specialist nested chats with the user proxy agent (`use_async` for a_initiate_chat)."""
+    # The chats run concurrently; only the feedback chat waits for the response and troubleshooting
+    # chats, whose summaries it receives as context. Summaries are merged in the order listed here.
+    register_parallel_nested_chats(
+        agents["user_proxy"],
+        [
+            {
+                "chat_id": "response",
+                "recipient": agents["response"],
+                "message": lambda recipient, messages, sender, config: f"Classify and respond to this inquiry: {messages[-1]['content']}",
+                "summary_method": "last_msg",
+                "max_turns": 1,
+                "silent": silent,
+            },
+            {
+                "chat_id": "knowledge_base",
+                "recipient": agents["knowledge_base"],
+                "message": lambda recipient, messages, sender, config: f"Search for solutions to this issue: {messages[-1]['content']}",
+                "summary_method": "last_msg",
+                "max_turns": 1,
+                "silent": silent,
+            },
+            {
+                "chat_id": "troubleshooting",
+                "recipient": agents["troubleshooting"],
+                "message": lambda recipient, messages, sender, config: f"Guide through troubleshooting for this issue: {messages[-1]['content']}",
+                "summary_method": "last_msg",
+                "max_turns": 1,
+                "silent": silent,
+            },
+            {
+                "chat_id": "feedback",
+                "recipient": agents["feedback"],
+                "message": lambda recipient, messages, sender, config: f"Collect feedback on this resolution process: {messages[-1]['content']}",
+                "summary_method": "last_msg",
+                "max_turns": 1,
+                "silent": silent,
+                "prerequisites": ["response", "troubleshooting"],
+            },
+            {
+                "chat_id": "escalation",
+                "recipient": agents["escalation"],
+                "message": lambda recipient, messages, sender, config: f"Determine if this case needs human intervention: {messages[-1]['content']}",
+                "summary_method": "last_msg",
+                "max_turns": 1,
+                "silent": silent,
+            },
+        ],
+        trigger=agents["inquiry"],
+        use_async=use_async,
+    )
+
+
+def handle_inquiry(agents, inquiry, silent=False):
+    """Run one inquiry through the Inquiry_Agent and the nested specialist chats."""
+    return agents["user_proxy"].initiate_chat(
+        recipient=agents["inquiry"],
+        message=inquiry,
+        max_turns=2,
+        summary_method="last_msg",
+        silent=silent,
+    )
+
+
+if __name__ == "__main__":
+    agents = create_support_agents()
+    register_support_nested_chats(agents)
+
+    # Define the initial customer inquiry
+    initial_inquiry = (
+        """My internet is not working, and I have already tried rebooting the router."""
+    )
+
+    # Record tokens, latency, retries and cache hits of every call, per agent and round
+    telemetry = start_telemetry("customer_support")
+
+    # Start the nested chat
+    handle_inquiry(agents, initial_inquiry)
+
+    stop_telemetry()
+    print(telemetry.format_summary())
+    print(f"Telemetry: {telemetry.jsonl_path}, {telemetry.prometheus_path}")
@@ -0,0 +1,169 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from customer_support import create_support_agents, handle_inquiry, register_support_nested_chats
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.rate_limiter import get_rate_limiter, request_priority
+
+"""
+Bulk inquiry processing for the customer support pipeline.
+
+Reads tickets from a JSONL file (or stdin), runs each one through the Inquiry_Agent -> nested
+specialist chats flow on a bounded worker pool, and streams one JSONL result per ticket as soon
+as it finishes. Every ticket gets its own freshly built agents, so concurrent tickets never share
+`chat_messages`.
+
+Input lines may be JSON objects with an `inquiry` (or `message` / `text`) field and an optional
+`id`, or bare JSON strings. A line that is not valid JSON, or has no inquiry, gets an error result
+of its own (with its line number as id) and the rest of the batch carries on.
+
+Usage:
+    python usecase/src/customer_support_batch.py --input tickets.jsonl --output results.jsonl --concurrency 8
+    cat tickets.jsonl | python usecase/src/customer_support_batch.py > results.jsonl
+
+Throughput (tickets/min), p50/p95 latency per ticket and the rate limiter's queue wait (reported apart
+from model latency) are printed on stderr at the end. Ticket requests run with the "batch" priority.
+"""
+
+INQUIRY_KEYS = ("inquiry", "message", "text")
+
+
+def read_tickets(stream):
+    """
+    Yield (ticket_id, inquiry, error) triples from a JSONL stream, skipping blank lines.
+
+    `error` is None for a usable ticket; for a malformed line it says why, and the inquiry is None.
+    """
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            ticket = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Line {line_number}: invalid JSON: {e}"
+            continue
+        if isinstance(ticket, str):
+            yield line_number, ticket, None
+            continue
+        inquiry = next((ticket[key] for key in INQUIRY_KEYS if ticket.get(key)), None) if isinstance(ticket, dict) else None
+        if inquiry is None:
+            yield line_number, None, f"Line {line_number}: ticket has none of the fields {INQUIRY_KEYS}"
+            continue
+        yield ticket.get("id", line_number), inquiry, None
+
+
+def process_ticket(ticket_id, inquiry):
+    """Run a single ticket with its own agents and return the JSON-serializable result."""
+    start = time.perf_counter()
+    try:
+        agents = create_support_agents()
+        register_support_nested_chats(agents, silent=True)
+        # Batch requests queue behind interactive ones sharing the API key
+        with request_priority("batch"):
+            chat_result = handle_inquiry(agents, inquiry, silent=True)
+        # Messages the user proxy sent carry the "assistant" role; the last one is the merged specialist reply
+        resolution = next(
+            (m.get("content") for m in reversed(chat_result.chat_history) if m.get("role") == "assistant"), None
+        )
+        result = {"id": ticket_id, "status": "ok", "summary": chat_result.summary, "resolution": resolution}
+    except Exception as e:
+        result = {"id": ticket_id, "status": "error", "error": f"{type(e).__name__}: {e}"}
+    result["latency_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_batch(tickets, output, concurrency=4):
+    """
+    Process `tickets` with at most `concurrency` in flight and stream results to `output`.
+
+    Returns the throughput report as a dict.
+    """
+    write_lock = threading.Lock()
+    # Bounds the number of submitted-but-unfinished tickets, so a huge input is never read up front
+    slots = threading.BoundedSemaphore(concurrency)
+    latencies, errors, rejected = [], 0, 0
+    start = time.perf_counter()
+
+    def write(result):
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+    def on_done(future):
+        nonlocal errors
+        try:
+            result = future.result()
+            with write_lock:
+                write(result)
+                latencies.append(result["latency_s"])
+                errors += result["status"] != "ok"
+        finally:
+            # Also when the output breaks (e.g. piped into `head`) or the worker died, so the submit loop never hangs
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ticket") as pool:
+        for ticket_id, inquiry, error in tickets:
+            if error is not None:
+                # Malformed lines never reach the agents, so they stay out of the latency figures
+                with write_lock:
+                    write({"id": ticket_id, "status": "error", "error": error})
+                rejected += 1
+                continue
+            slots.acquire()
+            pool.submit(process_ticket, ticket_id, inquiry).add_done_callback(on_done)
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    limiter = get_rate_limiter()
+    return {
+        "tickets": len(latencies) + rejected,
+        "errors": errors + rejected,
+        "malformed": rejected,
+        "elapsed_s": round(elapsed, 3),
+        "tickets_per_min": round(len(latencies) / elapsed * 60, 2) if elapsed else 0.0,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p95_s": percentile(latencies, 95),
+        # Time requests spent queued for rate limits, reported apart from model latency
+        "rate_limiter": limiter.stats() if limiter is not None else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run customer support inquiries in bulk.")
+    parser.add_argument("--input", default="-", help="JSONL file with tickets, '-' for stdin")
+    parser.add_argument("--output", default="-", help="JSONL file for results, '-' for stdout")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of tickets processed at once")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        # Agent console output goes to stderr so stdout only carries the JSONL results
+        with contextlib.redirect_stdout(sys.stderr):
+            report = run_batch(read_tickets(source), sink, concurrency=max(1, args.concurrency))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print(json.dumps(report), file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+"""
+Precomputed aggregation layer for the financial report use case.
+
+Instead of pasting the raw ledger (`df.to_dict()`) into the prompt, the report agents receive a
+handful of compact summary tables built with vectorized pandas group-bys:
+
+- totals: flow columns summed, balance-sheet columns at their latest value,
+- monthly: one row per month with month-over-month deltas and percentage changes,
+- quarterly: the same rollup per quarter,
+- categories: per-category rollups when the ledger has categorical columns
+  (e.g. Category, Department), otherwise per-metric statistics (sums for flows, latest values
+  for balance-sheet columns),
+- ratios: profit margin and debt ratio when the columns are present.
+
+Results are cached in memory and on disk (`.cache/financial_aggregates`, or AG2_AGGREGATES_CACHE_DIR). A cache entry is reused
+while the file's mtime and size are unchanged; when they change, the content hash decides whether
+the aggregates really need to be rebuilt.
+"""
+
+CACHE_DIR = os.getenv(
+    "AG2_AGGREGATES_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".cache", "financial_aggregates"),
+)
+DATE_COLUMN = "Date"
+# Balance-sheet columns describe a position at a point in time, so they are not summed over periods
+STOCK_COLUMNS = {"Assets", "Liabilities", "Equity", "Cash", "Inventory"}
+# Version of the disk cache entries; bump when the tables or their serialization change
+CACHE_FORMAT = 2
+
+_memory_cache = {}
+_lock = threading.Lock()
+
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_file(path):
+    name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{name}.json")
+
+
+def load_ledger(path) -> pd.DataFrame:
+    """Read the ledger CSV, parsing the date column."""
+    df = pd.read_csv(path)
+    if DATE_COLUMN in df.columns:
+        df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN])
+        df = df.sort_values(DATE_COLUMN, kind="stable")
+    return df
+
+
+def _period_rollup(df, numeric, flows, stocks, freq):
+    periods = df[DATE_COLUMN].dt.to_period(freq)
+    grouped = df.groupby(periods, sort=True)
+    rollup = pd.concat([grouped[flows].sum(), grouped[stocks].last()], axis=1)[numeric]
+    deltas = rollup.diff().add_suffix("_delta")
+    changes = (rollup.pct_change(fill_method=None) * 100).round(2).add_suffix("_pct")
+    table = pd.concat([rollup, deltas, changes], axis=1)
+    table.index = table.index.astype(str)
+    return table
+
+
+def build_aggregates(df: pd.DataFrame) -> dict:
+    """Compute the summary tables for a ledger DataFrame."""
+    numeric = df.select_dtypes(include=np.number).columns.tolist()
+    stocks = [c for c in numeric if c in STOCK_COLUMNS]
+    flows = [c for c in numeric if c not in STOCK_COLUMNS]
+    categorical = [c for c in df.select_dtypes(include=["object", "category"]).columns if c != DATE_COLUMN]
+
+    totals = pd.concat([df[flows].sum(), df[stocks].iloc[-1:].squeeze(axis=0) if stocks else pd.Series(dtype=float)])
+    aggregates = {"totals": totals.reindex(numeric).to_frame("total")}
+
+    if DATE_COLUMN in df.columns and len(df):
+        aggregates["monthly"] = _period_rollup(df, numeric, flows, stocks, "M")
+        aggregates["quarterly"] = _period_rollup(df, numeric, flows, stocks, "Q")
+
+    if categorical:
+        for column in categorical:
+            aggregates[f"by_{column.lower()}"] = df.groupby(column, sort=True)[flows].sum()
+    else:
+        # Flows are summed; stocks are positions, so they get their latest value instead
+        statistics = pd.concat(
+            [
+                df[flows].agg(["sum", "mean", "min", "max"]).T,
+                pd.concat([df[stocks].iloc[-1].rename("last"), df[stocks].agg(["mean", "min", "max"]).T], axis=1),
+            ]
+        )
+        aggregates["categories"] = statistics.reindex(index=numeric, columns=["sum", "last", "mean", "min", "max"])
+
+    ratios = {}
+    if {"Profit", "Revenue"} <= set(numeric):
+        ratios["profit_margin_pct"] = df["Profit"].sum() / df["Revenue"].sum() * 100
+    if {"Liabilities", "Assets"} <= set(numeric):
+        ratios["debt_ratio_pct"] = df["Liabilities"].iloc[-1] / df["Assets"].iloc[-1] * 100
+    if ratios:
+        aggregates["ratios"] = pd.Series(ratios).round(2).to_frame("value")
+    return aggregates
+
+
+def _to_json(aggregates):
+    # orient="split" drops the axis names (e.g. the "Date" index header), so they are stored alongside
+    return {
+        name: {**json.loads(table.to_json(orient="split")), "index_name": table.index.name, "columns_name": table.columns.name}
+        for name, table in aggregates.items()
+    }
+
+
+def _from_json(data):
+    tables = {}
+    for name, table in data.items():
+        table = dict(table)
+        index_name, columns_name = table.pop("index_name", None), table.pop("columns_name", None)
+        frame = pd.DataFrame(**table)
+        frame.index.name, frame.columns.name = index_name, columns_name
+        tables[name] = frame
+    return tables
+
+
+def _read_disk_cache(path):
+    try:
+        with open(_cache_file(path), "r") as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    # Entries written by an older layout are rebuilt
+    return entry if entry.get("format") == CACHE_FORMAT else None
+
+
+def _write_disk_cache(path, entry):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = _cache_file(path) + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(entry, file)
+    os.replace(tmp_path, _cache_file(path))
+
+
+def get_aggregates(path) -> dict:
+    """Return the summary tables for `path`, rebuilding them only when the file content changed."""
+    path = os.path.abspath(path)
+    stat = _file_stat(path)
+    with _lock:
+        entry = _memory_cache.get(path)
+        if entry is None:
+            disk_entry = _read_disk_cache(path)
+            if disk_entry is not None:
+                entry = {**disk_entry, "tables": _from_json(disk_entry["tables"])}
+
+        if entry is not None and entry["stat"] == stat:
+            _memory_cache[path] = entry
+            return entry["tables"]
+
+        content_hash = _content_hash(path)
+        if entry is None or entry["hash"] != content_hash:
+            tables = build_aggregates(load_ledger(path))
+        else:
+            # Touched but unchanged: keep the tables, refresh the recorded stat
+            tables = entry["tables"]
+        entry = {"stat": stat, "hash": content_hash, "tables": tables}
+        _memory_cache[path] = entry
+        _write_disk_cache(path, {"format": CACHE_FORMAT, "stat": stat, "hash": content_hash, "tables": _to_json(tables)})
+        return tables
+
+
+def format_aggregates(aggregates: dict) -> str:
+    """Render the summary tables as compact text for a prompt."""
+    sections = []
+    for name, table in aggregates.items():
+        sections.append(f"## {name}\n{table.to_csv(float_format='%.2f')}")
+    return "\n".join(sections)
+
+
+def get_financial_summary(path) -> str:
+    """Compact, cached text summary of the ledger at `path`."""
+    return format_aggregates(get_aggregates(path))
@@ -1,9 +1,12 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent, UserProxyAgent, GroupChat, GroupChatManager, AssistantAgent
 from dotenv import load_dotenv
-import pprint
-import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.llm_client import build_llm_config
+from common.telemetry import start_telemetry, stop_telemetry
+from financial_aggregates import get_financial_summary
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
@@ -25,21 +28,7 @@ The structure of this script allows for a streamlined and efficient process in g
 """
 
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0.4,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-    "config_list": [{
-        "model": model,
-        "api_key": os.getenv("OPENAI_API_KEY"),
-        "timeout": 60,
-        "max_retries": 3
-    }]
-}
-
-if not llm_config["api_key"]:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
+llm_config = build_llm_config(temperature=0.4)
 
 # Define the data aggregation agent
 data_aggregation_agent = AssistantAgent(
@@ -109,11 +98,15 @@ user_proxy = UserProxyAgent(
 )
 
 
-# Function to read CSV file and prepare data for aggregation
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "financial_data.csv")
+
+
+# Function to read CSV file and prepare data for aggregation.
+# The agents get compact summary tables (totals, month-over-month deltas, rollups) instead of the
+# raw frame; they are cached and only rebuilt when the CSV changes.
 def read_csv_file():
     print("Reading CSV file...")
-    df = pd.read_csv(r"usecase\data\financial_data.csv")
-    return df.to_dict()
+    return get_financial_summary(DATA_PATH)
 
 
 # Register nested chats with the user proxy agent
@@ -158,10 +151,17 @@ initial_task = (
     """Collect and aggregate financial data for the monthly financial report."""
 )
 
+# Record tokens, latency, retries and cache hits of every call, per agent and round
+telemetry = start_telemetry("financial_report", agents=[user_proxy])
+
 # Start the nested chat
 user_proxy.initiate_chat(
     recipient=data_aggregation_agent,
     message=initial_task,
     max_turns=2,
     summary_method="last_msg",
-)
\ No newline at end of file
+)
+
+stop_telemetry()
+print(telemetry.format_summary())
+print(f"Telemetry: {telemetry.jsonl_path}, {telemetry.prometheus_path}")
@@ -1,64 +1,54 @@
 import os
+import sys
 import warnings
 from autogen import ConversableAgent, UserProxyAgent, GroupChat, GroupChatManager, AssistantAgent
 from dotenv import load_dotenv
-import pprint
-import pandas as pd
 import autogen
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.chart_rendering import chart_tool
+from common.kernel_pool import PooledCodeExecutor
+from common.llm_client import build_llm_config
+from review_pipeline import format_stage_report, run_review_pipeline
+from article_chunking import DEFAULT_MAX_CHUNK_TOKENS, analyze_article_chunked, count_tokens
 
 warnings.filterwarnings("ignore", category=UserWarning, message=".*FLAML.*")
 
 load_dotenv()
 
 
-model = "gpt-3.5-turbo"
-llm_config = {
-    "model": model,
-    "temperature": 0.4,
-    "api_key": os.getenv("OPENAI_API_KEY"),
-    "config_list": [{
-        "model": model,
-        "api_key": os.getenv("OPENAI_API_KEY"),
-        "timeout": 60,
-        "max_retries": 3
-    }]
-}
-
-if not llm_config["api_key"]:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
+llm_config = build_llm_config(temperature=0.4)
 
 def read_article(file_path):
     with open(file_path, "r") as file:
         return file.read()
 
 
+# Charts are rendered by the headless rendering service instead of freshly generated plotting code;
+# built first, so its worker processes are forked before the code executor starts any threads
+render_charts = chart_tool(output_dir="code_execution")
+
 # Create an AssistantAgent instance named "assistant"
 assistant = autogen.AssistantAgent(
     name="assistant",
     llm_config=llm_config,
-    is_termination_msg=lambda x: True if "TERMINATE" in x.get("content") else False,
+    is_termination_msg=lambda x: "TERMINATE" in (x.get("content") or ""),
 )
 
 # Create a UserProxyAgent instance named "user_proxy"
 user_proxy = autogen.UserProxyAgent(
     name="user_proxy",
     human_input_mode="NEVER",
-    is_termination_msg=lambda x: True if "TERMINATE" in x.get("content") else False,
+    is_termination_msg=lambda x: "TERMINATE" in (x.get("content") or ""),
     max_consecutive_auto_reply=10,
-    code_execution_config={
-        "work_dir": "code_execution",
-        "use_docker": False,
-    },
+    # Python blocks run in a pre-warmed kernel with pandas and matplotlib already imported
+    code_execution_config={"executor": PooledCodeExecutor(work_dir="code_execution", timeout=60)},
 )
 
-# Define the agents
-content_analysis_agent = AssistantAgent(
-    name="Content_Analysis_Agent",
-    llm_config=llm_config,
-    system_message="""
-    You analyze the submitted article for structure, coherence, and completeness.
-    """,
-)
+assistant.register_for_llm(
+    name="render_charts",
+    description="Render line, bar or multi-series charts to PNG or SVG files in the working directory",
+)(render_charts)
+user_proxy.register_for_execution(name="render_charts")(render_charts)
 
 # Task 1: Find research papers
 task1 = """
@@ -76,81 +66,23 @@ task3 = """Use this data to generate a bar chart of healthcare applications and
 user_proxy.initiate_chat(assistant, message=task3, clear_history=False)
 
 
-file_path = r"usecase\data\article.txt"
+file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "article.txt")
 article_content = read_article(file_path)
 
-initial_task = f"Analyze the following article for structure, coherence, and completeness: {article_content}"
-
-content_result = user_proxy.initiate_chat(
-    recipient=content_analysis_agent,
-    message=initial_task,
-    max_turns=2,
-    summary_method="last_msg",
-)
-
-style_review_agent = AssistantAgent(
-    name="Style_Review_Agent",
-    llm_config=llm_config,
-    system_message="""
-    You review the article for language use, tone, and style consistency.
-    """,
-)
-
-fact_checking_agent = AssistantAgent(
-    name="Fact_Checking_Agent",
-    llm_config=llm_config,
-    system_message="""
-    You verify the factual accuracy of the content.
-    """,
-)
-
-editorial_feedback_agent = AssistantAgent(
-    name="Editorial_Feedback_Agent",
-    llm_config=llm_config,
-    system_message="""
-    You provide comprehensive feedback and suggestions for improvement.
-    """,
-)
-
-final_review_agent = AssistantAgent(
-    name="Final_Review_Agent",
-    llm_config=llm_config,
-    system_message="""
-    You summarize the overall quality of the article and readiness for publication.
-    """,
-)
-
-
-
-
-style_result = user_proxy.initiate_chat(
-    recipient=style_review_agent,
-    message=content_result,
-    max_turns=2,
-    summary_method="last_msg",
-)
-
-fact_result = user_proxy.initiate_chat(
-    recipient=fact_checking_agent,
-    message=style_result,
-    max_turns=2,
-    summary_method="last_msg",
-)
-
-feedback_result = user_proxy.initiate_chat(
-    recipient=editorial_feedback_agent,
-    message=fact_result,
-    max_turns=2,
-    summary_method="last_msg",
-)
-
-
-final_summary = user_proxy.initiate_chat(
-    recipient=final_review_agent,
-    message=feedback_result,
-    max_turns=2,
-    summary_method="last_msg",
-)
-
+# Articles too long for one prompt are analyzed chunk by chunk (map-reduce, cached per chunk);
+# the merged findings are the content analysis, and the stages reading the article get its chunks
+article_chunks, analysis = None, None
+if count_tokens(article_content) > DEFAULT_MAX_CHUNK_TOKENS:
+    chunked = analyze_article_chunked(article_content, llm_config)
+    print("Chunked analysis:", chunked["stats"])
+    article_chunks = [chunk["text"] for chunk in chunked["chunks"]]
+    analysis = chunked["findings"]
+
+# Review the article as a staged pipeline: each stage passes on only its summary, and the
+# style review and fact check run concurrently once the content analysis is done
+review = run_review_pipeline(article_content, llm_config, chunks=article_chunks, analysis=analysis)
+
+print("Review stages:")
+print(format_stage_report(review))
 print("Final Summary or Report:")
-print(final_summary)
\ No newline at end of file
+print(review["final"])
@@ -0,0 +1,262 @@
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from autogen import AssistantAgent, ConversableAgent, UserProxyAgent
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.nested_chats import a_run_chats
+
+"""
+Staged article review pipeline for the research automation use case.
+
+The review runs as a small dependency graph of stages instead of a chain of chats that pass
+whole ChatResult objects along:
+
+    content_analysis --> style_review --+
+                     \\-> fact_check ----+--> editorial_feedback --> final_review
+
+- every stage hands on only its summary artifact: a labelled last-message summary, delivered
+  to the stages that depend on it as carryover,
+- only the stages that need the article text (analysis, style, fact check) receive it,
+- stages whose prerequisites are done run concurrently (style review and fact checking),
+- each stage is one request/response turn with its reviewer.
+
+Articles too long for one prompt are passed as `chunks` (see article_chunking.py): every stage
+that reads the article then runs once per chunk, each part with its own reviewer, and the stages
+after it receive all the parts. A content analysis already produced elsewhere (the merged
+chunk findings) is passed as `analysis`; it becomes that stage's artifact instead of a chat.
+
+`run_review_pipeline` returns the stage summaries plus per-stage latency and token usage.
+"""
+
+# id -> reviewer, task, whether the stage reads the article, and the stages it builds on
+REVIEW_STAGES = [
+    {
+        "id": "content_analysis",
+        "title": "Content analysis",
+        "agent": "Content_Analysis_Agent",
+        "system_message": "You analyze the submitted article for structure, coherence, and completeness.",
+        "task": "Analyze the following article for structure, coherence, and completeness.",
+        "needs_article": True,
+        "prerequisites": [],
+    },
+    {
+        "id": "style_review",
+        "title": "Style review",
+        "agent": "Style_Review_Agent",
+        "system_message": "You review the article for language use, tone, and style consistency.",
+        "task": "Review the following article for language use, tone, and style consistency.",
+        "needs_article": True,
+        "prerequisites": ["content_analysis"],
+    },
+    {
+        "id": "fact_check",
+        "title": "Fact check",
+        "agent": "Fact_Checking_Agent",
+        "system_message": "You verify the factual accuracy of the content.",
+        "task": "Verify the factual accuracy of the following article.",
+        "needs_article": True,
+        "prerequisites": ["content_analysis"],
+    },
+    {
+        "id": "editorial_feedback",
+        "title": "Editorial feedback",
+        "agent": "Editorial_Feedback_Agent",
+        "system_message": "You provide comprehensive feedback and suggestions for improvement.",
+        "task": "Based on the reviews below, provide comprehensive feedback and suggestions for improving the article.",
+        "needs_article": False,
+        "prerequisites": ["content_analysis", "style_review", "fact_check"],
+    },
+    {
+        "id": "final_review",
+        "title": "Final review",
+        "agent": "Final_Review_Agent",
+        "system_message": "You summarize the overall quality of the article and readiness for publication.",
+        "task": "Based on the editorial feedback below, summarize the overall quality of the article and its readiness for publication.",
+        "needs_article": False,
+        "prerequisites": ["editorial_feedback"],
+    },
+]
+
+
+def stage_chat_ids(stage, chunks=None) -> list:
+    """Chat ids of a stage: one per chunk when the stage reads an article split into chunks."""
+    if stage["needs_article"] and chunks and len(chunks) > 1:
+        return [f"{stage['id']}:{i + 1}" for i in range(len(chunks))]
+    return [stage["id"]]
+
+
+def _reviewer(stage, chat_id, llm_config):
+    part = chat_id.partition(":")[2]
+    name = f"{stage['agent']}_{part}" if part else stage["agent"]
+    return AssistantAgent(name=name, llm_config=llm_config, system_message=stage["system_message"])
+
+
+def create_review_agents(llm_config, stages=REVIEW_STAGES, chunks=None):
+    """Build one reviewer per stage (per chunk for stages reading a chunked article) plus the coordinator."""
+    agents = {
+        chat_id: _reviewer(stage, chat_id, llm_config) for stage in stages for chat_id in stage_chat_ids(stage, chunks)
+    }
+    agents["coordinator"] = UserProxyAgent(
+        name="Review_Coordinator",
+        human_input_mode="NEVER",
+        llm_config=False,
+        code_execution_config=False,
+    )
+    return agents
+
+
+def _labelled_summary(title):
+    """summary_method that labels the reviewer's last message with the stage title."""
+
+    def summarize(sender, recipient, summary_args):
+        return f"{title}:\n{ConversableAgent._last_msg_as_summary(sender, recipient, summary_args).strip()}"
+
+    return summarize
+
+
+def _usage(agent):
+    """(prompt_tokens, completion_tokens) accumulated by the agent's client so far."""
+    usage = agent.get_total_usage() or {}
+    prompt = sum(v.get("prompt_tokens", 0) for v in usage.values() if isinstance(v, dict))
+    completion = sum(v.get("completion_tokens", 0) for v in usage.values() if isinstance(v, dict))
+    return prompt, completion
+
+
+def build_review_chats(article, agents, stages=REVIEW_STAGES, silent=False, chunks=None, done=None):
+    """
+    Chat queue for `a_run_chats`: one single-turn chat per stage (or per chunk), linked by prerequisites.
+
+    `done` maps the ids of stages already completed to their artifacts, which reach the stages
+    depending on them as carryover.
+    """
+    done = done or {}
+    by_id = {stage["id"]: stage for stage in stages}
+    chats = []
+    for stage in stages:
+        if stage["id"] in done:
+            continue
+        prerequisites = [
+            chat_id for p in stage["prerequisites"] if p not in done for chat_id in stage_chat_ids(by_id[p], chunks)
+        ]
+        carryover = [done[p] for p in stage["prerequisites"] if p in done]
+        chat_ids = stage_chat_ids(stage, chunks)
+        for i, chat_id in enumerate(chat_ids):
+            message, title = stage["task"], stage["title"]
+            if stage["needs_article"] and len(chat_ids) > 1:
+                message += f"\n\nArticle part {i + 1} of {len(chat_ids)}:\n{chunks[i]}"
+                title += f" (part {i + 1} of {len(chat_ids)})"
+            elif stage["needs_article"]:
+                message += f"\n\nArticle:\n{article}"
+            chats.append(
+                {
+                    "chat_id": chat_id,
+                    "sender": agents["coordinator"],
+                    "recipient": agents[chat_id],
+                    "message": message,
+                    "prerequisites": prerequisites,
+                    "carryover": carryover,
+                    "max_turns": 1,
+                    "summary_method": _labelled_summary(title),
+                    "silent": silent,
+                }
+            )
+    return chats
+
+
+async def a_run_review_pipeline(
+    article, llm_config=None, agents=None, stages=REVIEW_STAGES, silent=False, chunks=None, analysis=None
+) -> dict:
+    """
+    Run the review stages, concurrently where the dependency graph allows.
+
+    `chunks` splits the article for the stages that read it; `analysis` is a content analysis
+    produced beforehand, used as the content_analysis artifact instead of running that stage.
+
+    Returns {"stages": {stage id: {...}}, "final": final summary, "wall_s": ...}, where every
+    stage entry holds its summary, latency and token usage.
+    """
+    done = {}
+    if analysis is not None:
+        title = next(stage["title"] for stage in stages if stage["id"] == "content_analysis")
+        done["content_analysis"] = f"{title}:\n{analysis.strip()}"
+    pending = [stage for stage in stages if stage["id"] not in done]
+    if agents is None:
+        agents = create_review_agents(llm_config, pending, chunks)
+    else:
+        # Reviewers for the chunk parts the caller's roster does not have yet
+        agents = dict(agents)
+        for stage in pending:
+            for chat_id in stage_chat_ids(stage, chunks):
+                if chat_id not in agents:
+                    agents[chat_id] = _reviewer(stage, chat_id, llm_config)
+    chats = build_review_chats(article, agents, stages, silent=silent, chunks=chunks, done=done)
+    usage_before = {chat["chat_id"]: _usage(chat["recipient"]) for chat in chats}
+    timings = {}
+    start = time.perf_counter()
+    results = await a_run_chats(chats, timings=timings)
+    wall = time.perf_counter() - start
+
+    report = {}
+    for stage in stages:
+        if stage["id"] in done:
+            report[stage["id"]] = {
+                "agent": None,
+                "summary": done[stage["id"]],
+                "started_at_s": 0.0,
+                "latency_s": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+            }
+            continue
+        chat_ids = stage_chat_ids(stage, chunks)
+        prompt = completion = 0
+        for chat_id in chat_ids:
+            after, before = _usage(agents[chat_id]), usage_before[chat_id]
+            prompt += after[0] - before[0]
+            completion += after[1] - before[1]
+        first = min(timings[chat_id]["start"] for chat_id in chat_ids)
+        last = max(timings[chat_id]["end"] for chat_id in chat_ids)
+        report[stage["id"]] = {
+            "agent": stage["agent"],
+            "summary": "\n\n".join(results[chat_id].summary for chat_id in chat_ids),
+            "started_at_s": round(first - start, 3),
+            "latency_s": round(last - first, 3),
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+        }
+    return {
+        "stages": report,
+        "final": report[stages[-1]["id"]]["summary"],
+        "wall_s": round(wall, 3),
+        "total_tokens": sum(s["total_tokens"] for s in report.values()),
+    }
+
+
+def run_review_pipeline(
+    article, llm_config=None, agents=None, stages=REVIEW_STAGES, silent=False, chunks=None, analysis=None
+) -> dict:
+    """Synchronous entry point for `a_run_review_pipeline`."""
+    coroutine = a_run_review_pipeline(article, llm_config, agents, stages, silent, chunks, analysis)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # Called from code already running on an event loop: use a private loop on a helper thread
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="review-pipeline") as pool:
+        return pool.submit(asyncio.run, coroutine).result()
+
+
+def format_stage_report(pipeline_result) -> str:
+    """One line per stage: when it started, how long it took and the tokens it used."""
+    lines = [f"{'stage':<20} {'start':>7} {'latency':>8} {'tokens':>7}"]
+    for stage_id, stage in pipeline_result["stages"].items():
+        lines.append(
+            f"{stage_id:<20} {stage['started_at_s']:>6.2f}s {stage['latency_s']:>7.2f}s {stage['total_tokens']:>7}"
+        )
+    lines.append(f"{'pipeline':<20} {'':>7} {pipeline_result['wall_s']:>7.2f}s {pipeline_result['total_tokens']:>7}")
+    return "\n".join(lines)
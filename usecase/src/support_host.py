@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+
+from customer_support import create_support_agents, register_support_nested_chats
+from customer_support_batch import read_tickets
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.session_host import SessionHost
+
+"""
+Customer support sessions served by a long-running SessionHost.
+
+Unlike customer_support_batch.py, which builds the whole support roster for every ticket, the
+roster is registered once as a template; every ticket runs on cheap per-session clones that share
+the llm_config and model clients, with the specialist nested chats wired per session. Tickets run
+concurrently as asyncio sessions and one JSONL result per ticket is streamed as soon as it finishes.
+
+Usage:
+    python usecase/src/support_host.py --input tickets.jsonl --output results.jsonl --concurrency 8
+    cat tickets.jsonl | python usecase/src/support_host.py > results.jsonl
+
+The host report (template build cost, per-session setup amortized over all sessions, session
+latency and cost) is printed on stderr at the end.
+"""
+
+
+def support_session(ticket_id, inquiry, output):
+    """Conversation for one ticket; writes its JSONL result when done."""
+
+    async def run(agents):
+        start = time.perf_counter()
+        try:
+            chat_result = await agents["user_proxy"].a_initiate_chat(
+                recipient=agents["inquiry"], message=inquiry, max_turns=2, summary_method="last_msg", silent=True
+            )
+            resolution = next(
+                (m.get("content") for m in reversed(chat_result.chat_history) if m.get("role") == "assistant"), None
+            )
+            result = {"id": ticket_id, "status": "ok", "summary": chat_result.summary, "resolution": resolution}
+        except Exception as e:
+            result = {"id": ticket_id, "status": "error", "error": f"{type(e).__name__}: {e}"}
+        result["latency_s"] = round(time.perf_counter() - start, 3)
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+        return result
+
+    return run
+
+
+async def serve(tickets, output, concurrency=8):
+    host = SessionHost(concurrency=concurrency)
+    host.register(
+        "customer_support",
+        create_support_agents,
+        wire=lambda agents: register_support_nested_chats(agents, silent=True, use_async=True),
+    )
+    start = time.perf_counter()
+    sessions, rejected = [], 0
+    for ticket_id, inquiry, error in tickets:
+        if error is not None:
+            # Malformed lines get their error result right away and never start a session
+            output.write(json.dumps({"id": ticket_id, "status": "error", "error": error}) + "\n")
+            rejected += 1
+            continue
+        sessions.append(support_session(ticket_id, inquiry, output))
+    output.flush()
+    results = await host.run_sessions("customer_support", sessions)
+    elapsed = time.perf_counter() - start
+    return {
+        "tickets": len(results) + rejected,
+        "errors": sum(1 for r in results if isinstance(r, Exception) or r["status"] != "ok") + rejected,
+        "malformed": rejected,
+        "elapsed_s": round(elapsed, 3),
+        "tickets_per_min": round(len(results) / elapsed * 60, 2) if elapsed else 0.0,
+        "host": host.stats(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve customer support inquiries from one long-running host.")
+    parser.add_argument("--input", default="-", help="JSONL file with tickets, '-' for stdin")
+    parser.add_argument("--output", default="-", help="JSONL file for results, '-' for stdout")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of sessions running at once")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        # Agent console output goes to stderr so stdout only carries the JSONL results
+        with contextlib.redirect_stdout(sys.stderr):
+            report = asyncio.run(serve(list(read_tickets(source)), sink, concurrency=max(1, args.concurrency)))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print(json.dumps(report), file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    main()